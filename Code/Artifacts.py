@@ -0,0 +1,242 @@
+import streamlit as st
+import os
+import io
+import time
+import base64
+import hashlib
+import threading
+import zipfile
+import functools
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+from functools import lru_cache
+from urllib.parse import quote
+from Workers import submit_background
+
+
+# Folder served by Streamlit under app/static (server.enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+
+# Generated files are written once under artifacts/<content hash>/<file name>
+ARTIFACT_DIR = os.path.join(STATIC_DIR, 'artifacts')
+ARTIFACT_URL = 'app/static/artifacts'
+
+# Artifacts not linked by any page for this long are removed (checked at most once per PRUNE_INTERVAL)
+MAX_ARTIFACT_AGE = 24 * 60 * 60
+PRUNE_INTERVAL = 60 * 60
+
+# MIME types of the data URIs used when static serving is switched off
+MIME_TYPES = {
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+}
+
+# Session keys of the PowerPoint Customization page, every generated deck depends on them
+CUSTOMIZATION_KEYS = (
+    'bg_color', 'font_color', 'ribbon_color_1', 'ribbon_color_2', 'row_bg_color', 'row_font_color',
+    'content_font_color', 'title_font_color', 'ribbon_font_1', 'ribbon_font_2', 'ribbon_font_color',
+)
+
+# Seconds a page waits for its background downloads before it reruns to show their progress
+BACKGROUND_POLL_INTERVAL = 0.5
+
+# Byte budget of the presentations kept by memoize_presentation (least recently used evicted first)
+PRESENTATION_CACHE_BYTES = 256 * 1024 * 1024
+
+_prune_lock = threading.Lock()
+_last_prune = 0.0
+
+# Presentations built by the memoized builders, shared by every session: {fingerprint: bytes}
+_presentation_cache = OrderedDict()
+_presentation_cache_bytes = 0
+_presentation_lock = threading.Lock()
+
+
+# Function to tell whether Streamlit serves the static folder (otherwise the files are embedded as data URIs)
+def static_serving_enabled():
+    try:
+        return bool(st.get_option('server.enableStaticServing'))
+    except Exception:
+        return False
+
+# Function to remove the artifacts no page has linked for MAX_ARTIFACT_AGE
+def prune_artifacts(max_age=MAX_ARTIFACT_AGE):
+    global _last_prune
+    with _prune_lock:
+        now = time.time()
+        if now - _last_prune < PRUNE_INTERVAL or not os.path.isdir(ARTIFACT_DIR):
+            return
+        _last_prune = now
+        for digest in os.listdir(ARTIFACT_DIR):
+            folder = os.path.join(ARTIFACT_DIR, digest)
+            try:
+                if now - os.path.getmtime(folder) > max_age:
+                    for name in os.listdir(folder):
+                        os.remove(os.path.join(folder, name))
+                    os.rmdir(folder)
+            except OSError:
+                # Another session is writing or removing the same artifact
+                continue
+
+# Function to store a generated file under its content hash and return the URL of the download
+def artifact_url(data, file_name):
+    if isinstance(data, io.BytesIO):
+        data = data.getvalue()
+
+    if not static_serving_enabled():
+        mime_type = MIME_TYPES.get(os.path.splitext(file_name)[1].lower(), 'application/octet-stream')
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode()}"
+
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    folder = os.path.join(ARTIFACT_DIR, digest)
+    path = os.path.join(folder, file_name)
+    if os.path.exists(path):
+        # Linked again, so pruning keeps it
+        os.utime(folder)
+    else:
+        prune_artifacts()
+        os.makedirs(folder, exist_ok=True)
+
+        # Written to a temporary name first, so a download never sees half a file
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, 'wb') as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+    return f"{ARTIFACT_URL}/{digest}/{quote(file_name)}"
+
+# Function to read a file of the repository once per modification
+@lru_cache(maxsize=32)
+def _file_bytes(path, mtime):
+    with open(path, 'rb') as file:
+        return file.read()
+
+# Function to get the URL of an image of the Images folder (icons, logos)
+def file_url(path):
+    return artifact_url(_file_bytes(path, os.path.getmtime(path)), os.path.basename(path))
+
+# Function to describe an Office file (zip) by its parts, the zip timestamps change on every save of the same content
+def _office_parts(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return repr([(info.filename, info.CRC, info.file_size) for info in archive.infolist()]).encode()
+    except zipfile.BadZipFile:
+        return data
+
+# Function to fingerprint the inputs of a generated file (DataFrames, arrays, bytes, BytesIO, containers and plain values)
+def inputs_fingerprint(*inputs):
+    digest = hashlib.sha256()
+    for value in inputs:
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+            try:
+                digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+            except TypeError:
+                # Cells pandas cannot hash (lists, dicts) are hashed through their text
+                digest.update(value.to_csv().encode())
+        elif isinstance(value, np.ndarray):
+            digest.update(repr((value.dtype, value.shape)).encode())
+            digest.update(value.tobytes() if value.dtype != object else repr(value.tolist()).encode())
+        elif isinstance(value, (tuple, list)):
+            digest.update(inputs_fingerprint(*value).encode())
+        elif isinstance(value, dict):
+            digest.update(inputs_fingerprint(*value.items()).encode())
+        elif isinstance(value, Future):
+            # Values still computed in the background (chart images) are known by the hash of what they are computed from
+            digest.update(repr(value.fingerprint).encode())
+        elif isinstance(value, (io.BytesIO, bytes, bytearray)):
+            data = value.getvalue() if isinstance(value, io.BytesIO) else bytes(value)
+            digest.update(_office_parts(data) if data[:2] == b'PK' else data)
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+# Function to get the colours chosen on the PowerPoint Customization page (None for the defaults)
+def customization_colours():
+    return tuple(st.session_state.get(name) for name in CUSTOMIZATION_KEYS)
+
+# Function to build a download only when the user asks for it, the result is kept in the session until its inputs change
+# build(progress) returns the file, progress(fraction, text) moves the progress bar
+# The build runs in the background, the page shows its progress and the download appears on the first rerun after it is done
+def lazy_download(key, build, inputs, file_name, help_text="Click here to prepare the file for download"):
+    fingerprint = inputs_fingerprint(*inputs, customization_colours())
+    cached = st.session_state.get(f"{key}_prepared")
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    # Builds of the session still running: {key: (fingerprint, future, [fraction, text])}
+    jobs = st.session_state.setdefault("background_jobs", {})
+    job = jobs.get(key)
+    if job is None or job[0] != fingerprint:
+        if not st.button(f"Prepare {file_name}", key=f"{key}_prepare", help=help_text):
+            return None
+        status = [0.0, f"Preparing {file_name}..."]
+        # The build only records its progress, the page draws it (other threads cannot write to the page)
+        future = submit_background(build, lambda fraction, text: status.__setitem__(slice(None), [fraction, text]))
+        job = jobs[key] = (fingerprint, future, status)
+
+    fingerprint, future, status = job
+    if not future.done():
+        st.progress(status[0], text=status[1])
+        # The page reruns when this build is done (see rerun_while_preparing)
+        st.session_state.setdefault("background_shown", []).append(future)
+        return None
+
+    del jobs[key]
+    # A failed build raises on the page, as if it had run there
+    data = future.result()
+    st.session_state[f"{key}_prepared"] = (fingerprint, data)
+    return data
+
+# Function to rerun the page while downloads of the session are built in the background, called once the page is drawn
+# The page stays usable, a click reruns it at once
+# Only the builds whose progress was drawn by this run count, a build of another page is picked up when that page is opened
+def rerun_while_preparing():
+    shown = st.session_state.pop("background_shown", [])
+    if not shown:
+        return
+    wait(shown, timeout=BACKGROUND_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+    st.rerun()
+
+# Function to keep a built presentation, evicting the least recently used ones beyond the byte budget
+def _remember_presentation(fingerprint, data):
+    global _presentation_cache_bytes
+    if len(data) > PRESENTATION_CACHE_BYTES:
+        return
+    with _presentation_lock:
+        if fingerprint in _presentation_cache:
+            return
+        _presentation_cache[fingerprint] = data
+        _presentation_cache_bytes += len(data)
+        while _presentation_cache_bytes > PRESENTATION_CACHE_BYTES:
+            _, evicted = _presentation_cache.popitem(last=False)
+            _presentation_cache_bytes -= len(evicted)
+
+# Function to make a presentation builder (returning a BytesIO) skip the build while its inputs and the Customization colours are unchanged
+def memoize_presentation(builder):
+    @functools.wraps(builder)
+    def memoized(*args, **kwargs):
+        # Arguments naming a file (e.g. an image) also depend on the version of that file
+        file_versions = [os.path.getmtime(value) for value in args if isinstance(value, str) and os.path.isfile(value)]
+        fingerprint = inputs_fingerprint(f"{builder.__module__}.{builder.__qualname__}", args, sorted(kwargs.items()),
+                                         file_versions, customization_colours())
+        with _presentation_lock:
+            data = _presentation_cache.get(fingerprint)
+            if data is not None:
+                _presentation_cache.move_to_end(fingerprint)
+
+        if data is None:
+            ppt_output = builder(*args, **kwargs)
+            if ppt_output is None:
+                return None
+            data = ppt_output.getvalue()
+            _remember_presentation(fingerprint, data)
+
+        # Every caller gets its own stream, so reading one never moves another
+        return io.BytesIO(data)
+    return memoized
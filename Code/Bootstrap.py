@@ -0,0 +1,106 @@
+import numpy as np
+from statistics import NormalDist
+from Metrics import auc_from_counts, psi_from_counts
+from Workers import get_process_pool
+
+
+# Replicates drawn by one task; fixed so the intervals do not depend on the number of workers
+BLOCK_SIZE = 250
+
+
+# Function to compute the Gini of every resampled row of good and bad counts (groups riskiest first)
+def _gini_of_draws(goods, bads):
+    goods_after = goods.sum(axis=1, keepdims=True) - np.cumsum(goods, axis=1)
+    auc = (bads * (goods_after + 0.5 * goods)).sum(axis=1) / (goods.sum(axis=1) * bads.sum(axis=1))
+    return 2 * auc - 1
+
+# Function to compute the % over prediction ((mean PD - default rate) / default rate) of every resampled row
+def _over_prediction_of_draws(goods, bads, pd_mean):
+    totals = goods + bads
+    predicted = (totals * pd_mean).sum(axis=1) / totals.sum(axis=1)
+    observed = bads.sum(axis=1) / totals.sum(axis=1)
+    return (predicted - observed) / observed
+
+# Function to run one block of bootstrap replicates (executed in a worker process)
+def _bootstrap_block(task):
+    seed, replicates, goods, bads, pd_mean, dev_counts, period_counts, shared = task
+    cells_seed, calibration_seed, psi_seed = seed.spawn(3)
+    results = {}
+
+    if goods is not None:
+        # Resampling accounts with replacement is a multinomial draw over the bucket x outcome cells
+        cells = np.concatenate([goods, bads])
+        k = len(goods)
+        draws = np.random.default_rng(cells_seed).multinomial(int(cells.sum()), cells / cells.sum(), size=replicates)
+        results['gini'] = _gini_of_draws(draws[:, :k], draws[:, k:])
+
+        if pd_mean is not None:
+            if not shared:
+                draws = np.random.default_rng(calibration_seed).multinomial(int(cells.sum()), cells / cells.sum(), size=replicates)
+            results['over_prediction'] = _over_prediction_of_draws(draws[:, :k], draws[:, k:], pd_mean)
+
+    if period_counts is not None:
+        rng = np.random.default_rng(psi_seed)
+        dev_draws = rng.multinomial(int(dev_counts.sum()), dev_counts / dev_counts.sum(), size=replicates)
+        # One draw per period (rows of period_counts) and replicate: replicates x periods x bins
+        sizes = period_counts.sum(axis=1)
+        period_draws = rng.multinomial(sizes.astype(np.int64), period_counts / sizes[:, None],
+                                       size=(replicates, len(period_counts)))
+        results['psi'] = psi_from_counts(dev_draws[:, None, :], period_draws)
+
+    return results
+
+# Function to compute percentile bootstrap intervals for the Gini, % over prediction and PSI in a process pool
+def bootstrap_intervals(goods=None, bads=None, pd_mean=None, dev_counts=None, period_counts=None,
+                        replicates=1000, confidence=0.95, seed=20240331, shared=True, workers=None):
+    goods = None if goods is None else np.asarray(goods, dtype=float)
+    bads = None if bads is None else np.asarray(bads, dtype=float)
+    pd_mean = None if pd_mean is None else np.asarray(pd_mean, dtype=float)
+    dev_counts = None if dev_counts is None else np.asarray(dev_counts, dtype=float)
+    period_counts = None if period_counts is None else np.atleast_2d(np.asarray(period_counts, dtype=float))
+
+    # Every block gets its own child seed, so a run is reproducible whatever the number of workers.
+    # With shared=True the Gini and calibration metrics use the same resamples, and since the cell draw
+    # is always the first draw of a block, separate runs on the same sample reuse identical resamples too.
+    sizes = [BLOCK_SIZE] * (replicates // BLOCK_SIZE) + ([replicates % BLOCK_SIZE] if replicates % BLOCK_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(block_seed, size, goods, bads, pd_mean, dev_counts, period_counts, shared)
+             for block_seed, size in zip(seeds, sizes)]
+
+    if workers == 0 or len(tasks) == 1:
+        blocks = list(map(_bootstrap_block, tasks))
+    else:
+        blocks = list(get_process_pool(workers).map(_bootstrap_block, tasks))
+
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for metric in blocks[0]:
+        values = np.concatenate([block[metric] for block in blocks])
+        bounds = np.nanquantile(values, [alpha, 1 - alpha], axis=0)
+        intervals[metric] = tuple(bounds) if bounds.ndim == 1 else list(zip(bounds[0], bounds[1]))
+    return intervals
+
+# Function to compute the DeLong confidence interval of the AUC (and the Gini) from grouped counts
+def delong_interval(goods, bads, confidence=0.95):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+    total_goods, total_bads = goods.sum(), bads.sum()
+    auc = auc_from_counts(goods, bads)
+
+    # Structural components: for a bad, the share of goods it outranks; for a good, the share of bads outranking it
+    v10 = (total_goods - np.cumsum(goods) + 0.5 * goods) / total_goods
+    v01 = (np.cumsum(bads) - 0.5 * bads) / total_bads
+    s10 = (bads * (v10 - auc) ** 2).sum() / (total_bads - 1)
+    s01 = (goods * (v01 - auc) ** 2).sum() / (total_goods - 1)
+    se = np.sqrt(s10 / total_bads + s01 / total_goods)
+
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    auc_low, auc_high = max(auc - z * se, 0.0), min(auc + z * se, 1.0)
+    return {'auc': (auc_low, auc_high), 'gini': (2 * auc_low - 1, 2 * auc_high - 1), 'se': se}
+
+# Function to format an interval the way the tables format their values
+def format_interval(interval):
+    if interval is None:
+        return ""
+    low, high = (f"{bound:.4f}".rstrip('0').rstrip('.') for bound in interval)
+    return f" [{low}, {high}]"
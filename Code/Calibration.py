@@ -1,12 +1,10 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import plotly.io as pio
 import io
 import os 
 import html
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
 from pptx import Presentation
@@ -14,116 +12,24 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from streamlit_modal import Modal
 from io import BytesIO
-import base64
-import pickle
 from gini import create_ppt_download_button_gini
+from Loader import load_dataset
+from Bootstrap import bootstrap_intervals, format_interval
+from Metrics import calibration_test_table, calibration_test_history
+from Report import add_title_slide, add_content_slide, add_table_slide
+from Tables import show_table, table_to_excel, rag_styles, styles_on_rows
+from Thresholds import load_thresholds, save_thresholds
+from Artifacts import artifact_url, file_url, lazy_download, memoize_presentation
+from Merge import assemble_presentation
+from Template import template_presentation, add_styled_table
+from Charts import figure_png_future, png_bytes
 
 
 # Function to load a PowerPoint presentation from BytesIO
 def load_presentation_from_bytesio(presentation_bytesio):
     return Presentation(presentation_bytesio)
 
-# Function to apply title styling
-def style_title(title_shape):
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # Default color black
-
-# Function to apply title styling and background color
-def set_slide_background_and_title_style(slide, title_shape, slide_index):
-    
-    # Create presentation object
-    prs = Presentation()
-    
-    # Set background color
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    
-    #Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position 
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-        
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-
-    # Apply title styling
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
-            
             
-# Function to clone shapes (including GraphicFrame and pictures)
-def clone_shape(original_shape, merged_slide):
-    if original_shape.shape_type == 14:  # Placeholder
-        ph = original_shape.placeholder_format
-        merged_slide.placeholders[ph.idx].text = original_shape.text
-    elif original_shape.shape_type == 13:  # Picture
-        image_stream = BytesIO(original_shape.image.blob)
-        left = original_shape.left
-        top = original_shape.top
-        width = original_shape.width
-        height = original_shape.height
-        merged_slide.shapes.add_picture(image_stream, left, top, width, height)
-    else:  # Other shapes (including GraphicFrame)
-        merged_shape = original_shape._element
-        merged_slide.shapes._spTree.append(merged_shape)
-
 # Function to highlight Gini values based on user-defined thresholds (Threshold 1)
 def highlight_gini_threshold1_calibration(val, thresholds_calibration):
     if val > thresholds_calibration['green_calibration_1']['value']:
@@ -148,6 +54,26 @@ def highlight_gini_threshold2_calibration(val, thresholds_calibration):
         color = 'white'
     return f'background-color: {color}'
 
+# Function to highlight a whole column of % Over Prediction values at once (threshold 1 below zero, threshold 2 otherwise)
+def highlight_calibration_column(values, thresholds_calibration):
+    val = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+    # The saved thresholds only hold the band of the current overall value, values of the other sign stay unstyled
+    threshold1 = threshold2 = np.full(len(val), '', dtype=object)
+    if 'green_calibration_1' in thresholds_calibration:
+        threshold1 = rag_styles(val > thresholds_calibration['green_calibration_1']['value'],
+                                (thresholds_calibration['amber_calibration_1']['lower'] <= val) & (val <= thresholds_calibration['amber_calibration_1']['upper']),
+                                val < thresholds_calibration['red_calibration_1']['value'])
+    if 'green_calibration_2' in thresholds_calibration:
+        threshold2 = rag_styles(val < thresholds_calibration['green_calibration_2']['value'],
+                                (thresholds_calibration['amber_calibration_2']['lower'] <= val) & (val <= thresholds_calibration['amber_calibration_2']['upper']),
+                                val > thresholds_calibration['red_calibration_2']['value'])
+    return np.where(val < 0, threshold1, threshold2)
+
+# Function to colour the Pass / Fail cells of the calibration tests
+def highlight_test_column(values):
+    return np.where(np.asarray(values) == 'Pass', 'background-color: green', 'background-color: red').astype(object)
+
 # # Function to create an Excel file with highlighted cells
 # def to_excel_with_highlights_calibration(df, thresholds_calibration):
 #     output = io.BytesIO()
@@ -193,207 +119,17 @@ def highlight_gini_threshold2_calibration(val, thresholds_calibration):
 #     #st.session_state.calibration_workbook_data = output.getvalue()
 #     return output.getvalue()
 
-# Function to add a slide with the ribbon and logo
-def ppt_ribbon_and_logo(slide, slide_index):
-    # Create presentation object
-    prs = Presentation()
-    # Determine slide dimensions
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    # Calculate ribbon dimensions
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-
-    # Calculate positions for ribbons
-    ribbon_left = Inches(0)
-    ribbon_top = slide_height - ribbon_height
-
-    # Add the first half of the ribbon (amber)
-    shape_amber = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        fill_amber.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber color
-    else:
-        fill_amber.fore_color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    line_amber = shape_amber.line
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        line_amber.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber outline color
-    else:
-        line_amber.color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    # Add text to the amber ribbon
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_1' in st.session_state:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_1[1:])  # Black text
-    else:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)  # Black text
-
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_2' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_color_2' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    # Add slide number
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    slide_number_box = slide.shapes.add_textbox(half_ribbon_width, ribbon_top, half_ribbon_width, ribbon_height)
-    text_frame = slide_number_box.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_2' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_2[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.15)  # Adjust position as needed
-    logo_height = Inches(0.45)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-
 # Function to create PowerPoint presentation with Gini layout for Calibration
-def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment, graph_comment):
-    prs = Presentation() 
-    
-    slide_index = 1  # To keep track of the slide index
-    
-    # Title slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    # Set the background color to the slide
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "PL - Scorecard Model Calibration"
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
-            
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD.jpg')  # Replace with your actual file path
-    logo_left = Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.25)  # Adjust position as needed
-    logo_height = Inches(0.6)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-            
-    # Add slide number to title slide        
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])
-    else:
-        p.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-            
-    slide_index += 1
+@memoize_presentation
+def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment, graph_comment, intervals=None, tests=None):
+    prs = template_presentation()
+
+    # Title slide (background, logo, ribbon and title style come from the template)
+    add_title_slide(prs, "PL - Scorecard Model Calibration")
 
     # Data Table slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide = add_content_slide(prs, "Calibration Calculation")
     shapes = slide.shapes
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-
-    # Add and style title with a shorter height
-    title_shape = shapes.title
-    title_shape.text = "Calibration Calculation"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Determine table size and position
     left = Inches(0.5)
@@ -402,30 +138,15 @@ def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment,
     height = Inches(5.0)  # Adjusted to fit the table within the slide
 
     rows, cols = df.shape
-    table = shapes.add_table(rows + 1, cols, left, top, width, height).table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide, rows + 1, cols, left, top, width, height)
 
     # Set column names and font size
     for col_idx, col_name in enumerate(df.columns):
         cell = table.cell(0, col_idx)
         cell.text = col_name
-        cell.fill.solid()
-        # Check if color is in session state; if not, use default color
-        if 'row_bg_color' in st.session_state:
-            cell.fill.fore_color.rgb = RGBColor.from_string(st.session_state.row_bg_color[1:]) # Teal
-        else:
-            cell.fill.fore_color.rgb = RGBColor(0x00, 0x80, 0x80) # Teal
         for paragraph in cell.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(10)
-                # Check if color is in session state; if not, use default color
-                if 'row_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.row_font_color[1:])  # White font color
-                else:
-                    run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)   #White font
     
 
     # Add data to table and set font size
@@ -437,14 +158,12 @@ def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment,
                 cell.text = f"{value:.4f}".rstrip('0').rstrip('.')
             else:
                 cell.text = str(value)
+            # Confidence interval under the overall % Over Prediction
+            if intervals is not None and row_idx == len(df) - 1 and col_idx == df.columns.get_loc('% Over Prediction'):
+                cell.text += "\n" + format_interval(intervals).strip()
             for paragraph in cell.text_frame.paragraphs:
                 for run in paragraph.runs:
                     run.font.size = Pt(10)
-                    # Check if color is in session state; if not, use default color
-                    if 'content_font_color' in st.session_state:
-                        run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                    else:
-                        run.font.color.rgb = RGBColor(0, 0, 0)
             
             if row_idx == len(df) - 1 and col_idx == df.columns.get_loc('% Over Prediction'):
                 if value < 0:
@@ -481,32 +200,13 @@ def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment,
         for run in paragraph.runs:
             run.font.size = Pt(14)
             
-    slide_index += 1
 
     # Chart slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-    
+    slide = add_content_slide(prs, "Graph")
     shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "Graph"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:  
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
     
     # Add chart image
-    image_stream = io.BytesIO(fig_bytes)
+    image_stream = io.BytesIO(png_bytes(fig_bytes))
     shapes.add_picture(image_stream, Inches(0.6), Inches(0.8), Inches(8.8), Inches(4.5))
     
     # Add graph comment
@@ -518,6 +218,17 @@ def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment,
         for run in paragraph.runs:
             run.font.size = Pt(14)
 
+    # Calibration tests slide (binomial and Jeffreys per bucket, Hosmer-Lemeshow for the portfolio)
+    if tests is not None:
+        tests_table, hosmer_lemeshow = tests
+
+        def test_fill(row_idx, col_name, value):
+            if col_name in ('Binomial', 'Jeffreys'):
+                return RGBColor(0x00, 0xFF, 0x00) if value == 'Pass' else RGBColor(0xFF, 0x00, 0x00)
+            return None
+
+        add_table_slide(prs, "Calibration Tests", tests_table, test_fill, data_comment, hosmer_lemeshow_text(hosmer_lemeshow))
+
     # Save presentation
     ppt_output = io.BytesIO()
     prs.save(ppt_output)
@@ -526,17 +237,9 @@ def create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment,
 
 # Function to create the threshold selection UI for calibration and save thresholds
 def threshold_selection_calibration(show_ui=True):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', 'model_calibration.pkl')
-
-    try:
-        with open(file_path, 'rb') as j:
-            thresholds_calibration = pickle.load(j)
-    except FileNotFoundError:
-        thresholds_calibration = None
+    # Thresholds held by the threshold store (None if they were never saved)
+    saved_thresholds = load_thresholds('calibration')
+    thresholds_calibration = saved_thresholds
 
     if thresholds_calibration:
         green_threshold_1 = thresholds_calibration.get('green_calibration_1', {}).get('value', -0.075)
@@ -654,21 +357,11 @@ def threshold_selection_calibration(show_ui=True):
         'red_calibration_2': {'value': red_threshold_2}
     }
 
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', 'model_calibration.pkl')
-    
-    # Save the thresholds to a file
-    with open(file_path, 'wb') as j:
-        pickle.dump(thresholds_calibration, j)
+    # Save the thresholds to a file (only written when a value changed)
+    save_thresholds('calibration', thresholds_calibration, saved_thresholds)
         
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df = pd.read_excel(os.path.join(base_dir, 'Datasets', 'Calibration_Data_dashboard.xlsx'))  # Ensure the file is in the 'Datasets' directory
+    # Read the Excel file (parsed once and shared across sessions)
+    df = load_dataset('Calibration_Data_dashboard.xlsx')
     last_value = df['% Over Prediction'].iloc[-1]
 
     if last_value < 0:
@@ -686,105 +379,33 @@ def threshold_selection_calibration(show_ui=True):
 
     return thresholds_calibration
 
-def create_ppt_download_button_calibration(df, fig_bytes, thresholds_calibration, data_comment="", graph_comment=""):
+def create_ppt_download_button_calibration(df, fig_bytes, thresholds_calibration, data_comment="", graph_comment="", intervals=None, tests=None):
     # Create PowerPoint presentation bytes
-    ppt_data_calibration = create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment, graph_comment )
+    ppt_data_calibration = create_ppt_calibration(df, fig_bytes, thresholds_calibration, data_comment, graph_comment, intervals, tests)
     
     return ppt_data_calibration
 
-# Function to merge four PowerPoint presentations and apply title styling to specific slides
-def merge_presentations(presentation1, presentation2, presentation3, presentation4, presentation5):
-    merged_presentation = Presentation()
-    slide_index = 1  # To keep track of the slide index
-
-    # Copy slides from presentation1 (Overview) first
-    for slide in presentation1.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [1]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation2 (Change Log)
-    for slide in presentation2.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
 
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
+# Function to compute the bootstrap confidence interval of the overall % Over Prediction (cached per table)
+@st.cache_data(show_spinner=False)
+def calibration_intervals(df):
+    buckets = df.iloc[:-1]
+    goods = buckets['Goods'].to_numpy(dtype=float)
+    bads = buckets['Bads'].to_numpy(dtype=float)
+    pd_mean = buckets['avd_PDv(P)'].to_numpy(dtype=float)
+    return bootstrap_intervals(goods, bads, pd_mean)['over_prediction']
 
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [2]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation3 (Summary)
-    for slide in presentation3.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
+# Function to run the calibration tests of the calibration sample (cached per table)
+@st.cache_data(show_spinner=False)
+def calibration_test_results(df):
+    buckets = df.iloc[:-1]
+    return calibration_test_table(buckets['Bucket'], buckets['Bads'], buckets['Total'], buckets['avd_PDv(P)'])
 
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 3
-        if merged_slide.shapes.title:
-            if slide_index in [3]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-      
-        slide_index += 1
-    
-    # Copy slides from presentation4 (Gini)
-    for slide in presentation4.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 5 or 6
-        if merged_slide.shapes.title:
-            if slide_index in [5, 6]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-            if slide_index in [4]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-    
-        slide_index += 1
-
-    # Copy slides from presentation5 (Calibration)
-    for slide in presentation5.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 8 or 9
-        if merged_slide.shapes.title:
-            if slide_index in [8, 9]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-                
-            if slide_index in [7]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-      
-        slide_index += 1
-        
-    return merged_presentation
-                
+# Function to describe the portfolio Hosmer-Lemeshow result in one line
+def hosmer_lemeshow_text(hosmer_lemeshow):
+    result = 'Pass' if hosmer_lemeshow['pass'] else 'Fail'
+    return (f"Hosmer-Lemeshow: statistic = {hosmer_lemeshow['statistic']:.2f}, degrees of freedom = {hosmer_lemeshow['df']}, "
+            f"p-value = {hosmer_lemeshow['p_value']:.4f} ({result} at 95% confidence)")
 
 # Streamlit app
 def app():
@@ -795,22 +416,20 @@ def app():
         unsafe_allow_html=True
     )
     
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df = pd.read_excel(os.path.join(base_dir, 'Datasets', 'Calibration_Data_dashboard.xlsx'))  # Ensure the file is in the 'Datasets' directory
+    # Read the Excel file (parsed once and shared across sessions)
+    df = load_dataset('Calibration_Data_dashboard.xlsx')
     # Replace None values with empty strings for better display
     df = df.fillna("")
     
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df1 = pd.read_excel(os.path.join(base_dir, 'Datasets', 'Gini_out_calibration_1.xlsx'))  # Ensure the file is in the 'Datasets' directory
+    # Read the Excel file (parsed once and shared across sessions)
+    df1 = load_dataset('Gini_out_calibration_1.xlsx')
     # Replace None values with empty strings for better display
     df1 = df1.fillna("")
     st.session_state.df_calibration = df  # Save df to session_state
+    intervals = calibration_intervals(df)
+    st.session_state.ci_calibration = intervals
+    tests = calibration_test_results(df)
+    st.session_state.calibration_tests = tests
     
     # Initialize comments
     data_comment_calibration = ""
@@ -818,7 +437,7 @@ def app():
     
     
     # Create two tabs: one for data and one for the graph
-    tab1, tab2 = st.tabs(["Calibration Calculation", "Graph"])
+    tab1, tab2, tab3 = st.tabs(["Calibration Calculation", "Graph", "Calibration Tests"])
     
     with tab1:
         thresholds_calibration = threshold_selection_calibration(show_ui=True)
@@ -843,77 +462,6 @@ def app():
         # # Display the DataFrame without unnecessary trailing zeros
         # df_styled =styled_df.format(lambda x: f"{x:.4f}".rstrip('0').rstrip('.') if isinstance(x, float) else f"{x}")
 
-        # Function for formatting values
-        def format_value(val):
-            if isinstance(val, float):
-                # Format floats to 4 decimal places, remove trailing zeros and the dot if not needed
-                return f"{val:.4f}".rstrip('0').rstrip('.')
-            return str(val)
-
-        # Function for creating HTML table with conditional styling
-        def create_html_table_with_download(dataframe, file_name, image_path):
-            # Encode the image as base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
-
-            # Create download link
-            download_link = f"""
-            <style>
-                .download-icon img {{
-                    width: 70px;
-                    height: 70px;
-                    border-radius: 30%;  /* Makes the image circular */
-                    transition: transform 0.3s ease, box-shadow 0.3s ease;
-                }}
-                .download-icon img:hover {{
-                    transform: scale(1.1);  /* Slight zoom effect on hover */
-                    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
-                }}
-                .download-icon img:active {{
-                    transform: scale(0.90);  /* Slight shrink effect on click */
-                    box-shadow: none;  /* Remove shadow when clicked */
-                }}
-            </style>
-
-            <div class="download-icon">
-                <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{base64.b64encode(to_excel(dataframe)).decode()}" download="{file_name}" title="Click to download the file">
-                    <img src="data:image/png;base64,{image_base64}" alt="Download Icon" style="width:27px; height:auto;">
-                </a>
-            </div>
-            """
-
-            last_row_index = dataframe.index[-1]
-
-            # Create HTML table with inline styling
-            html_table = f"""
-            <div class="custom-container">
-                <table class="dataframe">
-                    <thead><tr>
-            """
-            for col_name in dataframe.columns:
-                html_table += f'<th>{html.escape(col_name)}</th>'
-            html_table += '</tr></thead><tbody>'
-            for index, row in dataframe.iterrows():
-                html_table += '<tr>'
-                for col_name, col_value in row.items():
-                    style = ''
-                    formatted_value = format_value(col_value)  # Apply formatting
-                    if col_name == '% Over Prediction' and index == last_row_index:
-                        style = highlight_gini_threshold1_calibration(col_value, thresholds_calibration) if col_value < 0 else highlight_gini_threshold2_calibration(col_value, thresholds_calibration)
-                    html_table += f'<td style="{style}">{html.escape(formatted_value)}</td>'
-                html_table += '</tr>'
-            html_table += '</tbody></table></div>'
-
-            # Combine the download link and the table
-            return download_link + html_table
-
-        # Function to convert DataFrame to Excel
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-            return output.getvalue()
-
         # Optional: If you want to display custom CSS separately
         custom_css = """
         <style>
@@ -974,8 +522,11 @@ def app():
         image_path = os.path.join(base_dir, 'Images', 'Download_icon.png')
 
         # Create HTML table and display it
-        html_table = create_html_table_with_download(df, "Calibration_result.xlsx", image_path)
-        st.markdown(html_table, unsafe_allow_html=True)
+        # Only the overall (last row) % Over Prediction is highlighted, with its confidence interval
+        last_row = np.arange(len(df)) == len(df) - 1
+        styles = {'% Over Prediction': styles_on_rows(highlight_calibration_column(df['% Over Prediction'], thresholds_calibration), last_row)}
+        suffixes = {(len(df) - 1, '% Over Prediction'): format_interval(intervals)}
+        show_table(df, "Calibration_result.xlsx", image_path, table_to_excel, "calibration_result", styles, suffixes)
         
         # Display the DataFrame without unnecessary trailing zeros
         # st.dataframe(df_styled, use_container_width=True)
@@ -1113,14 +664,15 @@ def app():
                     st.session_state.graph_comment_calibration = graph_comment_calibration
                     graph_comment_modal.close()
         
-        # Convert plot figure to PNG bytes
-        fig_bytes = pio.to_image(fig, format='png')
+        # Convert plot figure to PNG bytes in the background, reused while the figure is unchanged
+        fig_bytes = figure_png_future(fig)
         st.session_state.fig_bytes_calibration = fig_bytes
         st.session_state.thresholds_calibration = thresholds_calibration
         
-        ppt_data_calibration = create_ppt_download_button_calibration(df, fig_bytes, thresholds_calibration, st.session_state.get("data_comment_calibration", ""), st.session_state.get("graph_comment_calibration", ""))
+        data_comment_calibration = st.session_state.get("data_comment_calibration", "")
+        graph_comment_calibration = st.session_state.get("graph_comment_calibration", "")
         
-        ppt_data_overview = ppt_data_change_log = ppt_data_summary = None
+        ppt_data_overview = ppt_data_change_log = ppt_data_summary = merged_presentation_bytesio = None
         
         if 'ppt_data_overview' in st.session_state:
             ppt_data_overview = st.session_state.ppt_data_overview
@@ -1133,25 +685,30 @@ def app():
             
         if 'df_gini' in st.session_state and 'fig_bytes' in st.session_state and 'thresholds_gini' in st.session_state:
             df_gini = st.session_state.df_gini
-            fig_bytes = st.session_state.fig_bytes
+            fig_bytes_gini = st.session_state.fig_bytes
             thresholds_gini = st.session_state.thresholds_gini
             data_comment_gini = st.session_state.get("data_comment_gini", "")
             graph_comment_gini = st.session_state.get("graph_comment_gini", "")
-
-            ppt_data_gini = create_ppt_download_button_gini(df_gini, fig_bytes, thresholds_gini, data_comment_gini, graph_comment_gini)
-
+            intervals_gini = st.session_state.get("ci_gini")
+
+            # Function to build the Dashboard presentation, only run when the user asks for it
+            # Only the sections changed since the last Dashboard of the session are rebuilt
+            def build_dashboard(progress):
+                return assemble_presentation("dashboard", [
+                    ("Overview", (ppt_data_overview,), lambda: ppt_data_overview),
+                    ("Change Log", (ppt_data_change_log,), lambda: ppt_data_change_log),
+                    ("Summary", (ppt_data_summary,), lambda: ppt_data_summary),
+                    ("Gini", (df_gini, fig_bytes_gini, thresholds_gini, data_comment_gini, graph_comment_gini, intervals_gini),
+                     lambda: create_ppt_download_button_gini(df_gini, fig_bytes_gini, thresholds_gini, data_comment_gini, graph_comment_gini, intervals_gini)),
+                    ("Calibration", (df, fig_bytes, thresholds_calibration, data_comment_calibration, graph_comment_calibration, intervals, tests),
+                     lambda: create_ppt_download_button_calibration(df, fig_bytes, thresholds_calibration, data_comment_calibration, graph_comment_calibration, intervals, tests)),
+                ], progress)
+
+            if ppt_data_overview and ppt_data_change_log and ppt_data_summary:
+                # The presentation is kept in the session until one of its inputs changes
+                merged_presentation_bytesio = lazy_download("dashboard_calibration", build_dashboard, (ppt_data_overview, ppt_data_change_log, ppt_data_summary, df_gini, fig_bytes_gini, thresholds_gini, data_comment_gini, graph_comment_gini, intervals_gini, df, fig_bytes, thresholds_calibration, data_comment_calibration, graph_comment_calibration, intervals, tests), "Dashboard.pptx", "Click here to prepare the Dashboard PowerPoint presentation")
         
-        if ppt_data_gini and ppt_data_calibration and ppt_data_overview and ppt_data_change_log and ppt_data_summary:
-            presentation1 = load_presentation_from_bytesio(ppt_data_overview)
-            presentation2 = load_presentation_from_bytesio(ppt_data_change_log)
-            presentation3 = load_presentation_from_bytesio(ppt_data_summary)
-            presentation4 = load_presentation_from_bytesio(ppt_data_gini)
-            presentation5 = load_presentation_from_bytesio(ppt_data_calibration)
-
-            merged_presentation = merge_presentations(presentation1, presentation2, presentation3, presentation4, presentation5)
-            merged_presentation_bytesio = BytesIO()
-            merged_presentation.save(merged_presentation_bytesio)
-            merged_presentation_bytesio.seek(0)
+        if merged_presentation_bytesio is not None:
         
             # Base directory of the current script
             base_dir = os.path.dirname(__file__)
@@ -1159,15 +716,14 @@ def app():
             # Construct the path for the image
             image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
             
-            # Read and encode the image to base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
+            # Serve the icon from the artifact store
+            image_url = file_url(image_path)
             
             # Convert BytesIO to bytes
             ppt_data_merged_bytes = merged_presentation_bytesio.getvalue()
             
-            # Encode the PPT data to base64
-            ppt_data_merged_base64 = base64.b64encode(ppt_data_merged_bytes).decode()
+            # Store the PPT file once under its content hash instead of embedding it in the page
+            ppt_data_merged_url = artifact_url(ppt_data_merged_bytes, "Dashboard.pptx")
 
             custom_css = """
             <style>
@@ -1186,13 +742,48 @@ def app():
             
             # Create the HTML for the button with image and help text
             ppt_button_html = f"""
-            <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_merged_base64}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
-                <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+            <a href="{ppt_data_merged_url}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
+                <img src="{image_url}" alt="Download PPT">
             </a>
             """
             
             # Display the custom download button in Streamlit
             st.markdown(ppt_button_html, unsafe_allow_html=True)
 
+    with tab3:
+        st.markdown(
+                """
+                <div style='text-align: center;
+                font-size: 20px;'>
+                    <strong>Binomial and Jeffreys tests by Bucket</strong>
+                </div>
+                """,
+                unsafe_allow_html=True)
+        tests_table, hosmer_lemeshow = tests
+        styles = {col_name: highlight_test_column(tests_table[col_name]) for col_name in ('Binomial', 'Jeffreys')}
+        show_table(tests_table, "Calibration_tests.xlsx", image_path, table_to_excel, "calibration_tests", styles)
+        st.markdown(
+            f"""
+            <div class="info-container">
+                One-sided tests of the PD underestimating the default rate at 95% confidence.<br>
+                {html.escape(hosmer_lemeshow_text(hosmer_lemeshow))}
+            </div>
+            """,
+            unsafe_allow_html=True)
+
+        # Same tests for every date_ref of the performance history, computed in one call
+        st.markdown(
+                """
+                <div style='text-align: center;
+                font-size: 20px;'>
+                    <strong>Calibration tests by date_ref</strong>
+                </div>
+                """,
+                unsafe_allow_html=True)
+        history = calibration_test_history(load_dataset('PERFORMANCE HISTORICAL(Data).xlsx'))
+        st.session_state.df_calibration_test_history = history
+        styles = {'Hosmer-Lemeshow': highlight_test_column(history['Hosmer-Lemeshow'])}
+        show_table(history, "Calibration_tests_history.xlsx", image_path, table_to_excel, "calibration_tests_history", styles)
+
 if __name__ == "__main__":
     app()
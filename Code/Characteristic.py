@@ -0,0 +1,143 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import os
+import html
+from Loader import load_dataset
+from Metrics import csi_batch, csi_ranking
+from Tables import show_table, table_to_excel
+from PSI import highlight_gini_PSI_column, threshold_selection_PSI, load_bin_counts, load_dev_counts
+
+
+# Characteristic frequencies (columns: characteristic, attribute, date_ref, count; date_ref 'Dev' for development)
+CHARACTERISTIC_FILE = 'Characteristic_Data.xlsx'
+
+# Defaults of the PSI page, used for the threshold values that were never saved
+DEFAULT_THRESHOLDS_PSI = {'green_psi': {'value': 0.1}, 'amber_psi': {'lower': 0.1, 'upper': 0.25}, 'red_psi': {'value': 0.25}}
+
+
+# Function to load the characteristic frequencies, falling back to the score bins when no characteristic file is available
+def load_characteristic_frequencies():
+    path = os.path.join(os.path.dirname(__file__), 'Datasets', CHARACTERISTIC_FILE)
+    if os.path.exists(path):
+        return load_dataset(CHARACTERISTIC_FILE), True
+
+    # The final score is the only characteristic shipped with the dashboard
+    periods, period_counts = load_bin_counts()
+    dev_counts = load_dev_counts()
+    attributes = np.arange(1, len(dev_counts) + 1)
+    frames = [pd.DataFrame({'attribute': attributes, 'date_ref': 'Dev', 'count': dev_counts})]
+    for period, counts in zip(periods, period_counts):
+        frames.append(pd.DataFrame({'attribute': attributes, 'date_ref': period, 'count': counts}))
+    frequencies = pd.concat(frames, ignore_index=True)
+    frequencies.insert(0, 'characteristic', 'Score (PD Bucket)')
+    return frequencies, False
+
+# Function to compute the CSI history of every characteristic (cached per dataset version)
+@st.cache_data(show_spinner="Computing the characteristic stability...")
+def characteristic_csi(frequencies):
+    csi = csi_batch(frequencies)
+    csi.columns = [str(col) for col in csi.columns]
+    return csi
+
+# Streamlit app
+def app():
+    st.markdown(
+                """
+                <h1 style='text-align: center; font-size: 28px; color: rgb(39, 45, 85);'>PL - Scorecard Model Characteristic Analysis</h1>
+                """,
+                unsafe_allow_html=True
+            )
+
+    frequencies, has_characteristics = load_characteristic_frequencies()
+    if not has_characteristics:
+        st.info(f"No {CHARACTERISTIC_FILE} found in the Datasets folder, showing the stability of the final score only.")
+
+    # CSI uses the PSI thresholds
+    thresholds_psi = threshold_selection_PSI(show_ui=False)
+    thresholds_psi = {group: {name: default if thresholds_psi[group][name] is None else thresholds_psi[group][name]
+                              for name, default in values.items()}
+                      for group, values in DEFAULT_THRESHOLDS_PSI.items()}
+    amber = thresholds_psi['amber_psi']['lower']
+    red = thresholds_psi['red_psi']['value']
+
+    csi = characteristic_csi(frequencies)
+    ranking = csi_ranking(csi, amber, red)
+    history = csi.reset_index().rename(columns={'index': 'Characteristic'})
+    st.session_state.df_csi = history
+    st.session_state.df_csi_ranking = ranking
+
+    custom_css = """
+    <style>
+        .custom-container {
+            max-height: 400px;
+            max-width: 100%;
+            overflow-y: scroll;
+            overflow-x: scroll;
+            position: relative;
+            border-radius: 10px;
+            border: 1px solid #ccc;
+        }
+        table {
+            width: 100%;
+            height: auto;
+        }
+        th, td {
+            font-size: 14px;
+            padding: 8px;
+            text-align: left;
+            white-space: nowrap;  /* Prevent text from wrapping */
+        }
+        .download-icon {
+            position: absolute;
+            right: 40px;
+            top: -40px;  /* Adjust to align vertically outside the table container */
+            font-size: 24px;
+        }
+        thead {
+            position: sticky;
+            top: 0;
+            background-color: rgb(39, 45, 85);
+            color: rgb(20, 26, 63);
+        }
+        thead th {
+            color: white;
+            font-weight: normal;
+        }
+    </style>
+    """
+    st.markdown(custom_css, unsafe_allow_html=True)
+
+    # Path to the download icon
+    image_path = os.path.join(os.path.dirname(__file__), 'Images', 'Download_icon.png')
+
+    # Create two tabs: one for the ranking and one for the history
+    tab1, tab2 = st.tabs(["Drift Ranking", "CSI History"])
+
+    with tab1:
+        st.markdown(
+            """
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>Characteristics ranked by latest CSI</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        styles = {'Latest CSI': highlight_gini_PSI_column(ranking['Latest CSI'], thresholds_psi)}
+        show_table(ranking, "CSI_ranking.xlsx", image_path, table_to_excel, "csi_ranking", styles)
+
+    with tab2:
+        st.markdown(
+            """
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>CSI per period</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        styles = {col_name: highlight_gini_PSI_column(history[col_name], thresholds_psi) for col_name in csi.columns}
+        show_table(history, "CSI_history.xlsx", image_path, table_to_excel, "csi_history", styles)
+
+
+if __name__ == "__main__":
+    app()
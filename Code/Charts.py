@@ -0,0 +1,110 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import plotly.graph_objects as go
+import plotly.io as pio
+from Workers import get_thread_pool
+
+
+# Byte budget of the chart images kept in memory (least recently used evicted first)
+CHART_CACHE_BYTES = 64 * 1024 * 1024
+
+# Chart images shared by every session: {hash of the figure and the image size: PNG bytes}
+_chart_cache = OrderedDict()
+_chart_cache_bytes = 0
+_chart_lock = threading.Lock()
+
+# Kaleido keeps one Chromium process for all renders, it can only render one figure at a time
+# Background renders run on a single thread for the same reason
+_render_lock = threading.Lock()
+RENDER_WORKERS = 1
+
+
+# Function to start the renderer in the background, so the first chart of the session does not wait for Chromium to start
+def _warm_renderer():
+    with _render_lock:
+        try:
+            pio.to_image(go.Figure(), format='png', width=10, height=10)
+        except Exception:
+            # The pages report the error when they render their own charts
+            pass
+
+get_thread_pool("charts", RENDER_WORKERS).submit(_warm_renderer)
+
+# Function to get the cache key of a figure rendered at a given size (None is the size of the figure layout)
+def _chart_key(fig, width, height, scale):
+    return hashlib.sha1(f"{fig.to_json()}|{width}|{height}|{scale}".encode()).hexdigest()
+
+# Function to keep a rendered chart, evicting the least recently used ones beyond the byte budget
+def _remember_chart(key, data):
+    global _chart_cache_bytes
+    with _chart_lock:
+        if key in _chart_cache:
+            return
+        _chart_cache[key] = data
+        _chart_cache_bytes += len(data)
+        while _chart_cache_bytes > CHART_CACHE_BYTES and len(_chart_cache) > 1:
+            _, evicted = _chart_cache.popitem(last=False)
+            _chart_cache_bytes -= len(evicted)
+
+# Function to get the PNG bytes of several figures, only the figures not rendered before go to the renderer (in one batch)
+def figures_png(*figures, width=None, height=None, scale=None):
+    keys = [_chart_key(fig, width, height, scale) for fig in figures]
+    images = {}
+    with _chart_lock:
+        for key in keys:
+            if key in _chart_cache:
+                _chart_cache.move_to_end(key)
+                images[key] = _chart_cache[key]
+
+    missing = [(key, fig) for key, fig in zip(keys, figures) if key not in images]
+    if missing:
+        with _render_lock:
+            for key, fig in missing:
+                # Identical figures in the same batch are rendered once
+                if key not in images:
+                    images[key] = pio.to_image(fig, format='png', width=width, height=height, scale=scale)
+        for key, _ in missing:
+            _remember_chart(key, images[key])
+
+    return [images[key] for key in keys]
+
+# Function to get the PNG bytes of a figure, from the cache while the figure (data, thresholds, layout) is unchanged
+def figure_png(fig, width=None, height=None, scale=None):
+    return figures_png(fig, width=width, height=height, scale=scale)[0]
+
+# Function to render figures in the background (in one batch), returns a future of the PNG bytes of every figure
+# Every future carries the hash of its figure, so the inputs of a download are known before the images are ready
+def figures_png_future(*figures, width=None, height=None, scale=None):
+    keys = [_chart_key(fig, width, height, scale) for fig in figures]
+    futures = [Future() for _ in figures]
+    for key, future in zip(keys, futures):
+        future.fingerprint = key
+
+    # Function to hand the images of the batch to the future of every figure
+    def resolve(batch):
+        error = batch.exception()
+        for index, future in enumerate(futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(batch.result()[index])
+
+    with _chart_lock:
+        cached = all(key in _chart_cache for key in keys)
+    if cached:
+        for future, image in zip(futures, figures_png(*figures, width=width, height=height, scale=scale)):
+            future.set_result(image)
+    else:
+        batch = get_thread_pool("charts", RENDER_WORKERS).submit(figures_png, *figures, width=width, height=height, scale=scale)
+        batch.add_done_callback(resolve)
+    return futures
+
+# Function to render a figure in the background, returns a future of its PNG bytes
+def figure_png_future(fig, width=None, height=None, scale=None):
+    return figures_png_future(fig, width=width, height=height, scale=scale)[0]
+
+# Function to get the PNG bytes of a chart image, waiting for it when it is still rendered in the background
+def png_bytes(image):
+    return image.result() if isinstance(image, Future) else image
@@ -1,114 +1,30 @@
 import streamlit as st
 import os
 from io import BytesIO
-from pptx import Presentation
 from pptx.util import Inches, Pt
-from pptx.dml.color import RGBColor
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
-import base64
+from Artifacts import artifact_url, file_url, lazy_download
+from Template import template_presentation, add_styled_table, set_cell_text, TITLE_LAYOUT, CONTENT_LAYOUT
 
 # Function to create PowerPoint presentation
+# The sample slides are made on the template of the chosen colours, the same template every page builds its slides on
 def create_ppt(bg_color, font_color, ribbon_color_1, ribbon_color_2, row_bg_color, row_font_color, content_font_color, title_font_color, ribbon_font_1, ribbon_font_2, ribbon_font_color):
-    prs = Presentation()
-    slide_layout = prs.slide_layouts[5]  # Using a blank slide layout
+    prs = template_presentation((bg_color, font_color, ribbon_color_1, ribbon_color_2, row_bg_color, row_font_color, content_font_color, title_font_color, ribbon_font_1, ribbon_font_2, ribbon_font_color))
     
-    # Slide with background and font color
-    slide1 = prs.slides.add_slide(slide_layout)
-    background = slide1.background
-    fill = background.fill
-    fill.solid()
-    fill.fore_color.rgb = RGBColor.from_string(bg_color[1:])
+    # Slide with background and font color (the title layout carries the background, logo and ribbon)
+    slide1 = prs.slides.add_slide(prs.slide_layouts[TITLE_LAYOUT])
+    slide1.shapes.title.text = "Sample Title"
     
-    title = slide1.shapes.title
-    title.text = "Sample Title"
-    for paragraph in title.text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.color.rgb = RGBColor.from_string(font_color[1:])
-            
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    
-    ribbon_height = Inches(0.28)
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-            
-    slide_number_box = slide1.shapes.add_textbox(half_ribbon_width, ribbon_top, half_ribbon_width, ribbon_height)
-    text_frame = slide_number_box.text_frame
-    text_frame.text = "1"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    p.font.color.rgb = RGBColor.from_string(ribbon_font_color[1:])
-    p.alignment = PP_ALIGN.RIGHT
-    
-    # Slide with ribbons and table
-    slide2 = prs.slides.add_slide(slide_layout)
-    
-    title = slide2.shapes.title
-    title.text = "Sample Title"
-    for paragraph in title.text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.color.rgb = RGBColor.from_string(title_font_color[1:])
-            
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    
-    # First half of the ribbon
-    shape_amber = slide2.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, 0, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    fill_amber.fore_color.rgb = RGBColor.from_string(ribbon_color_1[1:])
-    
-    line_amber = shape_amber.line
-    line_amber.color.rgb = RGBColor.from_string(ribbon_color_1[1:])
+    # Slide with ribbons and table (the content layout carries the ribbons and logo)
+    slide2 = prs.slides.add_slide(prs.slide_layouts[CONTENT_LAYOUT])
+    slide2.shapes.title.text = "Sample Title"
     
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(ribbon_font_1[1:])
-    
-    # Second half of the ribbon
-    shape_blue = slide2.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, half_ribbon_width, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    fill_blue.fore_color.rgb = RGBColor.from_string(ribbon_color_2[1:])
-    
-    line_blue = shape_blue.line
-    line_blue.color.rgb = RGBColor.from_string(ribbon_color_2[1:])
-    
-    slide_number_box = slide2.shapes.add_textbox(half_ribbon_width, ribbon_top, half_ribbon_width, ribbon_height)
-    text_frame = slide_number_box.text_frame
-    text_frame.text = "2"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    p.font.color.rgb = RGBColor.from_string(ribbon_font_2[1:])
-    p.alignment = PP_ALIGN.RIGHT
-    
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)
-    logo_top = Inches(0.15)
-    logo_height = Inches(0.45)
-    slide2.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-    
-    # Add smaller table
+    # Add smaller table, the header row and content colours come from the table style of the template
     rows, cols = 3, 3
     left = Inches(2.7)
     top = Inches(2)
     width = Inches(4.7)  # Adjusted width
     height = Inches(3)  # Adjusted height
-    table = slide2.shapes.add_table(rows, cols, left, top, width, height).table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide2, rows, cols, left, top, width, height)
     
     # Set font size for the table cells
     font_size = Pt(15)  # Smaller font size
@@ -116,27 +32,18 @@ def create_ppt(bg_color, font_color, ribbon_color_1, ribbon_color_2, row_bg_colo
     # Set table headers
     headers = ["Header 1", "Header 2", "Header 3"]
     for i, header in enumerate(headers):
-        cell = table.cell(0, i)
-        cell.text = header
-        cell.fill.solid()
-        cell.fill.fore_color.rgb = RGBColor.from_string(row_bg_color[1:])
-        for paragraph in cell.text_frame.paragraphs:
-            paragraph.font.color.rgb = RGBColor.from_string(row_font_color[1:])
-            paragraph.font.size = font_size  # Set font size for headers
+        set_cell_text(table.cell(0, i), header, font_size)
     
     # Set table content
     for row in range(1, rows):
         for col in range(cols):
             cell = table.cell(row, col)
-            cell.text = f"Data {row+1},{col+1}"
-            for paragraph in cell.text_frame.paragraphs:
-                paragraph.font.color.rgb = RGBColor.from_string(content_font_color[1:])
-                paragraph.font.size = font_size  # Set font size for content
-                # Adjust padding to fit the smaller cell size
-                cell.text_frame.margin_left = Inches(0.5)
-                cell.text_frame.margin_right = Inches(0.5)
-                cell.text_frame.margin_top = Inches(0.5)
-                cell.text_frame.margin_bottom = Inches(0.5)
+            set_cell_text(cell, f"Data {row+1},{col+1}", font_size)
+            # Adjust padding to fit the smaller cell size
+            cell.text_frame.margin_left = Inches(0.5)
+            cell.text_frame.margin_right = Inches(0.5)
+            cell.text_frame.margin_top = Inches(0.5)
+            cell.text_frame.margin_bottom = Inches(0.5)
     
     return prs
 
@@ -448,9 +355,15 @@ def app():
                 </div>
             """, unsafe_allow_html=True)
         
-            prs = create_ppt(st.session_state.bg_color, st.session_state.font_color, st.session_state.ribbon_color_1, st.session_state.ribbon_color_2, st.session_state.row_bg_color, st.session_state.row_font_color, st.session_state.content_font_color, st.session_state.title_font_color, st.session_state.ribbon_font_1, st.session_state.ribbon_font_2, st.session_state.ribbon_font_color)
-            ppt_io = save_ppt(prs)
-            ppt_bytes = ppt_io.seek(0)
+            # Function to build the customized template, only run when the user asks for it
+            def build_template(progress):
+                prs = create_ppt(st.session_state.bg_color, st.session_state.font_color, st.session_state.ribbon_color_1, st.session_state.ribbon_color_2, st.session_state.row_bg_color, st.session_state.row_font_color, st.session_state.content_font_color, st.session_state.title_font_color, st.session_state.ribbon_font_1, st.session_state.ribbon_font_2, st.session_state.ribbon_font_color)
+                return save_ppt(prs)
+            
+            # The customization colours are part of the fingerprint of every prepared presentation
+            ppt_io = lazy_download("customized_template", build_template, (), "Customized_template.pptx", "Click here to prepare the Customized PowerPoint Presentation")
+            if ppt_io is None:
+                return
             ppt_bytes = ppt_io.getvalue()
             
             # Base directory of the current script
@@ -459,12 +372,11 @@ def app():
             # Construct the path for the image
             image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
             
-            # Read and encode the image to base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
+            # Serve the icon from the artifact store
+            image_url = file_url(image_path)
             
-            # Encode the PPT data to Base64
-            ppt_data_base64 = base64.b64encode(ppt_bytes).decode()
+            # Store the PPT file once under its content hash instead of embedding it in the page
+            ppt_data_url = artifact_url(ppt_bytes, "Customized_template.pptx")
             
             # Help text
             help_text = "Click here to download the Customized PowerPoint Presentation"
@@ -483,8 +395,8 @@ def app():
             
             # Create the HTML for the button with image and help text
             button_html = f"""
-            <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_base64}" download="Customized_template.pptx" class="ppt-download-button" title="{help_text}">
-                <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+            <a href="{ppt_data_url}" download="Customized_template.pptx" class="ppt-download-button" title="{help_text}">
+                <img src="{image_url}" alt="Download PPT">
             </a>
             """
             
@@ -0,0 +1,249 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+import os
+from pptx.dml.color import RGBColor
+from streamlit_modal import Modal
+from Loader import load_dataset
+from Metrics import update_performance_cumsums, dr_vs_pd_table, extend_with_expected_pd
+from Report import create_metric_ppt, ppt_download_button_html
+from Artifacts import lazy_download, memoize_presentation
+from Tables import show_table, table_to_excel, styles_on_rows
+from Charts import figure_png_future
+
+
+# Months consolidated by the rolling view ("3. Consolidation 12 months")
+CONSOLIDATION_MONTHS = 12
+
+
+# Function to create the DR vs PD presentation (title slide, monthly and 12 months tables and graph)
+@memoize_presentation
+def create_ppt_dr_vs_pd(df_monthly, df_rolling, fig_bytes, data_comment="", graph_comment=""):
+    # Highlight the months where the observed default rate is above the PD
+    def dr_fill(row_idx, col_name, value):
+        if col_name == 'DR - PD' and isinstance(value, float) and value > 0:
+            return RGBColor(0xFF, 0xBF, 0x00)
+        return None
+
+    return create_metric_ppt(
+        "PL - Scorecard Model DR vs. PD",
+        tables=[("DR vs. PD Time Series", df_monthly, dr_fill), ("Consolidation 12 months", df_rolling, dr_fill)],
+        graphs=[("Graph", fig_bytes)],
+        data_comment=data_comment,
+        graph_comment=graph_comment,
+    )
+
+# Streamlit app
+def app():
+    st.markdown(
+                """
+                <h1 style='text-align: center; font-size: 28px; color: rgb(39, 45, 85);'>PL - Scorecard Model DR vs. PD</h1>
+                """,
+                unsafe_allow_html=True
+            )
+
+    # Running totals are kept in the session, so a new month in the dataset only adds one row to them
+    performance = load_dataset('PERFORMANCE HISTORICAL(Data).xlsx')
+    expected = load_dataset('STABILITY - EXPECTED PD(Data).xlsx')
+    state = update_performance_cumsums(st.session_state.get('dr_pd_state'), performance)
+    st.session_state.dr_pd_state = state
+
+    df_monthly = extend_with_expected_pd(dr_vs_pd_table(state), expected)
+    df_rolling = dr_vs_pd_table(state, CONSOLIDATION_MONTHS)
+    df_bins = dr_vs_pd_table(state, CONSOLIDATION_MONTHS, by_bin=True)
+    st.session_state.df_dr_vs_pd = df_monthly
+    st.session_state.df_dr_vs_pd_rolling = df_rolling
+
+    custom_css = """
+    <style>
+        .custom-container {
+            max-height: 400px;
+            max-width: 100%;
+            overflow-y: scroll;
+            overflow-x: scroll;
+            position: relative;
+            border-radius: 10px;
+            border: 1px solid #ccc;
+        }
+        table {
+            width: 100%;
+            height: auto;
+        }
+        th, td {
+            font-size: 14px;
+            padding: 8px;
+            text-align: left;
+            white-space: nowrap;  /* Prevent text from wrapping */
+        }
+        .download-icon {
+            position: absolute;
+            right: 40px;
+            top: -40px;  /* Adjust to align vertically outside the table container */
+            font-size: 24px;
+        }
+        thead {
+            position: sticky;
+            top: 0;
+            background-color: rgb(39, 45, 85);
+            color: rgb(20, 26, 63);
+        }
+        thead th {
+            color: white;
+            font-weight: normal;
+        }
+        .info-container {
+            margin-top: 10px;
+            padding: 8px;
+            border: 1px solid #ccc;
+            border-radius: 5px;
+            background-color: #f9f9f9;
+            font-size: 14px;
+            text-align: left;
+            color: black;
+        }
+        .ppt-download-button {
+            position: absolute;
+            top: -72px;
+            left: 150px;
+            cursor: pointer
+        }
+    </style>
+    """
+    st.markdown(custom_css, unsafe_allow_html=True)
+
+    # Function for showing a table with the months where the default rate is above the PD highlighted
+    def show_dr_vs_pd_table(dataframe, file_name, key):
+        styles = {'DR - PD': styles_on_rows('background-color: orange', dataframe['DR - PD'].to_numpy() > 0)}
+        show_table(dataframe, file_name, image_path, table_to_excel, key, styles, na_rep='')
+
+    # Path to the download icon
+    image_path = os.path.join(os.path.dirname(__file__), 'Images', 'Download_icon.png')
+
+    # Create tabs for the monthly series, the 12 months consolidation, the PD buckets and the graph
+    tab1, tab2, tab3, tab4 = st.tabs(["DR vs. PD Time Series", "Consolidation 12 months", "By PD Bucket", "Graph"])
+
+    with tab1:
+        st.markdown(
+            """
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>DR vs. PD Time Series</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        show_dr_vs_pd_table(df_monthly, "DR_vs_PD.xlsx", "dr_vs_pd_monthly")
+        st.markdown(
+            """
+            <div class="info-container">
+                Months after the last observed date_ref show the expected PD of the stability sample only.
+                Months where the default rate is above the PD are highlighted.
+            </div>
+            """,
+            unsafe_allow_html=True)
+
+        # Add comment box for data
+        data_comment_modal = Modal("Comment", key="dr_vs_pd_data_comment")
+        if st.button("Add Comment", key="dr_vs_pd_data_comment_button", help="Click here to add Comment"):
+            data_comment_modal.open()
+
+        if data_comment_modal.is_open():
+            with data_comment_modal.container():
+                data_comment_dr_vs_pd = st.text_area("Enter your comment:", key="dr_vs_pd_data_comment_textarea")
+                if st.button("Submit Comment", key="dr_vs_pd_submit_data_comment"):
+                    st.session_state.data_comment_dr_vs_pd = data_comment_dr_vs_pd
+                    data_comment_modal.close()
+
+    with tab2:
+        st.markdown(
+            f"""
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>Consolidation {CONSOLIDATION_MONTHS} months</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        show_dr_vs_pd_table(df_rolling, "DR_vs_PD_12_months.xlsx", "dr_vs_pd_rolling")
+        st.markdown(
+            f"""
+            <div class="info-container">
+                Each date_ref consolidates the accounts and defaults of the last {CONSOLIDATION_MONTHS} months (fewer at the start of the history, see Months).
+            </div>
+            """,
+            unsafe_allow_html=True)
+
+    with tab3:
+        st.markdown(
+            f"""
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>Consolidation {CONSOLIDATION_MONTHS} months by PD Bucket</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        periods = df_rolling['date_ref'].tolist()
+        period = st.selectbox("Select date_ref", options=periods, index=len(periods) - 1, key="dr_vs_pd_period")
+        df_period = df_bins[df_bins['date_ref'] == period].reset_index(drop=True)
+        show_dr_vs_pd_table(df_period, f"DR_vs_PD_{period}.xlsx", "dr_vs_pd_bins")
+
+    with tab4:
+        st.markdown(
+                """
+                <div style='text-align: center;
+                font-size: 20px;'>
+                    <strong>Graph</strong>
+                </div>
+                """,
+                unsafe_allow_html=True)
+
+        # Monthly and 12 months default rate against the PD, expected PD continues after the last observed month
+        x_values = [str(p) + '_' for p in df_monthly['date_ref']]
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=x_values, y=df_monthly['DR'], name='DR', marker_color='rgb(39, 45, 85)'))
+        fig.add_trace(go.Scatter(x=x_values, y=df_monthly['PD'], mode='lines+markers', name='PD', line=dict(color='red', width=2)))
+        fig.add_trace(go.Scatter(x=[str(p) + '_' for p in df_rolling['date_ref']], y=df_rolling['DR'], mode='lines', name=f'DR {CONSOLIDATION_MONTHS}M', line=dict(color='orange', width=2, dash='dash')))
+        fig.add_trace(go.Scatter(x=[str(p) + '_' for p in df_rolling['date_ref']], y=df_rolling['PD'], mode='lines', name=f'PD {CONSOLIDATION_MONTHS}M', line=dict(color='green', width=2, dash='dash')))
+        fig.update_layout(
+            xaxis_title=dict(text='date_ref -->', font=dict(size=17, color='black', family='Calibri')),
+            yaxis_title=dict(text='Rate -->', font=dict(size=17, color='black', family='Calibri')),
+            xaxis=dict(showline=True, linecolor='black', linewidth=2, mirror=True),
+            yaxis=dict(showgrid=True, gridcolor='lightgray', showline=True, linecolor='black', linewidth=2, mirror=True),
+            legend=dict(orientation='h', x=0.25, y=-0.25, bordercolor='black', borderwidth=1),
+            margin=dict(l=60, r=30, t=40, b=60),
+            plot_bgcolor='white',
+            showlegend=True,
+            width=1200,
+            height=500
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Add comment box for graph
+        graph_comment_modal = Modal("Comment", key="dr_vs_pd_graph_comment")
+        if st.button("Add Comment", key="dr_vs_pd_graph_comment_button", help="Click here to add Comment"):
+            graph_comment_modal.open()
+
+        if graph_comment_modal.is_open():
+            with graph_comment_modal.container():
+                graph_comment_dr_vs_pd = st.text_area("Enter your comment:", key="dr_vs_pd_graph_comment_textarea")
+                if st.button("Submit Comment", key="dr_vs_pd_submit_graph_comment"):
+                    st.session_state.graph_comment_dr_vs_pd = graph_comment_dr_vs_pd
+                    graph_comment_modal.close()
+
+        # Convert plot figure to PNG bytes in the background, reused while the figure is unchanged
+        fig_bytes = figure_png_future(fig)
+        st.session_state.fig_bytes_dr_vs_pd = fig_bytes
+
+        data_comment_dr_vs_pd = st.session_state.get("data_comment_dr_vs_pd", "")
+        graph_comment_dr_vs_pd = st.session_state.get("graph_comment_dr_vs_pd", "")
+
+        # The presentation is only built when the user asks for it, then kept until its inputs change
+        ppt_data_dr_vs_pd = lazy_download("dr_vs_pd_ppt", lambda progress: create_ppt_dr_vs_pd(df_monthly, df_rolling, fig_bytes, data_comment_dr_vs_pd, graph_comment_dr_vs_pd),
+                                          (df_monthly, df_rolling, fig_bytes, data_comment_dr_vs_pd, graph_comment_dr_vs_pd), "DR_vs_PD.pptx",
+                                          "Click here to prepare the DR vs. PD PowerPoint presentation")
+        if ppt_data_dr_vs_pd is not None:
+            st.session_state.ppt_data_dr_vs_pd = ppt_data_dr_vs_pd
+            st.markdown(ppt_download_button_html(ppt_data_dr_vs_pd, "DR_vs_PD.pptx", "Click here to download the DR vs. PD PowerPoint presentation"), unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,343 @@
+import re
+import math
+import struct
+import zipfile
+import posixpath
+import datetime
+import numpy as np
+import pandas as pd
+from io import BytesIO
+from xml.sax.saxutils import escape, quoteattr
+from openpyxl.utils import get_column_letter
+
+
+# Relationship type of the worksheets in xl/_rels/workbook.xml.rels
+WORKSHEET_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+
+# Elements of a worksheet that come after the conditional formatting (the order of the elements is fixed by the schema)
+AFTER_CONDITIONAL_FORMATTING = (
+    'dataValidations', 'hyperlinks', 'printOptions', 'pageMargins', 'pageSetup', 'headerFooter', 'rowBreaks', 'colBreaks',
+    'customProperties', 'cellWatches', 'ignoredErrors', 'smartTags', 'drawing', 'legacyDrawing', 'legacyDrawingHF',
+    'drawingHF', 'picture', 'oleObjects', 'controls', 'webPublishItems', 'tableParts', 'extLst',
+)
+
+# Calculation chain of the workbook, it lists the formula cells and is dropped when cells change (Excel rebuilds it)
+CALC_CHAIN_PART = 'xl/calcChain.xml'
+
+# Number format of the dates written to a replaced sheet (m/d/yy h:mm)
+DATE_FORMAT_ID = 22
+
+# Day 0 of the Excel date serials
+EXCEL_EPOCH = datetime.datetime(1899, 12, 30)
+
+# Size of the chunks used to copy the unchanged parts of the workbook
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Size of a zip local file header before the member's name and extra field
+LOCAL_HEADER_SIZE = 30
+
+# Flag of the zip members whose sizes and CRC follow their data instead of their header
+DATA_DESCRIPTOR_FLAG = 0x08
+
+
+# Function to get the part name of every sheet of a workbook: {sheet name: 'xl/worksheets/sheetN.xml'}
+def sheet_parts(archive):
+    workbook = archive.read('xl/workbook.xml').decode('utf-8')
+    relationships = archive.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+    targets = {}
+    for relationship in re.findall(r'<Relationship\b[^>]*>', relationships):
+        attributes = dict(re.findall(r'(\w+)="([^"]*)"', relationship))
+        if attributes.get('Type') == WORKSHEET_TYPE:
+            target = attributes['Target']
+            targets[attributes['Id']] = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    sheets = {}
+    for sheet in re.findall(r'<sheet\b[^>]*>', workbook):
+        name = re.search(r'\bname="([^"]*)"', sheet).group(1)
+        rId = re.search(r'\br:id="([^"]*)"', sheet).group(1)
+        sheets[_unescape(name)] = targets[rId]
+    return sheets
+
+# Function to turn the XML entities of an attribute back into text
+def _unescape(text):
+    return text.replace('&quot;', '"').replace('&apos;', "'").replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+
+# Function to get the XML of one cell (None for an empty cell), strings starting with '=' are written as formulas
+def _cell_xml(reference, value, date_style):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{reference}"><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if math.isinf(value):
+            return None
+        return f'<c r="{reference}"><v>{float(value)!r}</v></c>'
+    if isinstance(value, datetime.datetime):
+        serial = (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{reference}" s="{date_style}"><v>{serial!r}</v></c>'
+    if isinstance(value, datetime.date):
+        serial = (datetime.datetime(value.year, value.month, value.day) - EXCEL_EPOCH).days
+        return f'<c r="{reference}" s="{date_style}"><v>{serial}</v></c>'
+    text = str(value)
+    if text.startswith('='):
+        return f'<c r="{reference}"><f>{escape(text[1:])}</f></c>'
+    space = ' xml:space="preserve"' if text != text.strip() else ''
+    return f'<c r="{reference}" t="inlineStr"><is><t{space}>{escape(text)}</t></is></c>'
+
+# Function to write the rows of a replaced sheet, the rows are streamed so only one chunk of rows is in memory at a time
+# The sheet keeps everything but its cells (columns, merged cells, views) and the height of its rows
+# The dimension (used range) is optional and only known after the last row, so it is left out
+def _write_replaced_sheet(template_xml, rows, output, date_style):
+    start = template_xml.index('<sheetData')
+    end = template_xml.index('</sheetData>') + len('</sheetData>') if '</sheetData>' in template_xml else template_xml.index('/>', start) + 2
+    row_attributes = {}
+    for row in re.findall(r'<row\b[^>]*>', template_xml[start:end]):
+        attributes = re.sub(r'\s(?:r|spans)="[^"]*"', '', row[len('<row'):].rstrip('>').rstrip('/'))
+        row_attributes[int(re.search(r'\br="(\d+)"', row).group(1))] = attributes
+
+    output.write(re.sub(r'<dimension ref="[^"]*"/>', '', template_xml[:start]).encode('utf-8'))
+    output.write(b'<sheetData>')
+    chunk = []
+    chunk_size = 0
+    for row_number, values in enumerate(rows, start=1):
+        cells = [_cell_xml(f"{get_column_letter(column_number)}{row_number}", value, date_style)
+                 for column_number, value in enumerate(values, start=1)]
+        cells = ''.join(cell for cell in cells if cell is not None)
+        if cells or row_number in row_attributes:
+            chunk.append(f'<row r="{row_number}"{row_attributes.get(row_number, "")}>{cells}</row>')
+            chunk_size += len(chunk[-1])
+        if chunk_size > COPY_CHUNK_SIZE:
+            output.write(''.join(chunk).encode('utf-8'))
+            chunk, chunk_size = [], 0
+    output.write(''.join(chunk).encode('utf-8'))
+    output.write(b'</sheetData>')
+    output.write(template_xml[end:].encode('utf-8'))
+
+# Function to append rows after the last row of a sheet, the existing rows (and their formula values) are kept as they are
+def _append_rows(sheet_xml, rows, date_style):
+    last_row = max([int(row) for row in re.findall(r'<row\b[^>]*?\br="(\d+)"', sheet_xml)], default=0)
+    new_rows = []
+    for row_number, values in enumerate(rows, start=last_row + 1):
+        cells = [_cell_xml(f"{get_column_letter(column_number)}{row_number}", value, date_style)
+                 for column_number, value in enumerate(values, start=1)]
+        new_rows.append(f'<row r="{row_number}">{"".join(cell for cell in cells if cell is not None)}</row>')
+    # The used range grows with the new rows, the dimension is optional so it is left out
+    sheet_xml = re.sub(r'<dimension ref="[^"]*"/>', '', sheet_xml)
+    if '</sheetData>' not in sheet_xml:
+        return re.sub(r'<sheetData\s*/>', lambda match: f'<sheetData>{"".join(new_rows)}</sheetData>', sheet_xml, count=1)
+    position = sheet_xml.index('</sheetData>')
+    return sheet_xml[:position] + ''.join(new_rows) + sheet_xml[position:]
+
+# Function to add the conditional formatting of a sheet (formula rules with a fill, icon sets) after the existing ones
+# formula_rules is a list of (cells, formula, dxf id), icon_sets a list of (cells, icon set, cfvo values)
+def _add_conditional_formatting(sheet_xml, formula_rules, icon_sets):
+    priority = max([int(value) for value in re.findall(r'<cfRule\b[^>]*\bpriority="(\d+)"', sheet_xml)], default=0)
+    groups = {}
+    for cells, formula, dxf_id in formula_rules:
+        priority += 1
+        groups.setdefault(cells, []).append(
+            f'<cfRule type="expression" dxfId="{dxf_id}" priority="{priority}" stopIfTrue="1"><formula>{escape(formula)}</formula></cfRule>')
+    for cells, icon_set, values in icon_sets:
+        priority += 1
+        thresholds = ''.join(f'<cfvo type="num" val="{value}"/>' for value in values)
+        groups.setdefault(cells, []).append(
+            f'<cfRule type="iconSet" priority="{priority}"><iconSet iconSet="{icon_set}">{thresholds}</iconSet></cfRule>')
+    blocks = ''.join(f'<conditionalFormatting sqref={quoteattr(cells)}>{"".join(rules)}</conditionalFormatting>'
+                     for cells, rules in groups.items())
+
+    # The search starts after the cells and the existing conditional formatting (whose rules can hold an extLst of their own)
+    last = sheet_xml.rfind('</conditionalFormatting>')
+    start = last if last >= 0 else sheet_xml.index('<sheetData')
+    match = re.compile(r'<(?:%s)\b' % '|'.join(AFTER_CONDITIONAL_FORMATTING)).search(sheet_xml, start)
+    position = match.start() if match else sheet_xml.rindex('</worksheet>')
+    return sheet_xml[:position] + blocks + sheet_xml[position:]
+
+# Function to write formulas into existing cells of a sheet (the cells keep their style), missing cells are added to their row
+def _set_cell_formulas(sheet_xml, cell_formulas):
+    for reference, formula in cell_formulas.items():
+        formula_xml = f'<f>{escape(formula.lstrip("="))}</f>'
+        cell = re.search(r'<c r="%s"(?P<attributes>[^>]*?)(?:/>|>.*?</c>)' % reference, sheet_xml, re.S)
+        if cell is not None:
+            attributes = re.sub(r'\st="[^"]*"', '', cell.group('attributes'))
+            sheet_xml = sheet_xml[:cell.start()] + f'<c r="{reference}"{attributes}>{formula_xml}</c>' + sheet_xml[cell.end():]
+            continue
+        row_number = int(re.search(r'\d+', reference).group())
+        row = re.search(r'<row r="%d"[^>]*?(?:/>|>.*?</row>)' % row_number, sheet_xml, re.S)
+        if row is None:
+            raise ValueError(f"The row {row_number} of the cell {reference} does not exist in the sheet.")
+        row_xml = row.group()
+        # Cells of a row are in column order, the new cell is placed before the first cell to its right
+        new_cell = f'<c r="{reference}">{formula_xml}</c>'
+        if row_xml.endswith('/>'):
+            row_xml = row_xml[:-2] + f'>{new_cell}</row>'
+        else:
+            column = re.match(r'[A-Z]+', reference).group()
+            key = (len(column), column)
+            for other in re.finditer(r'<c r="([A-Z]+)\d+"', row_xml):
+                other_column = other.group(1)
+                if (len(other_column), other_column) > key:
+                    row_xml = row_xml[:other.start()] + new_cell + row_xml[other.start():]
+                    break
+            else:
+                row_xml = row_xml[:-len('</row>')] + new_cell + '</row>'
+        sheet_xml = sheet_xml[:row.start()] + row_xml + sheet_xml[row.end():]
+    return sheet_xml
+
+# Function to write the values of formula cells {cell: value} as the values Excel saved, so readers that do not calculate
+# (openpyxl with data_only, pandas) see the current values; numbers, text and booleans are kept by type, anything else is an error
+def _set_cell_values(sheet_xml, cell_values):
+    def cell_with_value(cell):
+        reference, attributes, content = cell.group('reference'), cell.group('attributes'), cell.group('content') or ''
+        formula = re.search(r'<f\b[^>]*?(?:/>|>.*?</f>)', content, re.S)
+        if reference not in cell_values or formula is None:
+            return cell.group()
+        value = cell_values[reference]
+        attributes = re.sub(r'\st="[^"]*"', '', attributes)
+        if value is None:
+            return f'<c r="{reference}"{attributes}>{formula.group()}</c>'
+        if isinstance(value, bool):
+            value_type, text = ' t="b"', str(int(value))
+        elif isinstance(value, (int, float)):
+            value_type, text = '', repr(float(value)) if value != int(value) else str(int(value))
+        elif isinstance(value, str):
+            value_type, text = ' t="str"', escape(value)
+        else:
+            value_type, text = ' t="e"', escape(str(value))
+        return f'<c r="{reference}"{attributes}{value_type}>{formula.group()}<v>{text}</v></c>'
+    return re.sub(r'<c r="(?P<reference>[A-Z]+\d+)"(?P<attributes>[^>]*?)(?:/>|>(?P<content>.*?)</c>)', cell_with_value, sheet_xml, flags=re.S)
+
+# Function to add the fills of the conditional formatting (dxfs) and the date style (cellXfs) to the styles of the workbook
+# Returns the new styles, the dxf id of every fill colour and the style id of the dates
+def _add_styles(styles_xml, fill_colours):
+    dxfs = ''.join(f'<dxf><fill><patternFill patternType="solid"><fgColor rgb="FF{colour}"/><bgColor rgb="FF{colour}"/></patternFill></fill></dxf>'
+                   for colour in fill_colours)
+    match = re.search(r'<dxfs count="(\d+)"\s*(/>|>)', styles_xml)
+    if match is None:
+        first_dxf = 0
+        position = styles_xml.index('<tableStyles') if '<tableStyles' in styles_xml else styles_xml.rindex('</styleSheet>')
+        styles_xml = styles_xml[:position] + f'<dxfs count="{len(fill_colours)}">{dxfs}</dxfs>' + styles_xml[position:]
+    else:
+        first_dxf = int(match.group(1))
+        count = f'<dxfs count="{first_dxf + len(fill_colours)}">'
+        if match.group(2) == '/>':
+            styles_xml = styles_xml[:match.start()] + count + dxfs + '</dxfs>' + styles_xml[match.end():]
+        else:
+            close = styles_xml.index('</dxfs>', match.end())
+            styles_xml = styles_xml[:match.start()] + count + styles_xml[match.end():close] + dxfs + styles_xml[close:]
+    dxf_ids = {colour: first_dxf + index for index, colour in enumerate(fill_colours)}
+
+    match = re.search(r'<cellXfs count="(\d+)">', styles_xml)
+    close = styles_xml.index('</cellXfs>', match.end())
+    date_xf = f'<xf numFmtId="{DATE_FORMAT_ID}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    # A workbook patched before already has the date style
+    cell_xfs = re.findall(r'<xf\b[^>]*?(?:/>|>.*?</xf>)', styles_xml[match.end():close], re.S)
+    if date_xf in cell_xfs:
+        return styles_xml, dxf_ids, cell_xfs.index(date_xf)
+    date_style = int(match.group(1))
+    styles_xml = (styles_xml[:match.start()] + f'<cellXfs count="{date_style + 1}">' + styles_xml[match.end():close]
+                  + date_xf + styles_xml[close:])
+    return styles_xml, dxf_ids, date_style
+
+# Function to make Excel calculate every formula when the workbook is opened (the cached values refer to the old data)
+def _calculate_on_load(workbook_xml):
+    if '<calcPr' in workbook_xml:
+        workbook_xml = re.sub(r'\sfullCalcOnLoad="[^"]*"', '', workbook_xml)
+        return workbook_xml.replace('<calcPr', '<calcPr fullCalcOnLoad="1"', 1)
+    position = workbook_xml.index('<extLst') if '<extLst' in workbook_xml else workbook_xml.rindex('</workbook>')
+    return workbook_xml[:position] + '<calcPr fullCalcOnLoad="1"/>' + workbook_xml[position:]
+
+# Function to remove the calculation chain from the relationships of the workbook and the content types
+def _drop_calc_chain(xml):
+    return re.sub(r'<(?:Relationship|Override)\b[^>]*calcChain[^>]*/>', '', xml)
+
+# Function to copy a member of one zip to another as it is stored: the compressed bytes are copied in chunks, never inflated.
+# zipfile has no public API for this, so the copy writes through ZipFile.fp and registers the member in filelist,
+# NameToInfo and start_dir the way ZipFile.writestr does; test_excel.py checks the copies
+def _copy_compressed(source, info, destination):
+    source.fp.seek(info.header_offset)
+    name_length, extra_length = struct.unpack('<2H', source.fp.read(LOCAL_HEADER_SIZE)[26:])
+    source.fp.seek(name_length + extra_length, 1)
+
+    target = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    target.compress_type = info.compress_type
+    target.external_attr = info.external_attr
+    # The sizes are known, they go in the header and no data descriptor is written
+    target.flag_bits = info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+    target.CRC, target.compress_size, target.file_size = info.CRC, info.compress_size, info.file_size
+    target.header_offset = destination.fp.tell()
+    destination.fp.write(target.FileHeader())
+
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(remaining, COPY_CHUNK_SIZE))
+        destination.fp.write(chunk)
+        remaining -= len(chunk)
+    destination.filelist.append(target)
+    destination.NameToInfo[target.filename] = target
+    destination.start_dir = destination.fp.tell()
+
+# Function to patch a workbook template without loading it: only the changed parts are rewritten, every other part is copied as is
+# replaced_sheets: {sheet name: rows (lists of values)}, the cells of the sheet are replaced by the rows
+# formula_rules: {sheet name: [(cells, formula, fill colour 'RRGGBB')]}, added in order (stop if true)
+# icon_sets: {sheet name: [(cells, icon set, cfvo values)]}
+# cell_formulas: {sheet name: {cell: formula}}
+# cell_values: {sheet name: {cell: value}}, the values saved with the formula cells (e.g. from Formulas.WorkbookFormulas)
+# appended_rows: {sheet name: rows (lists of values)}, added after the last row of the sheet
+# The template can be a path or a file object (e.g. a workbook patched before)
+# Returns the patched workbook (BytesIO)
+def patch_workbook(template_path, replaced_sheets=None, formula_rules=None, icon_sets=None, cell_formulas=None, cell_values=None,
+                   appended_rows=None):
+    replaced_sheets = replaced_sheets or {}
+    formula_rules = formula_rules or {}
+    icon_sets = icon_sets or {}
+    cell_formulas = cell_formulas or {}
+    appended_rows = appended_rows or {}
+    # The values of a replaced sheet come from its rows
+    cell_values = {sheet: values for sheet, values in (cell_values or {}).items() if sheet not in replaced_sheets}
+
+    output = BytesIO()
+    with zipfile.ZipFile(template_path) as template, zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as patched:
+        parts = sheet_parts(template)
+        for sheet_name in set(replaced_sheets) | set(formula_rules) | set(icon_sets) | set(cell_formulas) | set(cell_values) | set(appended_rows):
+            if sheet_name not in parts:
+                raise ValueError(f"The sheet named '{sheet_name}' does not exist in the workbook.")
+
+        fill_colours = list(dict.fromkeys(colour for rules in formula_rules.values() for _, _, colour in rules))
+        styles_xml, dxf_ids, date_style = _add_styles(template.read('xl/styles.xml').decode('utf-8'), fill_colours)
+        replaced_parts = {parts[name]: rows for name, rows in replaced_sheets.items()}
+        patched_parts = {parts[name] for name in set(formula_rules) | set(icon_sets) | set(cell_formulas) | set(cell_values) | set(appended_rows)}
+
+        for info in template.infolist():
+            name = info.filename
+            target = zipfile.ZipInfo(name, date_time=info.date_time)
+            target.compress_type = info.compress_type
+            target.external_attr = info.external_attr
+
+            if name == CALC_CHAIN_PART:
+                continue
+            elif name in ('xl/_rels/workbook.xml.rels', '[Content_Types].xml'):
+                patched.writestr(target, _drop_calc_chain(template.read(name).decode('utf-8')))
+            elif name == 'xl/styles.xml':
+                patched.writestr(target, styles_xml)
+            elif name == 'xl/workbook.xml':
+                patched.writestr(target, _calculate_on_load(template.read(name).decode('utf-8')))
+            elif name in replaced_parts:
+                with patched.open(target, 'w') as sheet_output:
+                    _write_replaced_sheet(template.read(name).decode('utf-8'), replaced_parts[name], sheet_output, date_style)
+            elif name in patched_parts:
+                sheet_name = next(sheet for sheet, part in parts.items() if part == name)
+                sheet_xml = _set_cell_formulas(template.read(name).decode('utf-8'), cell_formulas.get(sheet_name, {}))
+                if sheet_name in cell_values:
+                    sheet_xml = _set_cell_values(sheet_xml, cell_values[sheet_name])
+                if sheet_name in appended_rows:
+                    sheet_xml = _append_rows(sheet_xml, appended_rows[sheet_name], date_style)
+                rules = [(cells, formula, dxf_ids[colour]) for cells, formula, colour in formula_rules.get(sheet_name, [])]
+                if rules or sheet_name in icon_sets:
+                    sheet_xml = _add_conditional_formatting(sheet_xml, rules, icon_sets.get(sheet_name, []))
+                patched.writestr(target, sheet_xml)
+            else:
+                _copy_compressed(template, info, patched)
+
+    output.seek(0)
+    return output
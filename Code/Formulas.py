@@ -0,0 +1,712 @@
+import os
+import re
+import math
+import zipfile
+import datetime
+import numpy as np
+import streamlit as st
+import xml.etree.ElementTree as ET
+from collections import deque
+from statistics import NormalDist
+from openpyxl.utils import get_column_letter, column_index_from_string
+from Excel import sheet_parts, EXCEL_EPOCH
+
+
+# Namespace of the elements of the worksheets, shared strings and workbook parts
+MAIN_NAMESPACE = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+# Tokens of a formula (whitespace has no group and is skipped)
+TOKEN = re.compile(r'''
+    \s+
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:DIV/0!|N/A|NAME\?|NULL!|NUM!|REF!|VALUE!))
+  | (?P<reference>(?:(?P<sheet>'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?(?P<first>\$?[A-Za-z]{1,3}\$?\d+)(?::(?P<last>\$?[A-Za-z]{1,3}\$?\d+))?)(?![\w(])
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<function>[A-Za-z_][\w.]*)\(
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<operator><=|>=|<>|[-+*/^&=<>%(),])
+''', re.X)
+
+# Parts of a cell reference: $ before the column, column, $ before the row, row
+CELL_REFERENCE = re.compile(r'(\$?)([A-Za-z]{1,3})(\$?)(\d+)')
+
+# Binary operators from the loosest to the tightest (unary minus and % bind tighter than all of them)
+OPERATOR_LEVELS = (('=', '<>', '<', '>', '<=', '>='), ('&',), ('+', '-'), ('*', '/'), ('^',))
+
+# Order of the value types when values of different types are compared (numbers < text < booleans)
+TYPE_RANKS = {float: 0, str: 1, bool: 2}
+
+
+# Error value of a formula (#DIV/0!, #VALUE!, ...), raised while evaluating and kept as the value of the cell
+class ExcelError(Exception):
+    def __str__(self):
+        return self.args[0]
+
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and self.args == other.args
+
+    def __hash__(self):
+        return hash(self.args)
+
+
+# Function to get the (row, column, row is absolute, column is absolute) of a reference such as $C$14
+def _cell_position(reference):
+    column_absolute, column, row_absolute, row = CELL_REFERENCE.fullmatch(reference).groups()
+    return int(row), column_index_from_string(column.upper()), bool(row_absolute), bool(column_absolute)
+
+# Function to get the (sheet, row, column) key of a cell from its reference (A1)
+def _cell_key(sheet, reference):
+    row, column, _, _ = _cell_position(reference)
+    return sheet, row, column
+
+# Function to parse a formula into a tree of tuples, references without a sheet are on the given sheet
+# ('value', v), ('cell', sheet, row, column, absolute), ('range', sheet, first, last), ('name', NAME),
+# ('negate', x), ('percent', x), ('operator', op, left, right), ('call', NAME, arguments)
+def parse_formula(formula, sheet):
+    tokens = []
+    position = 0
+    formula = formula.lstrip('=')
+    while position < len(formula):
+        match = TOKEN.match(formula, position)
+        if match is None:
+            raise ValueError(f"Unexpected character in the formula {formula!r} at {position}.")
+        position = match.end()
+        if match.lastgroup is not None:
+            tokens.append((match.lastgroup, match))
+
+    # Recursive descent over the tokens, index is the next token to read
+    index = 0
+
+    def peek():
+        return tokens[index] if index < len(tokens) else (None, None)
+
+    def is_operator(*operators):
+        kind, match = peek()
+        return kind == 'operator' and match.group() in operators
+
+    def expect(operator):
+        nonlocal index
+        if not is_operator(operator):
+            raise ValueError(f"Expected {operator!r} in the formula {formula!r}.")
+        index += 1
+
+    def binary(level):
+        nonlocal index
+        if level == len(OPERATOR_LEVELS):
+            return unary()
+        left = binary(level + 1)
+        while is_operator(*OPERATOR_LEVELS[level]):
+            operator = tokens[index][1].group()
+            index += 1
+            # ^ is evaluated left to right in Excel like the other operators
+            left = ('operator', operator, left, binary(level + 1))
+        return left
+
+    def unary():
+        nonlocal index
+        if is_operator('-', '+'):
+            sign = tokens[index][1].group()
+            index += 1
+            operand = unary()
+            return ('negate', operand) if sign == '-' else operand
+        node = primary()
+        while is_operator('%'):
+            index += 1
+            node = ('percent', node)
+        return node
+
+    def primary():
+        nonlocal index
+        kind, match = peek()
+        if kind is None:
+            raise ValueError(f"The formula {formula!r} ends unexpectedly.")
+        index += 1
+        if kind == 'number':
+            return ('value', float(match.group()))
+        if kind == 'string':
+            return ('value', match.group()[1:-1].replace('""', '"'))
+        if kind == 'error':
+            return ('value', ExcelError(match.group()))
+        if kind == 'reference':
+            reference_sheet = match.group('sheet')
+            if reference_sheet is None:
+                reference_sheet = sheet
+            elif reference_sheet.startswith("'"):
+                reference_sheet = reference_sheet[1:-1].replace("''", "'")
+            first = ('cell', reference_sheet, *_cell_position(match.group('first')))
+            if match.group('last') is None:
+                return first
+            return ('range', reference_sheet, first[2:], _cell_position(match.group('last')))
+        if kind == 'function':
+            arguments = []
+            if not is_operator(')'):
+                arguments.append(binary(0))
+                while is_operator(','):
+                    index += 1
+                    arguments.append(binary(0))
+            expect(')')
+            return ('call', match.group('function').upper(), arguments)
+        if kind == 'name':
+            name = match.group().upper()
+            if name in ('TRUE', 'FALSE'):
+                return ('value', name == 'TRUE')
+            return ('name', name)
+        if match.group() == '(':
+            node = binary(0)
+            expect(')')
+            return node
+        raise ValueError(f"Unexpected {match.group()!r} in the formula {formula!r}.")
+
+    tree = binary(0)
+    if index != len(tokens):
+        raise ValueError(f"Unexpected {tokens[index][1].group()!r} in the formula {formula!r}.")
+    return tree
+
+# Function to move the relative references of a parsed formula (the cells of a shared formula follow their first cell)
+def _shift_formula(node, rows, columns):
+    kind = node[0]
+
+    def shift(row, column, row_absolute, column_absolute):
+        return (row if row_absolute else row + rows, column if column_absolute else column + columns,
+                row_absolute, column_absolute)
+
+    if kind == 'cell':
+        position = shift(*node[2:])
+        if position[0] < 1 or position[1] < 1:
+            return ('value', ExcelError('#REF!'))
+        return ('cell', node[1], *position)
+    if kind == 'range':
+        first, last = shift(*node[2]), shift(*node[3])
+        if min(first[0], first[1], last[0], last[1]) < 1:
+            return ('value', ExcelError('#REF!'))
+        return ('range', node[1], first, last)
+    if kind in ('negate', 'percent'):
+        return (kind, _shift_formula(node[1], rows, columns))
+    if kind == 'operator':
+        return ('operator', node[1], _shift_formula(node[2], rows, columns), _shift_formula(node[3], rows, columns))
+    if kind == 'call':
+        return ('call', node[1], [_shift_formula(argument, rows, columns) for argument in node[2]])
+    return node
+
+# Function to turn a value of a DataFrame row into the value Excel keeps (dates are day serials, blanks are None)
+def _cell_value(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return float(value)
+    if isinstance(value, (float, np.floating)):
+        return None if math.isinf(value) else float(value)
+    if isinstance(value, datetime.datetime):
+        if value != value:
+            # NaT
+            return None
+        return (value.replace(tzinfo=None) - EXCEL_EPOCH).total_seconds() / 86400
+    if isinstance(value, datetime.date):
+        return float((datetime.datetime(value.year, value.month, value.day) - EXCEL_EPOCH).days)
+    return str(value)
+
+# Function to get a single value from a value or a one-cell range (larger ranges are #VALUE! where one value is expected)
+def _scalar(value):
+    if isinstance(value, list):
+        if len(value) == 1 and len(value[0]) == 1:
+            return value[0][0]
+        raise ExcelError('#VALUE!')
+    return value
+
+# Function to convert a value to a number the way Excel arithmetic does (blank is 0, TRUE is 1, numeric text is read)
+def _number(value):
+    value = _scalar(value)
+    if value is None:
+        return 0.0
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            raise ExcelError('#VALUE!')
+    return value
+
+# Function to convert a value to a boolean the way IF and AND do
+def _boolean(value):
+    value = _scalar(value)
+    if value is None:
+        return False
+    if isinstance(value, str):
+        if value.upper() in ('TRUE', 'FALSE'):
+            return value.upper() == 'TRUE'
+        raise ExcelError('#VALUE!')
+    return bool(value)
+
+# Function to convert a value to text the way & does (numbers in the General format)
+def _text(value):
+    value = _scalar(value)
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, float):
+        return f"{value:.15g}"
+    return value
+
+# Function to compare two values the way Excel does (text ignores case, blank takes the type of the other value)
+def _compare(operator, left, right):
+    left, right = _scalar(left), _scalar(right)
+    if left is None and right is None:
+        left = right = 0.0
+    elif left is None:
+        left = {str: '', bool: False}.get(type(right), 0.0)
+    elif right is None:
+        right = {str: '', bool: False}.get(type(left), 0.0)
+    left_rank, right_rank = TYPE_RANKS.get(type(left), 0), TYPE_RANKS.get(type(right), 0)
+    if left_rank != right_rank:
+        left, right = left_rank, right_rank
+    elif left_rank == 1:
+        left, right = left.lower(), right.lower()
+    return {'=': left == right, '<>': left != right, '<': left < right, '>': left > right,
+            '<=': left <= right, '>=': left >= right}[operator]
+
+# Function to apply an arithmetic operator, results Excel cannot hold are #NUM!
+def _arithmetic(operator, left, right):
+    left, right = _number(left), _number(right)
+    if operator == '+':
+        result = left + right
+    elif operator == '-':
+        result = left - right
+    elif operator == '*':
+        result = left * right
+    elif operator == '/':
+        if right == 0:
+            raise ExcelError('#DIV/0!')
+        result = left / right
+    else:
+        if left == 0 and right < 0:
+            raise ExcelError('#DIV/0!')
+        if (left == 0 and right == 0) or (left < 0 and right != int(right)):
+            raise ExcelError('#NUM!')
+        try:
+            result = left ** right
+        except OverflowError:
+            raise ExcelError('#NUM!')
+    if not math.isfinite(result):
+        raise ExcelError('#NUM!')
+    return result
+
+# Function to get the numbers of the arguments of SUM and AVERAGE (numbers only in ranges, any number-like single value)
+def _numbers(arguments):
+    numbers = []
+    for argument in arguments:
+        if isinstance(argument, list):
+            numbers.extend(value for row in argument for value in row
+                           if isinstance(value, (int, float)) and not isinstance(value, bool))
+        else:
+            numbers.append(_number(argument))
+    return numbers
+
+# Function to get the booleans of the arguments of AND and OR (text and blanks in ranges are skipped)
+def _booleans(arguments):
+    booleans = []
+    for argument in arguments:
+        if isinstance(argument, list):
+            booleans.extend(bool(value) for row in argument for value in row
+                            if isinstance(value, (int, float, bool)))
+        else:
+            booleans.append(_boolean(argument))
+    if not booleans:
+        raise ExcelError('#VALUE!')
+    return booleans
+
+# Function to compute SUMPRODUCT, the ranges must have the same shape and anything but numbers counts as 0
+def _sumproduct(*arguments):
+    arrays = [argument if isinstance(argument, list) else [[argument]] for argument in arguments]
+    shape = (len(arrays[0]), len(arrays[0][0]))
+    if any((len(array), len(array[0])) != shape for array in arrays):
+        raise ExcelError('#VALUE!')
+    total = 0.0
+    for cells in zip(*[[value for row in array for value in row] for array in arrays]):
+        product = 1.0
+        for value in cells:
+            product *= value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+        total += product
+    return total
+
+# Function to compute AVERAGE, #DIV/0! without numbers
+def _average(*arguments):
+    numbers = _numbers(arguments)
+    if not numbers:
+        raise ExcelError('#DIV/0!')
+    return sum(numbers) / len(numbers)
+
+# Function to compute LN, #NUM! for numbers that are not positive
+def _ln(value):
+    value = _number(value)
+    if value <= 0:
+        raise ExcelError('#NUM!')
+    return math.log(value)
+
+# Function to compute SQRT, #NUM! for negative numbers
+def _sqrt(value):
+    value = _number(value)
+    if value < 0:
+        raise ExcelError('#NUM!')
+    return math.sqrt(value)
+
+# Function to compute NORMINV (inverse of the normal distribution), #NUM! outside of its domain
+def _norminv(probability, mean, deviation):
+    probability, mean, deviation = _number(probability), _number(mean), _number(deviation)
+    if not 0 < probability < 1 or deviation <= 0:
+        raise ExcelError('#NUM!')
+    return NormalDist(mean, deviation).inv_cdf(probability)
+
+# Functions of the template (and of the formulas the dashboard writes into it), IF is evaluated apart because its branches are lazy
+FUNCTIONS = {
+    'SUM': lambda *arguments: sum(_numbers(arguments)),
+    'AVERAGE': _average,
+    'SUMPRODUCT': _sumproduct,
+    'ABS': lambda value: abs(_number(value)),
+    'SQRT': _sqrt,
+    'LN': _ln,
+    'NORMINV': _norminv,
+    'NORM.INV': _norminv,
+    '_XLFN.NORM.INV': _norminv,
+    'AND': lambda *arguments: all(_booleans(arguments)),
+    'OR': lambda *arguments: any(_booleans(arguments)),
+    'NOT': lambda value: not _boolean(value),
+}
+
+
+# Formulas and values of a workbook, with the dependencies between the cells
+# Changing cells (set_values, replace_sheet) or formulas (set_formulas) recomputes only the formula cells that depend on them
+class WorkbookFormulas:
+    # Function to start an empty model of the given sheets, names are the defined names {NAME: reference}
+    def __init__(self, sheet_names, names=None):
+        self.sheets = {name.lower(): name for name in sheet_names}
+        # {(sheet, row, column): value} of every cell holding something, formula cells hold their result
+        self.values = {}
+        # {(sheet, row, column): parsed formula}
+        self.formulas = {}
+        # {formula cell: cells it reads} and {cell: formula cells reading it}
+        self.precedents = {}
+        self.dependents = {}
+        self.names = {}
+        for name, reference in (names or {}).items():
+            try:
+                self.names[name.upper()] = self._resolve(parse_formula(reference, None))
+            except ValueError:
+                # Names that are not plain references (constants, formulas) are not used by the template
+                pass
+        self.source = None
+
+    # Function to copy the model, the copy can be changed without affecting this one (parsed formulas are shared, they never change)
+    def copy(self):
+        other = WorkbookFormulas.__new__(WorkbookFormulas)
+        other.sheets = self.sheets
+        other.names = self.names
+        other.source = self.source
+        other.values = dict(self.values)
+        other.formulas = dict(self.formulas)
+        other.precedents = dict(self.precedents)
+        other.dependents = {cell: set(formulas) for cell, formulas in self.dependents.items()}
+        return other
+
+    # Function to replace the sheet names of a parsed formula by the names of the workbook (Excel ignores their case)
+    def _resolve(self, node):
+        kind = node[0]
+        if kind in ('cell', 'range'):
+            sheet = self.sheets.get(node[1].lower()) if node[1] is not None else None
+            if sheet is None:
+                return ('value', ExcelError('#REF!'))
+            return (kind, sheet, *node[2:])
+        if kind in ('negate', 'percent'):
+            return (kind, self._resolve(node[1]))
+        if kind == 'operator':
+            return ('operator', node[1], self._resolve(node[2]), self._resolve(node[3]))
+        if kind == 'call':
+            return ('call', node[1], [self._resolve(argument) for argument in node[2]])
+        return node
+
+    # Function to list the cells a parsed formula reads (the cells of its ranges and names included)
+    def _references(self, node, cells):
+        kind = node[0]
+        if kind == 'cell':
+            cells.add((node[1], node[2], node[3]))
+        elif kind == 'range':
+            (first_row, first_column, _, _), (last_row, last_column, _, _) = node[2], node[3]
+            for row in range(min(first_row, last_row), max(first_row, last_row) + 1):
+                for column in range(min(first_column, last_column), max(first_column, last_column) + 1):
+                    cells.add((node[1], row, column))
+        elif kind == 'name' and node[1] in self.names:
+            self._references(self.names[node[1]], cells)
+        elif kind in ('negate', 'percent'):
+            self._references(node[1], cells)
+        elif kind == 'operator':
+            self._references(node[2], cells)
+            self._references(node[3], cells)
+        elif kind == 'call':
+            for argument in node[2]:
+                self._references(argument, cells)
+        return cells
+
+    # Function to set (or remove, with None) the parsed formula of a cell and its dependencies, without recomputing
+    def _set_formula(self, cell, node):
+        for precedent in self.precedents.pop(cell, ()):
+            self.dependents[precedent].discard(cell)
+        self.formulas.pop(cell, None)
+        if node is None:
+            return
+        node = self._resolve(node)
+        self.formulas[cell] = node
+        self.precedents[cell] = self._references(node, set())
+        for precedent in self.precedents[cell]:
+            self.dependents.setdefault(precedent, set()).add(cell)
+
+    # Function to read the value of a cell while evaluating, error values stop the formula
+    def _read(self, sheet, row, column):
+        value = self.values.get((sheet, row, column))
+        if isinstance(value, ExcelError):
+            raise value
+        return value
+
+    # Function to evaluate a parsed formula, ranges evaluate to a list of rows of values
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == 'value':
+            if isinstance(node[1], ExcelError):
+                raise node[1]
+            return node[1]
+        if kind == 'cell':
+            return self._read(node[1], node[2], node[3])
+        if kind == 'range':
+            (first_row, first_column, _, _), (last_row, last_column, _, _) = node[2], node[3]
+            return [[self._read(node[1], row, column)
+                     for column in range(min(first_column, last_column), max(first_column, last_column) + 1)]
+                    for row in range(min(first_row, last_row), max(first_row, last_row) + 1)]
+        if kind == 'name':
+            if node[1] not in self.names:
+                raise ExcelError('#NAME?')
+            return self._evaluate(self.names[node[1]])
+        if kind == 'negate':
+            return -_number(self._evaluate(node[1]))
+        if kind == 'percent':
+            return _number(self._evaluate(node[1])) / 100
+        if kind == 'operator':
+            operator, left, right = node[1], self._evaluate(node[2]), self._evaluate(node[3])
+            if operator == '&':
+                return _text(left) + _text(right)
+            if operator in OPERATOR_LEVELS[0]:
+                return _compare(operator, left, right)
+            return _arithmetic(operator, left, right)
+
+        name, arguments = node[1], node[2]
+        if name == 'IF':
+            if not 1 <= len(arguments) <= 3:
+                raise ExcelError('#VALUE!')
+            if _boolean(self._evaluate(arguments[0])):
+                return self._evaluate(arguments[1]) if len(arguments) > 1 else True
+            return self._evaluate(arguments[2]) if len(arguments) > 2 else False
+        if name not in FUNCTIONS:
+            raise ExcelError('#NAME?')
+        # References are passed as one-cell ranges, so SUM and AND skip the text of a referenced cell like Excel
+        try:
+            return FUNCTIONS[name](*[[[self._evaluate(argument)]] if argument[0] == 'cell' else self._evaluate(argument)
+                                     for argument in arguments])
+        except TypeError:
+            # Wrong number of arguments
+            raise ExcelError('#VALUE!')
+
+    # Function to compute the value of a formula cell (a blank result shows as 0, an error is kept as the value)
+    def _formula_value(self, cell):
+        try:
+            value = _scalar(self._evaluate(self.formulas[cell]))
+        except ExcelError as error:
+            return error
+        except (ZeroDivisionError, OverflowError, ValueError):
+            return ExcelError('#NUM!')
+        if isinstance(value, float) and not math.isfinite(value):
+            return ExcelError('#NUM!')
+        return 0.0 if value is None else value
+
+    # Function to recompute the formula cells that depend on the changed cells (and the changed formula cells themselves)
+    # The cells are computed after the cells they read; cells in a circular reference are 0 like in Excel without iteration
+    # Returns the recomputed cells
+    def _recalculate(self, changed):
+        affected = {cell for cell in changed if cell in self.formulas}
+        queue = deque(changed)
+        while queue:
+            for dependent in self.dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+
+        waiting = {cell: len(self.precedents[cell] & affected) for cell in affected}
+        ready = deque(cell for cell, count in waiting.items() if count == 0)
+        while ready:
+            cell = ready.popleft()
+            del waiting[cell]
+            self.values[cell] = self._formula_value(cell)
+            for dependent in self.dependents.get(cell, ()):
+                if dependent in waiting:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+        for cell in waiting:
+            self.values[cell] = 0.0
+        return affected
+
+    # Function to get the value of a cell (None for a blank cell, an ExcelError for an error)
+    def value(self, sheet, reference):
+        return self.values.get(_cell_key(self.sheets[sheet.lower()], reference))
+
+    # Function to set the formulas of some cells of a sheet {cell: formula}, returns the recomputed cells
+    def set_formulas(self, sheet, formulas):
+        sheet = self.sheets[sheet.lower()]
+        changed = set()
+        for reference, formula in formulas.items():
+            cell = _cell_key(sheet, reference)
+            node = self._resolve(parse_formula(formula, sheet))
+            if self.formulas.get(cell) != node:
+                self._set_formula(cell, node)
+                changed.add(cell)
+        return self._recalculate(changed)
+
+    # Function to set the values of some cells of a sheet {cell: value}, strings starting with '=' are formulas
+    # Returns the recomputed cells
+    def set_values(self, sheet, values):
+        sheet = self.sheets[sheet.lower()]
+        return self._update(sheet, {_cell_key(sheet, reference): value for reference, value in values.items()})
+
+    # Function to replace every cell of a sheet by rows of values (the first row is row 1, the first value column A)
+    # Only the cells whose value changed (and the formulas reading them) are recomputed, returns the recomputed cells
+    def replace_sheet(self, sheet, rows):
+        sheet = self.sheets[sheet.lower()]
+        cells = {}
+        for row, values in enumerate(rows, start=1):
+            for column, value in enumerate(values, start=1):
+                cells[sheet, row, column] = value
+        # Cells of the sheet that are not in the rows become blank
+        for cell in list(self.values) + list(self.formulas):
+            if cell[0] == sheet and cell not in cells:
+                cells[cell] = None
+        return self._update(sheet, cells)
+
+    # Function to write values and formulas into cells {(sheet, row, column): value} and recompute what depends on them
+    def _update(self, sheet, cells):
+        changed = set()
+        for cell, value in cells.items():
+            if isinstance(value, str) and value.startswith('='):
+                node = self._resolve(parse_formula(value, sheet))
+                if self.formulas.get(cell) != node:
+                    self._set_formula(cell, node)
+                    changed.add(cell)
+                continue
+            value = _cell_value(value)
+            if cell in self.formulas:
+                self._set_formula(cell, None)
+            elif self.values.get(cell) == value and type(self.values.get(cell)) is type(value):
+                continue
+            if value is None:
+                self.values.pop(cell, None)
+            else:
+                self.values[cell] = value
+            changed.add(cell)
+        return self._recalculate(changed)
+
+    # Function to get the value of every formula cell: {sheet: {cell: value}}
+    def formula_values(self):
+        values = {}
+        for sheet, row, column in self.formulas:
+            values.setdefault(sheet, {})[f"{get_column_letter(column)}{row}"] = self.values.get((sheet, row, column))
+        return values
+
+
+# Function to get the texts of the shared strings of a workbook (rich text runs joined, phonetic runs left out)
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    for _, element in ET.iterparse(archive.open('xl/sharedStrings.xml')):
+        if element.tag == f'{MAIN_NAMESPACE}si':
+            # The text is in <t> or in the <t> of the runs <r>, the <t> of the phonetic runs <rPh> are not part of it
+            strings.append(''.join(child.text or '' if child.tag == f'{MAIN_NAMESPACE}t' else child.findtext(f'{MAIN_NAMESPACE}t', '')
+                                   for child in element if child.tag in (f'{MAIN_NAMESPACE}t', f'{MAIN_NAMESPACE}r')))
+            element.clear()
+    return strings
+
+# Function to get the defined names of a workbook that apply to every sheet {name: reference}
+def _defined_names(archive):
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    return {name.get('name'): name.text for name in workbook.iter(f'{MAIN_NAMESPACE}definedName')
+            if name.get('localSheetId') is None and name.text}
+
+# Function to get the value Excel saved for a cell (its type is in the t attribute)
+def _saved_value(cell, strings):
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(f'{MAIN_NAMESPACE}t'))
+    value = cell.findtext(f'{MAIN_NAMESPACE}v')
+    if value is None:
+        return None
+    if cell_type == 's':
+        return strings[int(value)]
+    if cell_type == 'b':
+        return value == '1'
+    if cell_type == 'e':
+        return ExcelError(value)
+    if cell_type in ('str', 'd'):
+        return value
+    return float(value)
+
+# Function to read the values and formulas of a workbook and compute every formula
+# Formulas that cannot be parsed keep the value Excel saved
+def read_workbook_formulas(path):
+    with zipfile.ZipFile(path) as archive:
+        parts = sheet_parts(archive)
+        strings = _shared_strings(archive)
+        formulas = WorkbookFormulas(parts, _defined_names(archive))
+        for sheet, part in parts.items():
+            # {shared formula index: (parsed formula, row, column) of its first cell}
+            shared = {}
+            for _, element in ET.iterparse(archive.open(part)):
+                if element.tag != f'{MAIN_NAMESPACE}c':
+                    continue
+                cell = _cell_key(sheet, element.get('r'))
+                value = _saved_value(element, strings)
+                if value is not None:
+                    formulas.values[cell] = value
+                formula = element.find(f'{MAIN_NAMESPACE}f')
+                element.clear()
+                if formula is None or formula.get('t') == 'dataTable':
+                    continue
+                try:
+                    if formula.get('t') == 'shared' and not formula.text:
+                        node, row, column = shared[formula.get('si')]
+                        node = _shift_formula(node, cell[1] - row, cell[2] - column)
+                    else:
+                        node = parse_formula(formula.text or '', sheet)
+                        if formula.get('t') == 'shared':
+                            shared[formula.get('si')] = (node, cell[1], cell[2])
+                except (ValueError, KeyError):
+                    continue
+                formulas._set_formula(cell, node)
+    formulas._recalculate(set(formulas.formulas))
+    return formulas
+
+# Function to read the formulas of a template once per version of the file (shared by every session, never changed)
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _read_template_formulas(path, mtime_ns, size):
+    formulas = read_workbook_formulas(path)
+    formulas.source = (path, mtime_ns, size)
+    return formulas
+
+# Function to get the formulas of a template for the session, the session keeps its copy under key
+# Run after run the same copy is updated, so only the cells downstream of what changed are recomputed
+def template_formulas(path, key='workbook_formulas'):
+    stat = os.stat(path)
+    source = (path, stat.st_mtime_ns, stat.st_size)
+    formulas = st.session_state.get(key)
+    if formulas is None or formulas.source != source:
+        formulas = _read_template_formulas(*source).copy()
+        st.session_state[key] = formulas
+    return formulas
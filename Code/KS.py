@@ -0,0 +1,217 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+import os
+from pptx.dml.color import RGBColor
+from streamlit_modal import Modal
+from Loader import load_dataset
+from Metrics import ks_summary, ks_bucket_table
+from Report import create_metric_ppt, ppt_download_button_html
+from Artifacts import lazy_download, memoize_presentation
+from Tables import show_table, table_to_excel, styles_on_rows
+from Charts import figure_png_future
+
+
+# Function to create the KS presentation (title slide, KS history, KS calculation of the period and graphs)
+@memoize_presentation
+def create_ppt_ks(df_summary, df_detail, period, fig_bytes, data_comment="", graph_comment=""):
+    ks_row = df_detail['Difference'].idxmax()
+
+    # Highlight the bucket where the KS is reached
+    def detail_fill(row_idx, col_name, value):
+        if row_idx == ks_row and col_name == 'Difference':
+            return RGBColor(0xFF, 0xBF, 0x00)
+        return None
+
+    return create_metric_ppt(
+        "PL - Scorecard Model KS",
+        tables=[("KS by date_ref", df_summary, None), (f"KS calculation - {period}", df_detail, detail_fill)],
+        graphs=[("Graph", fig_bytes)],
+        data_comment=data_comment,
+        graph_comment=graph_comment,
+    )
+
+# Streamlit app
+def app():
+    st.markdown(
+                """
+                <h1 style='text-align: center; font-size: 28px; color: rgb(39, 45, 85);'>PL - Scorecard Model KS</h1>
+                """,
+                unsafe_allow_html=True
+            )
+
+    # Compute the KS of every date_ref from the performance history
+    performance = load_dataset('PERFORMANCE HISTORICAL(Data).xlsx')
+    df = ks_summary(performance)
+    periods = df['date_ref'].tolist()
+
+    custom_css = """
+    <style>
+        .custom-container {
+            max-height: 400px;
+            max-width: 100%;
+            overflow-y: scroll;
+            overflow-x: scroll;
+            position: relative;
+            border-radius: 10px;
+            border: 1px solid #ccc;
+        }
+        table {
+            width: 100%;
+            height: auto;
+        }
+        th, td {
+            font-size: 14px;
+            padding: 8px;
+            text-align: left;
+            white-space: nowrap;  /* Prevent text from wrapping */
+        }
+        .download-icon {
+            position: absolute;
+            right: 40px;
+            top: -40px;  /* Adjust to align vertically outside the table container */
+            font-size: 24px;
+        }
+        thead {
+            position: sticky;
+            top: 0;
+            background-color: rgb(39, 45, 85);
+            color: rgb(20, 26, 63);
+        }
+        thead th {
+            color: white;
+            font-weight: normal;
+        }
+        .ppt-download-button {
+            position: absolute;
+            top: -72px;
+            left: 150px;
+            cursor: pointer
+        }
+    </style>
+    """
+    st.markdown(custom_css, unsafe_allow_html=True)
+
+    # Path to the download icon
+    image_path = os.path.join(os.path.dirname(__file__), 'Images', 'Download_icon.png')
+
+    # Create two tabs: one for data and one for the graph
+    tab1, tab2 = st.tabs(["KS Calculation", "Graph"])
+
+    with tab1:
+        st.markdown(
+            """
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>KS by date_ref</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+
+        # Highlight the strongest and weakest separation of the history
+        extremes = np.isin(np.arange(len(df)), [df['KS'].argmax(), df['KS'].argmin()])
+        styles = {'KS': styles_on_rows('background-color: orange', extremes)}
+        show_table(df, "KS_history.xlsx", image_path, table_to_excel, "ks_history", styles)
+
+        period = st.selectbox("Select date_ref", options=periods, index=len(periods) - 1, key="ks_period")
+        df_detail = ks_bucket_table(performance, period)
+        st.session_state.df_ks = df
+        st.session_state.df_ks_detail = df_detail
+
+        st.markdown(
+            f"""
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>KS Calculation - {period}</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        styles = {'Difference': styles_on_rows('background-color: orange', np.arange(len(df_detail)) == df_detail['Difference'].argmax())}
+        show_table(df_detail, f"KS_{period}.xlsx", image_path, table_to_excel, "ks_detail", styles)
+
+        # Add comment box for data
+        data_comment_modal = Modal("Comment", key="ks_data_comment")
+        if st.button("Add Comment", key="ks_data_comment_button", help="Click here to add Comment"):
+            data_comment_modal.open()
+
+        if data_comment_modal.is_open():
+            with data_comment_modal.container():
+                data_comment_ks = st.text_area("Enter your comment:", key="ks_data_comment_textarea")
+                if st.button("Submit Comment", key="ks_submit_data_comment"):
+                    st.session_state.data_comment_ks = data_comment_ks
+                    data_comment_modal.close()
+
+    with tab2:
+        st.markdown(
+                """
+                <div style='text-align: center;
+                font-size: 20px;'>
+                    <strong>Graph</strong>
+                </div>
+                """,
+                unsafe_allow_html=True)
+
+        # Cumulative distributions of the selected period with the KS distance
+        ks_row = df_detail.loc[df_detail['Difference'].idxmax()]
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=df_detail['PD Bucket'], y=df_detail['% Cum Bad'], mode='lines+markers', name='% Cum Bad', line=dict(color='red', width=2)))
+        fig.add_trace(go.Scatter(x=df_detail['PD Bucket'], y=df_detail['% Cum Good'], mode='lines+markers', name='% Cum Good', line=dict(color='blue', width=2)))
+        fig.add_trace(go.Scatter(x=[ks_row['PD Bucket'], ks_row['PD Bucket']], y=[ks_row['% Cum Bad'], ks_row['% Cum Good']],
+                                 mode='lines', name=f"KS = {ks_row['Difference']:.4f}", line=dict(color='orange', width=3, dash='dash')))
+        fig.update_layout(
+            xaxis_title=dict(text='PD Bucket -->', font=dict(size=17, color='black', family='Calibri')),
+            yaxis_title=dict(text='Cumulative share -->', font=dict(size=17, color='black', family='Calibri')),
+            xaxis=dict(showgrid=True, gridcolor='lightgray', showline=True, linecolor='black', linewidth=2, mirror=True, dtick=1),
+            yaxis=dict(showgrid=True, gridcolor='lightgray', showline=True, linecolor='black', linewidth=2, mirror=True),
+            legend=dict(orientation='h', x=0.3, y=-0.2, bordercolor='black', borderwidth=1),
+            margin=dict(l=60, r=30, t=40, b=60),
+            showlegend=True,
+            width=1200,
+            height=500
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # KS history
+        fig_history = go.Figure()
+        fig_history.add_trace(go.Scatter(x=[str(p) + '_' for p in periods], y=df['KS'], mode='lines+markers', name='KS', line=dict(color='rgb(39, 45, 85)', width=2)))
+        fig_history.update_layout(
+            xaxis=dict(showline=True, linecolor='black', linewidth=2, mirror=True),
+            yaxis=dict(showgrid=True, gridcolor='lightgray', showline=True, linecolor='black', linewidth=2, mirror=True),
+            margin=dict(l=60, r=30, t=40, b=60),
+            plot_bgcolor='white',
+            width=1200,
+            height=400
+        )
+        st.plotly_chart(fig_history, use_container_width=True)
+
+        # Add comment box for graph
+        graph_comment_modal = Modal("Comment", key="ks_graph_comment")
+        if st.button("Add Comment", key="ks_graph_comment_button", help="Click here to add Comment"):
+            graph_comment_modal.open()
+
+        if graph_comment_modal.is_open():
+            with graph_comment_modal.container():
+                graph_comment_ks = st.text_area("Enter your comment:", key="ks_graph_comment_textarea")
+                if st.button("Submit Comment", key="ks_submit_graph_comment"):
+                    st.session_state.graph_comment_ks = graph_comment_ks
+                    graph_comment_modal.close()
+
+        # Convert plot figure to PNG bytes in the background, reused while the figure is unchanged
+        fig_bytes = figure_png_future(fig)
+        st.session_state.fig_bytes_ks = fig_bytes
+
+        data_comment_ks = st.session_state.get("data_comment_ks", "")
+        graph_comment_ks = st.session_state.get("graph_comment_ks", "")
+
+        # The presentation is only built when the user asks for it, then kept until its inputs change
+        ppt_data_ks = lazy_download("ks_ppt", lambda progress: create_ppt_ks(df, df_detail, period, fig_bytes, data_comment_ks, graph_comment_ks),
+                                    (df, df_detail, period, fig_bytes, data_comment_ks, graph_comment_ks), "KS.pptx",
+                                    "Click here to prepare the KS PowerPoint presentation")
+        if ppt_data_ks is not None:
+            st.session_state.ppt_data_ks = ppt_data_ks
+            st.markdown(ppt_download_button_html(ppt_data_ks, "KS.pptx", "Click here to download the KS PowerPoint presentation"), unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    app()
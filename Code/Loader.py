@@ -0,0 +1,268 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import json
+import os
+import shutil
+
+
+# Base directory of the datasets shipped with the dashboard
+DATASETS_DIR = os.path.join(os.path.dirname(__file__), 'Datasets')
+
+# Folder holding the columnar (Arrow IPC) copies of the workbooks
+SIDECAR_DIR = os.path.join(DATASETS_DIR, '.cache')
+
+# Kinds of values found in the mixed object columns that pandas returns for Excel sheets
+KIND_NONE, KIND_BOOL, KIND_INT, KIND_FLOAT, KIND_STR = 0, 1, 2, 3, 4
+
+
+class UnsupportedSheet(Exception):
+    pass
+
+
+class MissingSheet(Exception):
+    pass
+
+
+# Function to encode a column label so that it can be restored with its original type
+def _encode_label(label):
+    if isinstance(label, (bool, np.bool_)):
+        raise UnsupportedSheet(f"Unsupported column label {label!r}")
+    if isinstance(label, (int, np.integer)):
+        return ['int', int(label)]
+    if isinstance(label, (float, np.floating)):
+        return ['float', float(label)]
+    if isinstance(label, str):
+        return ['str', label]
+    raise UnsupportedSheet(f"Unsupported column label {label!r}")
+
+# Function to decode a column label written by _encode_label
+def _decode_label(encoded):
+    kind, value = encoded
+    return {'int': int, 'float': float, 'str': str}[kind](value)
+
+# Function to split a mixed object column into one typed Arrow array per kind of value
+def _encode_object_column(values):
+    n = len(values)
+    kinds = np.zeros(n, dtype=np.int8)
+    bools = np.zeros(n, dtype=bool)
+    ints = np.zeros(n, dtype=np.int64)
+    floats = np.zeros(n, dtype=np.float64)
+    strs = [None] * n
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, (bool, np.bool_)):
+            kinds[i] = KIND_BOOL
+            bools[i] = value
+        elif isinstance(value, (int, np.integer)):
+            kinds[i] = KIND_INT
+            ints[i] = value
+        elif isinstance(value, (float, np.floating)):
+            kinds[i] = KIND_FLOAT
+            floats[i] = value
+        elif isinstance(value, str):
+            kinds[i] = KIND_STR
+            strs[i] = value
+        else:
+            raise UnsupportedSheet(f"Unsupported cell value {value!r}")
+    return [pa.array(kinds), pa.array(bools), pa.array(ints), pa.array(floats), pa.array(strs, type=pa.string())]
+
+# Function to rebuild a mixed object column from its typed parts
+def _decode_object_column(kinds, bools, ints, floats, strs):
+    values = np.empty(len(kinds), dtype=object)
+    for kind, part in ((KIND_BOOL, bools), (KIND_INT, ints), (KIND_FLOAT, floats), (KIND_STR, strs)):
+        mask = kinds == kind
+        if mask.any():
+            values[mask] = part[mask]
+    return values
+
+# Function to convert a parsed sheet into an Arrow table
+def _frame_to_table(df):
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        raise UnsupportedSheet("Only default indexes are supported")
+
+    arrays, names, columns = [], [], []
+    for position, label in enumerate(df.columns):
+        series = df.iloc[:, position]
+        if series.dtype == object:
+            arrays.extend(_encode_object_column(series.to_numpy()))
+            names.extend(f"c{position}.{part}" for part in ('kind', 'bool', 'int', 'float', 'str'))
+            columns.append({'label': _encode_label(label), 'mixed': True})
+        else:
+            arrays.append(pa.array(series.to_numpy()))
+            names.append(f"c{position}")
+            columns.append({'label': _encode_label(label), 'mixed': False})
+
+    metadata = {'columns': json.dumps(columns), 'rows': str(len(df))}
+    return pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+# Function to convert an Arrow table written by _frame_to_table back into the original frame
+# Typed columns are converted without a copy (the frame refers to the table's buffers), mixed columns are rebuilt from their parts
+def _table_to_frame(table):
+    metadata = table.schema.metadata
+    columns = json.loads(metadata[b'columns'])
+    # One block per column, so no column is copied to be consolidated with the others
+    converted = table.to_pandas(split_blocks=True, self_destruct=True)
+    data = {}
+    for position, column in enumerate(columns):
+        if column['mixed']:
+            parts = [converted[f"c{position}.{part}"].to_numpy() for part in ('kind', 'bool', 'int', 'float', 'str')]
+            data[position] = _decode_object_column(*parts)
+        else:
+            data[position] = converted[f"c{position}"].to_numpy()
+
+    df = pd.DataFrame(data, index=pd.RangeIndex(int(metadata[b'rows'])), copy=False)
+    df.columns = [_decode_label(column['label']) for column in columns]
+    return df
+
+# Function to get the folder with the sidecars of one workbook
+def _sidecar_folder(path):
+    return os.path.join(SIDECAR_DIR, os.path.basename(path))
+
+# Function to get the sidecar file of one sheet read with one header setting
+def _sidecar_path(path, position, header):
+    return os.path.join(_sidecar_folder(path), f"{position}.h{'none' if header is None else header}.arrow")
+
+# Function to read the manifest of a workbook's sidecars if it still matches the workbook on disk
+def _read_manifest(path, mtime_ns, size):
+    try:
+        with open(os.path.join(_sidecar_folder(path), 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('mtime_ns') != mtime_ns or manifest.get('size') != size:
+        return None
+    return manifest
+
+# Function to write a file atomically so that concurrent readers never see a partial sidecar
+def _atomic_write(target, write):
+    temp = f"{target}.{os.getpid()}.tmp"
+    write(temp)
+    os.replace(temp, target)
+
+# Function to write the sidecars of every sheet of a workbook parsed with one header setting
+def _write_sidecars(path, mtime_ns, size, frames, header):
+    folder = _sidecar_folder(path)
+    manifest = _read_manifest(path, mtime_ns, size)
+    if manifest is None:
+        # The workbook changed (or was never converted): drop every stale sidecar
+        shutil.rmtree(folder, ignore_errors=True)
+        manifest = {'mtime_ns': mtime_ns, 'size': size, 'sheets': list(frames), 'unsupported': []}
+    os.makedirs(folder, exist_ok=True)
+
+    for position, (sheet, df) in enumerate(frames.items()):
+        try:
+            table = _frame_to_table(df)
+        except UnsupportedSheet:
+            if [position, header] not in manifest['unsupported']:
+                manifest['unsupported'].append([position, header])
+            continue
+
+        def write(temp, table=table):
+            with pa.OSFile(temp, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+        _atomic_write(_sidecar_path(path, position, header), write)
+
+    def write_manifest(temp):
+        with open(temp, 'w') as f:
+            json.dump(manifest, f)
+
+    _atomic_write(os.path.join(folder, 'manifest.json'), write_manifest)
+
+# Function to read a sidecar through a memory map, the typed columns of the frame stay in the mapped file
+def _read_sidecar(sidecar):
+    with pa.memory_map(sidecar, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return _table_to_frame(table)
+
+# Function to find the position of a sheet given by name or by index
+def _sheet_position(sheets, sheet_name):
+    if isinstance(sheet_name, int):
+        return sheet_name
+    return sheets.index(sheet_name)
+
+# Function to parse a whole workbook once and refresh its sidecars
+def _convert_workbook(path, mtime_ns, size, header):
+    frames = pd.read_excel(path, sheet_name=None, header=header)
+    try:
+        _write_sidecars(path, mtime_ns, size, frames, header)
+    except OSError:
+        # A read-only deployment still works, it just keeps parsing the XLSX
+        pass
+    return frames
+
+# Function to load a sheet from its columnar copy, converting the workbook on first use or on file change
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _read_workbook(path, mtime_ns, size, sheet_name, header):
+    manifest = _read_manifest(path, mtime_ns, size)
+    if manifest is not None:
+        position = _sheet_position(manifest['sheets'], sheet_name)
+        sidecar = _sidecar_path(path, position, header)
+        if os.path.exists(sidecar):
+            return _read_sidecar(sidecar)
+        if [position, header] in manifest['unsupported']:
+            # Sheets with values Arrow cannot carry faithfully are always parsed from the XLSX
+            return pd.read_excel(path, sheet_name=sheet_name, header=header)
+
+    frames = _convert_workbook(path, mtime_ns, size, header)
+    df = frames[sheet_name] if isinstance(sheet_name, str) else list(frames.values())[sheet_name]
+    return df
+
+# Function to load a dataset from the Datasets folder, the workbook is parsed once and shared by every session
+def load_dataset(file_name, sheet_name=0, header=0):
+    path = os.path.join(DATASETS_DIR, file_name)
+    stat = os.stat(path)
+
+    # The modification time and size are part of the cache key, so a replaced file is parsed again
+    df = _read_workbook(path, stat.st_mtime_ns, stat.st_size, sheet_name, header)
+
+    # Every caller gets its own copy, so changing it in place never affects the frame kept in the cache
+    return df.copy()
+
+# Function to read a sheet and some of its cells (e.g. the heading of a report) in one pass over the workbook
+# The cells come from the workbook pandas has opened, converted the way pd.read_excel converts them (whole floats to int)
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _read_sheet_and_cells(path, mtime_ns, size, sheet_name, header, cells):
+    with pd.ExcelFile(path, engine='openpyxl') as excel:
+        if sheet_name not in excel.sheet_names:
+            raise MissingSheet(sheet_name)
+        worksheet = excel.book[sheet_name]
+        values = {}
+        for cell in cells:
+            value = worksheet[cell].value
+            values[cell] = int(value) if isinstance(value, float) and value.is_integer() else value
+        df = excel.parse(sheet_name, header=header)
+    return df, values
+
+# Function to load a dataset together with the values of some of its cells (as {'B1': value}), the file is opened once
+# Raises MissingSheet when the workbook has no sheet of that name
+def load_dataset_with_cells(file_name, sheet_name, cells, header=0):
+    path = os.path.join(DATASETS_DIR, file_name)
+    stat = os.stat(path)
+    df, values = _read_sheet_and_cells(path, stat.st_mtime_ns, stat.st_size, sheet_name, header, tuple(cells))
+    return df.copy(), dict(values)
+
+# Function to convert every workbook in the Datasets folder to its columnar copy ahead of time
+def ingest_datasets(headers=(0, None)):
+    converted = []
+    for file_name in sorted(os.listdir(DATASETS_DIR)):
+        if not file_name.endswith('.xlsx') or file_name.startswith('~$'):
+            continue
+        path = os.path.join(DATASETS_DIR, file_name)
+        stat = os.stat(path)
+        for header in headers:
+            manifest = _read_manifest(path, stat.st_mtime_ns, stat.st_size)
+            if manifest is not None and os.path.exists(_sidecar_path(path, 0, header)):
+                continue
+            _convert_workbook(path, stat.st_mtime_ns, stat.st_size, header)
+            converted.append((file_name, header))
+    return converted
+
+
+if __name__ == "__main__":
+    for file_name, header in ingest_datasets():
+        print(f"Converted {file_name} (header={header})")
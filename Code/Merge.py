@@ -0,0 +1,216 @@
+import re
+import copy
+import hashlib
+import threading
+import streamlit as st
+from io import BytesIO
+from pptx import Presentation
+from pptx.opc.constants import CONTENT_TYPE as CT
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import ImagePart
+from pptx.parts.slide import SlidePart
+from Artifacts import inputs_fingerprint
+from Template import template_presentation, current_palette
+
+
+# Layout used for slides whose layout is not found in the merged presentation (Title Only)
+DEFAULT_LAYOUT_INDEX = 5
+
+# Guards the creation of the lock of every assembly
+_assembly_locks_lock = threading.Lock()
+
+# Relationships of a slide that are not carried over (the pages never write speaker notes)
+SKIPPED_RELATIONSHIPS = (RT.NOTES_SLIDE,)
+
+
+# Function to get the layout of the merged presentation matching the layout of a source slide (same position, else same name)
+def _merged_layout(slide, merged_layouts, layouts_by_name):
+    source_layouts = slide.part.package.presentation_part.presentation.slide_layouts
+    source_layout = slide.slide_layout
+    index = source_layouts.index(source_layout)
+    if index < len(merged_layouts) and merged_layouts[index].name == source_layout.name:
+        return merged_layouts[index]
+    return layouts_by_name.get(source_layout.name, merged_layouts[DEFAULT_LAYOUT_INDEX])
+
+# Function to get the images already in a presentation (the logos of the template layouts) by content hash
+def _image_parts(presentation):
+    return {hashlib.sha1(part.blob).hexdigest(): part
+            for part in presentation.part.package.iter_parts() if isinstance(part, ImagePart)}
+
+# Function to add a relationship with a given id to a part, the copied XML still refers to the ids of the source part
+# python-pptx only adds relationships under new ids, so this uses the internals of python-pptx 0.6.23 (_Relationship and
+# _Relationships._rels); python-pptx is pinned in requirements.txt and test_merge.py checks the merged decks
+def _relate(part, rId, reltype, target, is_external=False):
+    relationships = part.rels
+    relationships._rels[rId] = _Relationship(relationships._base_uri, rId, reltype,
+                                             RTM.EXTERNAL if is_external else RTM.INTERNAL, target)
+
+# Function to get the part name template of a part (e.g. '/ppt/charts/chart%d.xml' for '/ppt/charts/chart3.xml')
+def _partname_template(partname):
+    stem = re.sub(r'\d*$', '', partname.filename[:-len(partname.ext) - 1])
+    return f"{partname.baseURI}/{stem}%d.{partname.ext}"
+
+# Function to copy the relationships of a source part to its copy in the merged package, with the parts they point to
+# Layouts are mapped to the layouts of the merged presentation, identical images are stored once (image_parts, by content hash)
+# and any other part (chart, embedded object) is copied under a free part name, once per source part (copies)
+# The target part must already be reachable from the merged presentation, so the part names taken by the copies are seen
+def _copy_relationships(source_part, target_part, package, image_parts, copies, layout=None):
+    for relationship in source_part.rels.values():
+        if relationship.reltype in SKIPPED_RELATIONSHIPS:
+            continue
+        if relationship.is_external:
+            _relate(target_part, relationship.rId, relationship.reltype, relationship.target_ref, is_external=True)
+            continue
+
+        copied = None
+        if relationship.reltype == RT.SLIDE_LAYOUT and layout is not None:
+            part = layout.part
+        elif relationship.reltype == RT.IMAGE:
+            source_image = relationship.target_part
+            digest = hashlib.sha1(source_image.blob).hexdigest()
+            part = image_parts.get(digest)
+            if part is None:
+                part = ImagePart(package.next_image_partname(source_image.partname.ext), source_image.content_type,
+                                 package, source_image.blob)
+                image_parts[digest] = part
+        elif relationship.target_part in copies:
+            part = copies[relationship.target_part]
+        else:
+            copied = relationship.target_part
+            part = Part(package.next_partname(_partname_template(copied.partname)), copied.content_type, package, copied.blob)
+            copies[copied] = part
+        _relate(target_part, relationship.rId, relationship.reltype, part)
+
+        # The parts a copied part refers to are copied once it is reachable
+        if copied is not None:
+            _copy_relationships(copied, part, package, image_parts, copies)
+
+# Function to move the slides of a presentation (XML, relationships and media) to the end of the merged presentation
+# image_parts maps the content hash of every image already in the merged presentation to its part, so identical images are stored once
+# Returns the slide id elements of the new slides
+def _append_slides(merged_presentation, presentation, image_parts):
+    merged_part = merged_presentation.part
+    package = merged_part.package
+    slide_id_list = merged_presentation.slides._sldIdLst
+    # The slide parts are renamed in order first, so the new part names below are free
+    merged_part.rename_slide_parts([slide_id.rId for slide_id in slide_id_list])
+    merged_layouts = list(merged_presentation.slide_layouts)
+    layouts_by_name = {layout.name: layout for layout in merged_layouts}
+
+    # Slide ids only need to be unique, so they are counted from the largest instead of searching the list for every slide
+    next_slide_id = max([slide_id.id for slide_id in slide_id_list], default=255) + 1
+    slide_number = len(slide_id_list)
+    slide_ids = []
+    copies = {}
+
+    for slide in presentation.slides:
+        source_part = slide.part
+        slide_number += 1
+
+        # The slide XML is copied as is, its r:id references stay valid because the relationship ids are kept
+        slide_part = SlidePart(PackURI(f"/ppt/slides/slide{slide_number}.xml"), CT.PML_SLIDE, package,
+                               copy.deepcopy(source_part._element))
+        rId = merged_part.relate_to(slide_part, RT.SLIDE)
+        slide_ids.append(slide_id_list._add_sldId(id=next_slide_id, rId=rId))
+        next_slide_id += 1
+
+        _copy_relationships(source_part, slide_part, package, image_parts, copies,
+                            _merged_layout(slide, merged_layouts, layouts_by_name))
+
+    return slide_ids
+
+# Function to remove slides (given by their slide id elements) from a presentation
+def _remove_slides(merged_presentation, slide_ids):
+    slide_id_list = merged_presentation.slides._sldIdLst
+    for slide_id in slide_ids:
+        slide_id_list.remove(slide_id)
+        # Images only used by the removed slides are no longer reachable, so they are left out when saving
+        merged_presentation.part.drop_rel(slide_id.rId)
+
+# Function to rename the slide parts in the order of the slides, after sections were moved
+# The slide numbers need no update, the ribbons of the template layouts show them through a slide number field
+def number_slides(merged_presentation):
+    slide_id_list = merged_presentation.slides._sldIdLst
+    merged_presentation.part.rename_slide_parts([slide_id.rId for slide_id in slide_id_list])
+
+# Function to merge presentations by moving their slides (XML, relationships and media) into a new presentation
+# The merged presentation starts from the template of the session palette, so the slides find the layouts they were made with
+# Identical images are stored once
+def merge_presentations(*presentations):
+    merged_presentation = template_presentation()
+    image_parts = _image_parts(merged_presentation)
+    for presentation in presentations:
+        _append_slides(merged_presentation, presentation, image_parts)
+    number_slides(merged_presentation)
+    return merged_presentation
+
+# Function to keep a presentation made of sections up to date, only the slides of the sections whose inputs changed are replaced
+# sections is a list of (name, inputs, build) where build() returns the presentation of the section (BytesIO or bytes)
+# The last merged presentation and the fingerprint of every section are kept in the session under key
+# Returns the saved presentation (BytesIO)
+# Builds running in the background for several pages of the session update and save the presentation one after the other
+def assemble_presentation(key, sections, progress=None):
+    with _assembly_locks_lock:
+        lock = st.session_state.setdefault(f"{key}_assembly_lock", threading.Lock())
+    with lock:
+        merged_presentation = _assemble_presentation(key, sections, progress)
+        if progress is not None:
+            progress(0.85, "Saving the presentation...")
+        merged_presentation_bytesio = BytesIO()
+        merged_presentation.save(merged_presentation_bytesio)
+        merged_presentation_bytesio.seek(0)
+        return merged_presentation_bytesio
+
+# Function to update the sections of the presentation kept under key (see assemble_presentation)
+def _assemble_presentation(key, sections, progress):
+    palette = current_palette()
+    assembly = st.session_state.get(f"{key}_assembly")
+    if assembly is None or assembly['palette'] != palette:
+        # A new palette changes the template, so every section is rebuilt on it
+        # sections holds [name, fingerprint, slide id elements] of every section in the order of the slides
+        merged_presentation = template_presentation(palette)
+        assembly = {'palette': palette, 'presentation': merged_presentation, 'sections': [],
+                    'image_parts': _image_parts(merged_presentation)}
+        st.session_state[f"{key}_assembly"] = assembly
+    merged_presentation = assembly['presentation']
+    kept_sections = assembly['sections']
+
+    for position, (name, inputs, build) in enumerate(sections):
+        fingerprint = inputs_fingerprint(*inputs)
+        if position < len(kept_sections) and kept_sections[position][:2] == [name, fingerprint]:
+            continue
+
+        # The slides of the old version of the section are removed first, so a stopped build leaves no stale slides behind
+        if position < len(kept_sections) and kept_sections[position][0] == name:
+            _remove_slides(merged_presentation, kept_sections[position][2])
+            kept_sections[position] = [name, None, []]
+            # Images only used by the removed slides are left out when saving and their part names can be taken again
+            assembly['image_parts'] = _image_parts(merged_presentation)
+        else:
+            kept_sections.insert(position, [name, None, []])
+
+        if progress is not None:
+            progress(position / len(sections), f"Creating the {name} slides...")
+        data = build()
+        section = Presentation(BytesIO(data) if isinstance(data, bytes) else data)
+
+        # The new slides are appended, then moved to the place of the section
+        slide_ids = _append_slides(merged_presentation, section, assembly['image_parts'])
+        first_slide = sum(len(kept[2]) for kept in kept_sections[:position])
+        slide_id_list = merged_presentation.slides._sldIdLst
+        for offset, slide_id in enumerate(slide_ids):
+            slide_id_list.insert(first_slide + offset, slide_id)
+        kept_sections[position] = [name, fingerprint, slide_ids]
+
+    # Sections the caller no longer asks for (e.g. a page merging fewer sections) are removed
+    for name, fingerprint, slide_ids in kept_sections[len(sections):]:
+        _remove_slides(merged_presentation, slide_ids)
+    if len(kept_sections) > len(sections):
+        assembly['image_parts'] = _image_parts(merged_presentation)
+    del kept_sections[len(sections):]
+
+    number_slides(merged_presentation)
+    return merged_presentation
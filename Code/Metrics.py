@@ -0,0 +1,545 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from Workers import get_process_pool
+from Stats import betainc, chi2_sf
+
+
+# Columns of the Gini table shown on the Gini page and in its PowerPoint slide
+GINI_COLUMNS = ['PD Bucket', 'Good', 'Bad', 'Total', 'Bad Rate', 'Cum Bad', 'Cum Total',
+                '% Cum Bad', '% Cum Total', 'Gini Area', 'Perfect Curve', 'Perfect Curve_1']
+
+
+# Function to turn scores, default flags and optional sample weights into float arrays
+def _as_arrays(scores, defaults, weights=None):
+    scores = np.asarray(scores, dtype=float)
+    defaults = np.asarray(defaults).astype(bool)
+    if weights is None:
+        weights = np.ones(len(scores))
+    else:
+        weights = np.asarray(weights, dtype=float)
+    if not (len(scores) == len(defaults) == len(weights)):
+        raise ValueError("scores, defaults and weights must have the same length")
+    return scores, defaults, weights
+
+# Function to add up the weighted goods and bads of every distinct score, riskiest (highest) score first
+def score_counts(scores, defaults, weights=None):
+    scores, defaults, weights = _as_arrays(scores, defaults, weights)
+
+    # Sorting the distinct scores is the only O(n log n) step, the counts are a single bincount
+    values, inverse = np.unique(-scores, return_inverse=True)
+    bads = np.bincount(inverse, weights=weights * defaults, minlength=len(values))
+    goods = np.bincount(inverse, weights=weights * ~defaults, minlength=len(values))
+    return -values, goods, bads
+
+# Function to split scores into buckets of equal weight, bucket 1 holding the riskiest (highest) scores
+def bucket_scores(scores, n_buckets=10, weights=None):
+    scores, _, weights = _as_arrays(scores, np.zeros(len(scores)), weights)
+
+    risk = -scores
+    order = np.argsort(risk, kind='stable')
+    share = np.cumsum(weights[order]) / weights.sum()
+
+    # Cut at the score reached by each quantile, so tied scores always land in the same bucket
+    cut_positions = np.searchsorted(share, np.arange(1, n_buckets) / n_buckets)
+    cuts = risk[order][np.minimum(cut_positions, len(order) - 1)]
+    return 1 + np.searchsorted(cuts, risk, side='left')
+
+# Function to compute the AUC as the weighted Mann-Whitney rank sum of the bads (ties count one half)
+def auc_from_counts(goods, bads):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+
+    # Groups are ordered riskiest first: a bad outranks every good of a later group and half of its own
+    goods_after = goods.sum() - np.cumsum(goods)
+    return float((bads * (goods_after + 0.5 * goods)).sum() / (goods.sum() * bads.sum()))
+
+# Function to compute the CAP (Lorenz) curve points and the Gini of grouped counts
+def gini_curve(goods, bads):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+    totals = goods + bads
+
+    # Curve points start at the origin and end at (1, 1)
+    x = np.concatenate([[0.0], np.cumsum(totals) / totals.sum()])
+    y = np.concatenate([[0.0], np.cumsum(bads) / bads.sum()])
+
+    auc = auc_from_counts(goods, bads)
+    return {'x': x, 'y': y, 'auc': auc, 'gini': 2 * auc - 1, 'bad_rate': bads.sum() / totals.sum()}
+
+# Function to compute the Gini of loan level scores (higher score = riskier) with optional sample weights
+def gini_from_scores(scores, defaults, weights=None):
+    _, goods, bads = score_counts(scores, defaults, weights)
+    return gini_curve(goods, bads)
+
+# Function to build the Gini table (one row per bucket, a Total row and a Gini row) from grouped counts
+def gini_table(goods, bads, labels):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+    totals = goods + bads
+    n = len(totals)
+    curve = gini_curve(goods, bads)
+    x, y = curve['x'], curve['y']
+    total_goods, total_bads, total = goods.sum(), bads.sum(), totals.sum()
+
+    # Area of the trapezoid under the CAP curve between each bucket's start and end point
+    area = (x[1:] - x[:-1]) * (y[1:] + y[:-1]) / 2
+
+    # Perfect model: all bads first, then the goods in bucket order
+    # Like '% Cum Total', each row holds the point where its bucket starts; the workbooks' own Perfect Curve columns are not
+    # reproduced, they leave out the goods of the first bucket and are laid out differently on the current and development sheets
+    perfect_x = np.concatenate([[0.0, total_bads / total], (total_bads + np.cumsum(goods)[:-1]) / total])[:n]
+    perfect_y = np.concatenate([[0.0], np.ones(n - 1)])
+
+    cum_bads = np.cumsum(bads)
+    cum_totals = np.cumsum(totals)
+
+    table = pd.DataFrame({
+        'PD Bucket': list(labels),
+        'Good': goods,
+        'Bad': bads,
+        'Total': totals,
+        'Bad Rate': bads / totals,
+        'Cum Bad': cum_bads,
+        'Cum Total': cum_totals,
+        '% Cum Bad': y[:-1],
+        '% Cum Total': x[:-1],
+        'Gini Area': area,
+        'Perfect Curve': perfect_x,
+        'Perfect Curve_1': perfect_y,
+    })
+
+    # The Total row adds up every column like the monitoring workbook does
+    total_row = {
+        'PD Bucket': 'Total', 'Good': total_goods, 'Bad': total_bads, 'Total': total,
+        'Bad Rate': total_bads / total, 'Cum Bad': cum_bads.sum(), 'Cum Total': cum_totals.sum(),
+        '% Cum Bad': 1.0, '% Cum Total': 1.0, 'Gini Area': area.sum(),
+        'Perfect Curve': 1.0, 'Perfect Curve_1': 1.0,
+    }
+    gini_row = {column: np.nan for column in GINI_COLUMNS}
+    gini_row.update({'% Cum Total': 'Gini', 'Gini Area': curve['gini']})
+
+    table = pd.concat([table.astype(object), pd.DataFrame([total_row, gini_row]).astype(object)], ignore_index=True)
+    return table[GINI_COLUMNS].infer_objects()
+
+# Function to build the Gini table straight from loan level scores, either per distinct score or per score bucket
+def gini_table_from_scores(scores, defaults, weights=None, n_buckets=None):
+    if n_buckets is not None:
+        scores = -bucket_scores(scores, n_buckets, weights)
+    values, goods, bads = score_counts(scores, defaults, weights)
+    labels = (-values).astype(int) if n_buckets is not None else values
+    return gini_table(goods, bads, labels)
+
+# Function to compare the Gini of the current sample against the development sample
+def compare_gini(dev_curve, current_curve):
+    dev_gini = dev_curve['gini']
+    current_gini = current_curve['gini']
+    return {
+        'dev_gini': dev_gini,
+        'current_gini': current_gini,
+        'absolute_change': current_gini - dev_gini,
+        # Relative deterioration of the discriminatory power since development
+        'relative_change': (current_gini - dev_gini) / dev_gini if dev_gini else np.nan,
+    }
+
+# Function to read the score, default and weight columns of a scored population file chunk by chunk
+def iter_score_chunks(path, score_column='score', default_column='default', weight_column=None, chunksize=1_000_000):
+    columns = [score_column, default_column] + ([weight_column] if weight_column else [])
+    if path.endswith('.parquet'):
+        batches = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns))
+    else:
+        batches = pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+    for chunk in batches:
+        scores = chunk[score_column].to_numpy(dtype=float)
+        defaults = chunk[default_column].to_numpy(dtype=float)
+        weights = chunk[weight_column].to_numpy(dtype=float) if weight_column else np.ones(len(chunk))
+        # Records without a score or an outcome cannot be ranked
+        keep = ~(np.isnan(scores) | np.isnan(defaults))
+        yield scores[keep], defaults[keep] > 0, weights[keep]
+
+# Function to stream a scored population file into a fine histogram of goods and bads, riskiest (highest) score first
+def score_histogram(path, score_column='score', default_column='default', weight_column=None,
+                    bins=100_000, score_range=None, chunksize=1_000_000):
+    def chunks():
+        return iter_score_chunks(path, score_column, default_column, weight_column, chunksize)
+
+    if score_range is None:
+        # Extra pass to find the score range when it is not known up front (PDs would use (0, 1))
+        low, high = np.inf, -np.inf
+        for scores, _, _ in chunks():
+            if len(scores):
+                low, high = min(low, scores.min()), max(high, scores.max())
+        score_range = (low, high) if low < high else (low - 0.5, low + 0.5)
+
+    low, high = score_range
+    scale = bins / (high - low)
+    goods = np.zeros(bins)
+    bads = np.zeros(bins)
+    for scores, defaults, weights in chunks():
+        index = np.clip(((scores - low) * scale).astype(np.int64), 0, bins - 1)
+        bads += np.bincount(index, weights=weights * defaults, minlength=bins)
+        goods += np.bincount(index, weights=weights * ~defaults, minlength=bins)
+
+    edges = np.linspace(low, high, bins + 1)
+    return edges[::-1], goods[::-1], bads[::-1]
+
+# Function to compute the Gini of a score histogram together with the largest possible binning error
+def gini_from_histogram(goods, bads):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+    occupied = (goods + bads) > 0
+    curve = gini_curve(goods[occupied], bads[occupied])
+
+    # Pairs of a good and a bad in the same bin count one half; their true contribution is 0 or 1,
+    # so the AUC is off by at most 0.5 * sum(g_b * b_b) / (G * B) and the Gini by twice that
+    auc_error = 0.5 * (goods * bads).sum() / (goods.sum() * bads.sum())
+    curve.update({'auc_error': auc_error, 'gini_error': 2 * auc_error})
+    return curve
+
+# Function to merge consecutive histogram bins into buckets of about equal weight without splitting a bin
+def rebucket_counts(goods, bads, n_buckets=10):
+    goods = np.asarray(goods, dtype=float)
+    bads = np.asarray(bads, dtype=float)
+    totals = goods + bads
+    share = np.cumsum(totals) / totals.sum()
+
+    # A bin belongs to the bucket its cumulative share ends in
+    bucket = np.minimum(np.ceil(share * n_buckets - 1e-12).astype(np.int64), n_buckets)
+    bucket = np.maximum(bucket, 1)
+    bucket_goods = np.bincount(bucket, weights=goods, minlength=n_buckets + 1)[1:]
+    bucket_bads = np.bincount(bucket, weights=bads, minlength=n_buckets + 1)[1:]
+    present = (bucket_goods + bucket_bads) > 0
+    return np.arange(1, n_buckets + 1)[present], bucket_goods[present], bucket_bads[present]
+
+# Function to keep at most max_points evenly spaced points of a curve (end points included) for plotting
+def thin_curve(x, y, max_points=2000):
+    if len(x) <= max_points:
+        return x, y
+    keep = np.unique(np.linspace(0, len(x) - 1, max_points).round().astype(np.int64))
+    return x[keep], y[keep]
+
+# Function to compute the PSI of every period against the expected (development) distribution from bin counts
+def psi_from_counts(expected_counts, actual_counts, epsilon=1e-4):
+    expected = np.asarray(expected_counts, dtype=float)
+    actual = np.asarray(actual_counts, dtype=float)
+
+    # Shares per bin along the last axis; empty bins get a small share so the log stays finite
+    expected = np.maximum(expected / expected.sum(axis=-1, keepdims=True), epsilon)
+    actual = np.maximum(actual / actual.sum(axis=-1, keepdims=True), epsilon)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=-1)
+
+# Function to build the wide PSI table (bucket shares, PSI, per-bucket contributions and predicted PD) for all periods at once
+def psi_table(expected_counts, period_counts, periods, labels=None, predicted_pd=None, dev_pd=None, epsilon=1e-4):
+    expected = np.asarray(expected_counts, dtype=float)
+    actual = np.asarray(period_counts, dtype=float)
+    n_bins = len(expected)
+    labels = list(range(1, n_bins + 1)) if labels is None else list(labels)
+
+    # Shares of every bin: expected is (bins,), actual is (periods, bins) and broadcasts against it
+    expected_share = expected / expected.sum()
+    actual_share = actual / actual.sum(axis=1, keepdims=True)
+    expected_safe = np.maximum(expected_share, epsilon)
+    actual_safe = np.maximum(actual_share, epsilon)
+    contributions = (actual_safe - expected_safe) * np.log(actual_safe / expected_safe)
+
+    # Rows: one share per bin, the PSI, one contribution per bin and the predicted PD
+    values = np.full((2 * n_bins + 2, len(periods)), np.nan)
+    values[:n_bins] = actual_share.T
+    values[n_bins] = contributions.sum(axis=1)
+    values[n_bins + 1:2 * n_bins + 1] = contributions.T
+    if predicted_pd is not None:
+        values[-1] = predicted_pd
+
+    dev = np.full(2 * n_bins + 2, np.nan)
+    dev[:n_bins] = expected_share
+    if dev_pd is not None:
+        dev[-1] = dev_pd
+
+    table = pd.DataFrame(values, columns=list(periods))
+    table.insert(0, 'Dev', dev)
+    table.insert(0, 'PD Bucket', labels + ['PSI'] + [np.nan] * n_bins + ['Predicted PD'])
+    return table
+
+# Function to compute the CSI of one characteristic for every period (one task of the CSI batch engine)
+def _csi_task(task):
+    name, expected_counts, period_counts = task
+    return name, psi_from_counts(expected_counts, period_counts)
+
+# Function to compute the CSI of every characteristic and period, one process pool task per characteristic
+def csi_batch(frequencies, dev_label='Dev', workers=None):
+    # Long table (characteristic, attribute, date_ref, count) to one attribute x date_ref matrix per characteristic
+    wide = frequencies.pivot_table(index=['characteristic', 'attribute'], columns='date_ref',
+                                   values='count', aggfunc='sum', fill_value=0)
+    periods = sorted(column for column in wide.columns if column != dev_label)
+    tasks = [(name, group[dev_label].to_numpy(dtype=float), group[periods].to_numpy(dtype=float).T)
+             for name, group in wide.groupby(level='characteristic', sort=False)]
+
+    if workers == 0 or len(tasks) <= 1:
+        results = list(map(_csi_task, tasks))
+    else:
+        results = list(get_process_pool(workers).map(_csi_task, tasks))
+
+    return pd.DataFrame([csi for _, csi in results], index=[name for name, _ in results], columns=periods)
+
+# Function to rank the characteristics by their latest CSI together with a summary of their drift history
+def csi_ranking(csi, amber=0.1, red=0.25):
+    latest = csi.iloc[:, -1]
+    previous = csi.iloc[:, -2] if csi.shape[1] > 1 else pd.Series(np.nan, index=csi.index)
+    ranking = pd.DataFrame({
+        'Characteristic': csi.index,
+        'Latest CSI': latest.to_numpy(),
+        'Previous CSI': previous.to_numpy(),
+        'Change': (latest - previous).to_numpy(),
+        'Max CSI': csi.max(axis=1).to_numpy(),
+        'Mean CSI': csi.mean(axis=1).to_numpy(),
+        f'Periods > {amber}': (csi > amber).sum(axis=1).to_numpy(),
+        f'Periods > {red}': (csi > red).sum(axis=1).to_numpy(),
+    })
+    ranking = ranking.sort_values('Latest CSI', ascending=False, kind='stable').reset_index(drop=True)
+    ranking.insert(0, 'Rank', np.arange(1, len(ranking) + 1))
+    return ranking
+
+# Function to pivot the PERFORMANCE HISTORICAL layout (one row per date_ref and bin) into date_ref x bin matrices
+def performance_matrices(performance, columns=('sum', 'bads', 'meanpd'), bins=None):
+    periods = np.sort(performance['date_ref'].unique())
+    if bins is None:
+        bins = np.sort(performance['bin'].unique())
+    matrices = {}
+    for column in columns:
+        wide = performance.pivot_table(index='date_ref', columns='bin', values=column, aggfunc='sum')
+        matrices[column] = wide.reindex(index=periods, columns=bins).fillna(0).to_numpy(dtype=float)
+    return periods, bins, matrices
+
+# Function to compute the KS statistic of every date_ref at once (bins ordered riskiest first)
+def ks_summary(performance):
+    periods, bins, matrices = performance_matrices(performance, ('sum', 'bads'))
+    totals = matrices['sum']
+    bads = matrices['bads']
+    goods = totals - bads
+
+    # Largest distance between the cumulative bad and good distributions of each period
+    distance = np.abs(np.cumsum(bads, axis=1) / bads.sum(axis=1, keepdims=True)
+                      - np.cumsum(goods, axis=1) / goods.sum(axis=1, keepdims=True))
+    return pd.DataFrame({
+        'date_ref': periods,
+        'Total': totals.sum(axis=1),
+        'Bads': bads.sum(axis=1),
+        'Goods': goods.sum(axis=1),
+        'Bad Rate': bads.sum(axis=1) / totals.sum(axis=1),
+        'KS': distance.max(axis=1),
+        'KS Bucket': bins[distance.argmax(axis=1)] + 1,
+    })
+
+# Function to build the KS table of one date_ref with the cumulative distributions per PD bucket
+def ks_bucket_table(performance, period):
+    rows = performance[performance['date_ref'].astype(str) == str(period)].sort_values('bin')
+    totals = rows['sum'].to_numpy(dtype=float)
+    bads = rows['bads'].to_numpy(dtype=float)
+    goods = totals - bads
+    cum_bad = np.cumsum(bads) / bads.sum()
+    cum_good = np.cumsum(goods) / goods.sum()
+    return pd.DataFrame({
+        'PD Bucket': rows['bin'].to_numpy() + 1,
+        'Total': totals,
+        'Bad': bads,
+        'Good': goods,
+        'Bad Rate': bads / totals,
+        '% Cum Bad': cum_bad,
+        '% Cum Good': cum_good,
+        'Difference': np.abs(cum_bad - cum_good),
+    })
+
+# Function to find the rank ordering breaks of every date_ref and PD bucket at once
+def rank_ordering_table(performance, descending=True):
+    periods, bins, matrices = performance_matrices(performance, ('sum', 'bads'))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bad_rate = matrices['bads'] / matrices['sum']
+
+    # Bad rates should fall from the riskiest bucket to the safest; a break is a bucket riskier than the one before it
+    step = np.diff(bad_rate, axis=1)
+    breaks = np.zeros(bad_rate.shape, dtype=bool)
+    breaks[:, 1:] = step > 0 if descending else step < 0
+
+    labels = [str(b + 1) for b in bins]
+    table = pd.DataFrame(bad_rate, columns=labels)
+    table.insert(0, 'date_ref', periods.astype(str))
+    table['Breaks'] = breaks.sum(axis=1)
+    table['Rank Ordering'] = np.where(breaks.any(axis=1), 'Broken', 'Monotonic')
+
+    # Last row: in how many periods each bucket breaks the rank ordering
+    totals = pd.DataFrame([['Breaks'] + [int(n) for n in breaks.sum(axis=0)] + [int(breaks.sum()), '']], columns=table.columns, dtype=object)
+    breaks = np.vstack([breaks, np.zeros(len(bins), dtype=bool)])
+    return pd.concat([table, totals], ignore_index=True), pd.DataFrame(breaks, columns=labels)
+
+# Columns accumulated by the DR vs PD engine; pd is the account weighted PD (meanpd x sum) so that windows add up
+PERFORMANCE_TOTALS = ('sum', 'bads', 'pd', 'enr')
+
+# Function to turn the performance history of some months into date_ref x bin matrices of the accumulated columns
+def _performance_totals(performance, bins=None):
+    performance = performance.assign(pd=performance['meanpd'] * performance['sum'])
+    return performance_matrices(performance, PERFORMANCE_TOTALS, bins)
+
+# Function to fingerprint the performance rows accumulated in the running totals (in date_ref and bin order)
+def _performance_fingerprint(performance):
+    rows = performance[['date_ref', 'bin', 'sum', 'bads', 'meanpd', 'enr']].sort_values(['date_ref', 'bin'], kind='mergesort')
+    return hashlib.sha1(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()
+
+# Function to build the running totals of every date_ref and bin (row t holds the totals of the first t months)
+def performance_cumsums(performance):
+    periods, bins, matrices = _performance_totals(performance)
+    cum = {column: np.vstack([np.zeros((1, len(bins))), np.cumsum(values, axis=0)]) for column, values in matrices.items()}
+    return {'periods': periods, 'bins': bins, 'cum': cum, 'fingerprint': _performance_fingerprint(performance)}
+
+# Function to add the months after the last accumulated date_ref, starting from the last running total
+def append_performance_months(state, performance):
+    new = performance[performance['date_ref'] > state['periods'][-1]]
+    if new.empty:
+        return state
+    periods, _, matrices = _performance_totals(new, state['bins'])
+    cum = {column: np.vstack([values, values[-1] + np.cumsum(matrices[column], axis=0)])
+           for column, values in state['cum'].items()}
+    return {'periods': np.concatenate([state['periods'], periods]), 'bins': state['bins'], 'cum': cum,
+            'fingerprint': _performance_fingerprint(performance)}
+
+# Function to bring the running totals up to date: new months are appended, anything else (restated months, new bins) is rebuilt
+# The months already accumulated are checked against the fingerprint of their rows, so a restated month is never missed
+def update_performance_cumsums(state, performance):
+    periods = np.sort(performance['date_ref'].unique())
+    if (state is None or len(periods) < len(state['periods'])
+            or not np.array_equal(periods[:len(state['periods'])], state['periods'])
+            or not np.isin(performance['bin'].unique(), state['bins']).all()
+            or _performance_fingerprint(performance[performance['date_ref'] <= state['periods'][-1]]) != state.get('fingerprint')):
+        return performance_cumsums(performance)
+    return append_performance_months(state, performance)
+
+# Function to get the totals of every window of up to `window` months ending at each date_ref (None = single month)
+def window_totals(state, window=None):
+    n = len(state['periods'])
+    end = np.arange(1, n + 1)
+    start = end - 1 if window is None else np.maximum(end - window, 0)
+
+    # Difference of two running totals: each window costs the same whatever its length
+    totals = {column: cum[end] - cum[start] for column, cum in state['cum'].items()}
+    return totals, end - start
+
+# Function to build the observed default rate against the mean PD of every date_ref, overall or per PD bucket
+def dr_vs_pd_table(state, window=None, by_bin=False):
+    totals, months = window_totals(state, window)
+    if not by_bin:
+        totals = {column: values.sum(axis=1) for column, values in totals.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        default_rate = totals['bads'] / totals['sum']
+        mean_pd = totals['pd'] / totals['sum']
+
+    if by_bin:
+        # Long layout: one row per date_ref and PD bucket
+        periods = np.repeat(state['periods'].astype(str), len(state['bins']))
+        table = pd.DataFrame({
+            'date_ref': periods,
+            'PD Bucket': np.tile(state['bins'] + 1, len(state['periods'])),
+            'Accounts': totals['sum'].ravel(),
+            'Bads': totals['bads'].ravel(),
+            'DR': default_rate.ravel(),
+            'PD': mean_pd.ravel(),
+        })
+    else:
+        table = pd.DataFrame({
+            'date_ref': state['periods'].astype(str),
+            'Accounts': totals['sum'],
+            'Bads': totals['bads'],
+            'DR': default_rate,
+            'PD': mean_pd,
+            'ENR': totals['enr'],
+        })
+    table['DR - PD'] = table['DR'] - table['PD']
+    table['DR / PD'] = table['DR'] / table['PD']
+    if window is not None:
+        table.insert(1, 'Months', np.repeat(months, len(state['bins'])) if by_bin else months)
+    return table
+
+# Function to add the expected PD of the months without observed defaults yet (STABILITY - EXPECTED PD) to the time series
+def extend_with_expected_pd(table, expected):
+    expected = expected[~expected['date_ref'].astype(str).isin(table['date_ref'])]
+    future = pd.DataFrame({
+        'date_ref': expected['date_ref'].astype(str).to_numpy(),
+        'Accounts': expected['sum'].to_numpy(dtype=float),
+        'Bads': np.nan,
+        'DR': np.nan,
+        'PD': expected['meanpd'].to_numpy(dtype=float),
+        'ENR': expected['enr'].to_numpy(dtype=float),
+    })
+    return pd.concat([table, future], ignore_index=True).reindex(columns=table.columns)
+
+# Function to run the binomial, Jeffreys and Hosmer-Lemeshow calibration tests of every PD bucket (last axis) and period at once
+def calibration_tests(bads, totals, pd_mean, confidence=0.95):
+    bads, totals, pd_mean = np.broadcast_arrays(np.asarray(bads, dtype=float), np.asarray(totals, dtype=float),
+                                                np.asarray(pd_mean, dtype=float))
+    observed = totals > 0
+    n = np.where(observed, totals, 1)
+    # Defaults can never exceed the accounts of a bucket (keeps the beta arguments valid on inconsistent data)
+    d = np.clip(np.where(observed, bads, 0), 0, n)
+    p = np.clip(pd_mean, 1e-12, 1 - 1e-12)
+
+    # One-sided tests of the PD being too low: P(X >= d) under the binomial and P(PD >= DR) under the Jeffreys posterior
+    binomial = np.where(d > 0, betainc(np.maximum(d, 1), n - np.maximum(d, 1) + 1, p), 1.0)
+    jeffreys = betainc(d + 0.5, n - d + 0.5, p)
+
+    # Portfolio Hosmer-Lemeshow statistic over the buckets, one degree of freedom per observed bucket
+    expected = n * p
+    hl_statistic = np.where(observed, (d - expected) ** 2 / (expected * (1 - p)), 0).sum(axis=-1)
+    hl_df = observed.sum(axis=-1)
+    hl_p_value = chi2_sf(hl_statistic, np.maximum(hl_df, 1))
+
+    alpha = 1 - confidence
+    return {
+        'binomial_p_value': np.where(observed, binomial, np.nan),
+        'binomial_pass': ~observed | (binomial >= alpha),
+        'jeffreys_p_value': np.where(observed, jeffreys, np.nan),
+        'jeffreys_pass': ~observed | (jeffreys >= alpha),
+        'hl_statistic': hl_statistic,
+        'hl_df': hl_df,
+        'hl_p_value': hl_p_value,
+        'hl_pass': hl_p_value >= alpha,
+    }
+
+# Function to build the calibration test table of one sample (one row per PD bucket and an Overall row)
+def calibration_test_table(buckets, bads, totals, pd_mean, confidence=0.95):
+    bads = np.asarray(bads, dtype=float)
+    totals = np.asarray(totals, dtype=float)
+    pd_mean = np.asarray(pd_mean, dtype=float)
+
+    # The Overall row tests the portfolio default rate against the account weighted PD
+    all_bads = np.append(bads, bads.sum())
+    all_totals = np.append(totals, totals.sum())
+    all_pd = np.append(pd_mean, (pd_mean * totals).sum() / totals.sum())
+    per_bucket = calibration_tests(all_bads[:, None], all_totals[:, None], all_pd[:, None], confidence)
+    portfolio = calibration_tests(bads, totals, pd_mean, confidence)
+
+    table = pd.DataFrame({
+        'Bucket': list(buckets) + ['Overall'],
+        'Total': all_totals,
+        'Bads': all_bads,
+        'DR': all_bads / all_totals,
+        'PD': all_pd,
+        'Binomial p-value': per_bucket['binomial_p_value'][:, 0],
+        'Binomial': np.where(per_bucket['binomial_pass'][:, 0], 'Pass', 'Fail'),
+        'Jeffreys p-value': per_bucket['jeffreys_p_value'][:, 0],
+        'Jeffreys': np.where(per_bucket['jeffreys_pass'][:, 0], 'Pass', 'Fail'),
+    })
+    hosmer_lemeshow = {key[3:]: portfolio[key].item() for key in ('hl_statistic', 'hl_df', 'hl_p_value', 'hl_pass')}
+    return table, hosmer_lemeshow
+
+# Function to summarise the calibration tests of every date_ref of the performance history in a single call
+def calibration_test_history(performance, confidence=0.95):
+    periods, bins, matrices = performance_matrices(performance, ('sum', 'bads', 'meanpd'))
+    tests = calibration_tests(matrices['bads'], matrices['sum'], matrices['meanpd'], confidence)
+    return pd.DataFrame({
+        'date_ref': periods.astype(str),
+        'Binomial Fails': (~tests['binomial_pass']).sum(axis=1),
+        'Jeffreys Fails': (~tests['jeffreys_pass']).sum(axis=1),
+        'HL Statistic': tests['hl_statistic'],
+        'HL p-value': tests['hl_p_value'],
+        'Hosmer-Lemeshow': np.where(tests['hl_pass'], 'Pass', 'Fail'),
+    })
@@ -2,12 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import plotly.io as pio
 import io
 import os 
 import html
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
 from pptx import Presentation
@@ -15,118 +12,25 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from streamlit_modal import Modal
 from io import BytesIO
-import base64
-import pickle
 from gini import create_ppt_download_button_gini
 from Calibration import create_ppt_download_button_calibration
+from Loader import load_dataset
+from Bootstrap import bootstrap_intervals, format_interval
+from Tables import show_table, table_to_excel, rag_styles, styles_on_rows
+from Thresholds import load_thresholds, save_thresholds
+from Metrics import psi_table
+from Artifacts import artifact_url, file_url, lazy_download, memoize_presentation
+from Merge import assemble_presentation
+from Report import add_title_slide, add_content_slide
+from Template import template_presentation, add_styled_table
+from Charts import figures_png_future, png_bytes
 
 
 # Function to load a PowerPoint presentation from BytesIO
 def load_presentation_from_bytesio(presentation_bytesio):
     return Presentation(presentation_bytesio)
 
-# Function to apply title styling
-def style_title(title_shape):
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # Default color black
-
-# Function to apply title styling and background color
-def set_slide_background_and_title_style(slide, title_shape, slide_index):
-    
-    # Create presentation object
-    prs = Presentation()
-    
-    # Set background color
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    
-    #Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position 
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-
-    # Apply title styling
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
             
-            
-# Function to clone shapes (including GraphicFrame and pictures)
-def clone_shape(original_shape, merged_slide):
-    if original_shape.shape_type == 14:  # Placeholder
-        ph = original_shape.placeholder_format
-        merged_slide.placeholders[ph.idx].text = original_shape.text
-    elif original_shape.shape_type == 13:  # Picture
-        image_stream = BytesIO(original_shape.image.blob)
-        left = original_shape.left
-        top = original_shape.top
-        width = original_shape.width
-        height = original_shape.height
-        merged_slide.shapes.add_picture(image_stream, left, top, width, height)
-    else:  # Other shapes (including GraphicFrame)
-        merged_shape = original_shape._element
-        merged_slide.shapes._spTree.append(merged_shape)
-
 # Function to highlight Gini values based on user-defined thresholds
 def highlight_gini_PSI(val, thresholds_psi):
     try:
@@ -146,6 +50,13 @@ def highlight_gini_PSI(val, thresholds_psi):
         color = 'white'
     return f'background-color: {color}'
 
+# Function to highlight a whole column of PSI values at once (same bands as highlight_gini_PSI, blanks stay white)
+def highlight_gini_PSI_column(values, thresholds_psi):
+    val = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return rag_styles(val <= thresholds_psi['green_psi']['value'],
+                      (thresholds_psi['amber_psi']['lower'] < val) & (val <= thresholds_psi['amber_psi']['upper']),
+                      val > thresholds_psi['red_psi']['value'])
+
 # # Function to create an Excel file with highlighted cells
 # def to_excel_with_highlights_PSI(df, thresholds_psi):
 #     output = io.BytesIO()
@@ -182,209 +93,17 @@ def highlight_gini_PSI(val, thresholds_psi):
 #     #st.session_state.psi_workbook_data = output.getvalue()
 #     return output.getvalue()
 
-# Function to add a slide with the ribbon and logo
-def ppt_ribbon_and_logo(slide, slide_index):
-    # Create presentation object
-    prs = Presentation()
-    # Determine slide dimensions
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    # Calculate ribbon dimensions
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-
-    # Calculate positions for ribbons
-    ribbon_left = Inches(0)
-    ribbon_top = slide_height - ribbon_height
-
-    # Add the first half of the ribbon (amber)
-    shape_amber = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        fill_amber.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber color
-    else:
-        fill_amber.fore_color.rgb = RGBColor(255, 191, 0)  # Amber color
 
-    line_amber = shape_amber.line
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        line_amber.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber outline color
-    else:
-        line_amber.color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    # Add text to the amber ribbon
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_1' in st.session_state:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_1[1:])  # Black text
-    else:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)  # Black text
-
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_2' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
+@memoize_presentation
+def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, graph_comment, intervals=None):
+    prs = template_presentation()
 
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_color_2' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    # Add slide number
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    slide_number_box = slide.shapes.add_textbox(half_ribbon_width, ribbon_top, half_ribbon_width, ribbon_height)
-    text_frame = slide_number_box.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_2' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_2[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.15)  # Adjust position as needed
-    logo_height = Inches(0.45)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-
-
-def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, graph_comment):
-    prs = Presentation() 
-    
-    slide_index = 1  # To keep track of the slide index
-    
-    # Title slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    # Set the background color to the slide
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    shapes = slide.shapes
-    title_shape = shapes.title
-    shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "PL - Scorecard Model PSI"
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
-            
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD.jpg')  # Replace with your actual file path
-    logo_left = Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.25)  # Adjust position as needed
-    logo_height = Inches(0.6)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-            
-    # Add slide number to title slide        
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])
-    else:
-        p.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-    slide_index += 1
+    # Title slide (background, logo, ribbon and title style come from the template)
+    add_title_slide(prs, "PL - Scorecard Model PSI")
 
     # Data Table slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide = add_content_slide(prs, "PSI calculation")
     shapes = slide.shapes
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-
-    # Add and style title
-    title_shape = shapes.title
-    title_shape.text = "PSI calculation"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Determine table size and position
     left = Inches(0.5)
@@ -393,11 +112,7 @@ def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, gra
     height = Inches(5.0)  # Adjusted to fit the table within the slide
 
     rows, cols = df.shape
-    table = shapes.add_table(rows + 1, cols, left, top, width, height).table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide, rows + 1, cols, left, top, width, height)
 
     # Set fixed row height
     fixed_row_height = Inches(0)  # Adjust the height as needed
@@ -406,26 +121,15 @@ def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, gra
     for col_idx, col_name in enumerate(df.columns):
         cell = table.cell(0, col_idx)
         cell.text = col_name
-        cell.fill.solid()
-        # Check if color is in session state; if not, use default color
-        if 'row_bg_color' in st.session_state:
-            cell.fill.fore_color.rgb = RGBColor.from_string(st.session_state.row_bg_color[1:]) # Teal
-        else:
-            cell.fill.fore_color.rgb = RGBColor(0x00, 0x80, 0x80) # Teal
         for paragraph in cell.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(8)
-                # Check if color is in session state; if not, use default color
-                if 'row_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.row_font_color[1:])  # White font color
-                else:
-                    run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)   #White font
                 
                 
         table.rows[0].height = fixed_row_height  # Set height for the header row
 
     # Add data to table and set font size
-    df.fillna('-', inplace=True)
+    df = df.fillna('-')
     for row_idx, row in df.iterrows():
         for col_idx, value in enumerate(row):
             cell = table.cell(row_idx + 1, col_idx)
@@ -434,14 +138,12 @@ def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, gra
                 cell.text = f"{value:.4f}".rstrip('0').rstrip('.')
             else:
                 cell.text = str(value)
+            # Confidence interval under each period's PSI
+            if intervals is not None and row['PD Bucket'] == 'PSI' and df.columns[col_idx] in intervals:
+                cell.text += "\n" + format_interval(intervals[df.columns[col_idx]]).strip()
             for paragraph in cell.text_frame.paragraphs:
                 for run in paragraph.runs:
                     run.font.size = Pt(8)  # Set font size to 8
-                    # Check if color is in session state; if not, use default color
-                    if 'content_font_color' in st.session_state:
-                        run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                    else:
-                        run.font.color.rgb = RGBColor(0, 0, 0)
 
         table.rows[row_idx + 1].height = fixed_row_height  # Set height for all data rows
 
@@ -473,61 +175,23 @@ def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, gra
         for run in paragraph.runs:
             run.font.size = Pt(14)
     
-    slide_index += 1
 
     # First graph slide (Subdivided Bar Plot of PD Buckets)
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-    
+    slide = add_content_slide(prs, "Graph")
     shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "Graph"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Add chart image 1
-    image_stream1 = io.BytesIO(fig1_bytes)
+    image_stream1 = io.BytesIO(png_bytes(fig1_bytes))
     # shapes.add_picture(image_stream1, Inches(1), Inches(0.9), Inches(7.5), Inches(4.5))
     shapes.add_picture(image_stream1, Inches(0.6), Inches(0.8), Inches(8.8), Inches(4.5))
     
-    slide_index += 1
 
     # Second graph slide (Comparison of Dev and 202403)
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-    
+    slide = add_content_slide(prs, "Graph")
     shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "Graph"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Add chart image 2
-    image_stream2 = io.BytesIO(fig2_bytes)
+    image_stream2 = io.BytesIO(png_bytes(fig2_bytes))
     # shapes.add_picture(image_stream2, Inches(1), Inches(0.9), Inches(7.5), Inches(4.5))
     shapes.add_picture(image_stream2, Inches(0.6), Inches(0.8), Inches(8.8), Inches(4.5))
 
@@ -548,17 +212,8 @@ def create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, gra
 
 # Function to create the threshold selection UI for PSI
 def threshold_selection_PSI(show_ui=True):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Construct the path for the thresholds file
-    file_path = os.path.join(base_dir, 'pkl', 'model_psi.pkl')
-
-    try:
-        with open(file_path, 'rb') as k:
-            thresholds_psi = pickle.load(k)
-    except FileNotFoundError:
-        thresholds_psi = None
+    # Thresholds held by the threshold store (None if they were never saved)
+    thresholds_psi = load_thresholds('psi')
         
     if thresholds_psi:
         green_threshold = thresholds_psi['green_psi']['value']
@@ -612,20 +267,12 @@ def threshold_selection_PSI(show_ui=True):
             with c3:
                 st.markdown('<p style="font-size:19px;"><b>Action Required</b></p>', unsafe_allow_html=True)
             
-        # Save thresholds to file
-        thresholds_psi = {
+        # Save thresholds to file (only written when a value changed)
+        save_thresholds('psi', {
             'green_psi': {'value': green_threshold},
             'amber_psi': {'lower': amber_lower, 'upper': amber_upper},
             'red_psi': {'value': red_threshold}
-        }
-        # Base directory of the current script
-        base_dir = os.path.dirname(__file__)
-        
-        # Construct the path for the thresholds file
-        file_path = os.path.join(base_dir, 'pkl', 'model_psi.pkl')
-    
-        with open(file_path, 'wb') as k:
-            pickle.dump(thresholds_psi, k)
+        }, thresholds_psi)
 
     return {
         'green_psi': {'value': green_threshold},
@@ -634,123 +281,85 @@ def threshold_selection_PSI(show_ui=True):
     }
 
 
-def create_powerpoint_download_button_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment="", graph_comment=""):
+def create_powerpoint_download_button_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment="", graph_comment="", intervals=None):
     # Create PowerPoint presentation bytes
-    ppt_data_psi = create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, graph_comment)
+    ppt_data_psi = create_ppt_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, data_comment, graph_comment, intervals)
     
     return ppt_data_psi
 
-# Function to merge four PowerPoint presentations and apply title styling to specific slides
-def merge_presentations(presentation1, presentation2, presentation3, presentation4, presentation5, presentation6):
-    merged_presentation = Presentation()
-    slide_index = 1  # To keep track of the slide index
-
-    # Copy slides from presentation1 (Overview) first
-    for slide in presentation1.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [1]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation2 (Change Log)
-    for slide in presentation2.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [2]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation3 (Summary)
-    for slide in presentation3.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 3
-        if merged_slide.shapes.title:
-            if slide_index in [3]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-      
-        slide_index += 1
-    
-    # Copy slides from presentation4 (Gini)
-    for slide in presentation4.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 5 or 6
-        if merged_slide.shapes.title:
-            if slide_index in [5, 6]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-            if slide_index in [4]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-    
-        slide_index += 1
-
-    # Copy slides from presentation5 (Calibration)
-    for slide in presentation5.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 8 or 9
-        if merged_slide.shapes.title:
-            if slide_index in [8, 9]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-                
-            if slide_index in [7]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-      
-        slide_index += 1
-
-    # Copy slides from presentation6 (PSI)
-    for slide in presentation6.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 11 or 12
-        if merged_slide.shapes.title:
-            if slide_index in [11, 12, 13]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-                
-            if slide_index in [10]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-       
-        slide_index += 1
-
-    return merged_presentation
+# Session keys the pages fill in before the full Dashboard presentation can be built
+DASHBOARD_KEYS = ['ppt_data_overview', 'ppt_data_change_log', 'ppt_data_summary',
+                  'df_gini', 'fig_bytes', 'thresholds_gini',
+                  'df_calibration', 'fig_bytes_calibration', 'thresholds_calibration',
+                  'df_psi', 'fig1_bytes', 'fig2_bytes', 'thresholds_psi']
+
+# Function to get the full Dashboard presentation (Overview to PSI), built on request from the results the pages keep in the session
+def dashboard_presentation():
+    if not all(name in st.session_state for name in DASHBOARD_KEYS):
+        return None
+
+    # Presentations kept as bytes by some pages are read through BytesIO
+    ppt_data_overview, ppt_data_change_log, ppt_data_summary = [
+        BytesIO(data) if isinstance(data, bytes) else data
+        for data in (st.session_state.ppt_data_overview, st.session_state.ppt_data_change_log, st.session_state.ppt_data_summary)]
+    gini_inputs = (st.session_state.df_gini, st.session_state.fig_bytes, st.session_state.thresholds_gini,
+                   st.session_state.get("data_comment_gini", ""), st.session_state.get("graph_comment_gini", ""),
+                   st.session_state.get("ci_gini"))
+    calibration_inputs = (st.session_state.df_calibration, st.session_state.fig_bytes_calibration, st.session_state.thresholds_calibration,
+                          st.session_state.get("data_comment_calibration", ""), st.session_state.get("graph_comment_calibration", ""),
+                          st.session_state.get("ci_calibration"), st.session_state.get("calibration_tests"))
+    psi_inputs = (st.session_state.df_psi, st.session_state.fig1_bytes, st.session_state.fig2_bytes, st.session_state.thresholds_psi,
+                  st.session_state.get("data_comment_psi", ""), st.session_state.get("graph_comment_psi", ""),
+                  st.session_state.get("ci_psi"))
+
+    # Function to build the presentation, only run when the user asks for it
+    # Only the sections changed since the last Dashboard of the session are rebuilt
+    def build_dashboard(progress):
+        return assemble_presentation("dashboard", [
+            ("Overview", (ppt_data_overview,), lambda: ppt_data_overview),
+            ("Change Log", (ppt_data_change_log,), lambda: ppt_data_change_log),
+            ("Summary", (ppt_data_summary,), lambda: ppt_data_summary),
+            ("Gini", gini_inputs, lambda: create_ppt_download_button_gini(*gini_inputs)),
+            ("Calibration", calibration_inputs, lambda: create_ppt_download_button_calibration(*calibration_inputs)),
+            ("PSI", psi_inputs, lambda: create_powerpoint_download_button_PSI(*psi_inputs)),
+        ], progress)
+
+    # Shared by the PSI and Data pages, the presentation is kept in the session until one of its inputs changes
+    return lazy_download("dashboard", build_dashboard,
+                         (ppt_data_overview, ppt_data_change_log, ppt_data_summary, gini_inputs, calibration_inputs, psi_inputs),
+                         "Dashboard.pptx", "Click here to prepare the Dashboard PowerPoint presentation")
+
+# Function to load the bin x date_ref frequencies as one row of bin counts per period
+def load_bin_counts():
+    table = load_dataset('Table of bin by date_ref(Data).xlsx')
+    table = table[pd.to_numeric(table['bin'], errors='coerce').notna()]
+    periods = [col for col in table.columns if isinstance(col, int)]
+    return [str(period) for period in periods], table[periods].to_numpy(dtype=float).T
+
+# Function to load the development counts per PD bucket (the sample the Dev distribution comes from)
+def load_dev_counts():
+    dev = load_dataset('Gini_Data_dashboard_dev.xlsx')
+    return dev[pd.to_numeric(dev['PD Bucket'], errors='coerce').notna()]['Total'].to_numpy(dtype=float)
+
+# Function to build the PSI table for every period from the bin frequencies, the development sample and the expected PDs
+def psi_table_from_datasets():
+    periods, period_counts = load_bin_counts()
+
+    # Development PD is the bad rate of the development sample
+    dev = load_dataset('Gini_Data_dashboard_dev.xlsx')
+    dev = dev[pd.to_numeric(dev['PD Bucket'], errors='coerce').notna()]
+    dev_pd = dev['Bad'].sum() / dev['Total'].sum()
+
+    # Mean predicted PD per date_ref
+    stability = load_dataset('STABILITY - EXPECTED PD(Data).xlsx')
+    predicted_pd = stability.set_index(stability['date_ref'].astype(str))['meanpd'].reindex(periods).to_numpy(dtype=float)
+
+    return psi_table(dev['Total'].to_numpy(dtype=float), period_counts, periods, predicted_pd=predicted_pd, dev_pd=dev_pd)
+
+# Function to compute the bootstrap confidence interval of every period's PSI (cached per dataset version)
+@st.cache_data(show_spinner=False)
+def psi_intervals(periods, dev_counts, period_counts):
+    return dict(zip(periods, bootstrap_intervals(dev_counts=dev_counts, period_counts=period_counts)['psi']))
 
 def app():
     st.markdown(
@@ -760,15 +369,15 @@ def app():
         unsafe_allow_html=True
     )
 
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df = pd.read_excel(os.path.join(base_dir, 'Datasets', 'PSI_Data_dashboard.xlsx'))
+    # Compute the PSI table of every period from the raw bin frequencies
+    df = psi_table_from_datasets()
     # Replace None values with empty strings for better display
     df.columns = [str(col) for col in df.columns]
     df1 = df.fillna("")
     st.session_state.df_psi = df  # Save df to session_state
+    periods, period_counts = load_bin_counts()
+    intervals = psi_intervals(periods, load_dev_counts(), period_counts)
+    st.session_state.ci_psi = intervals
 
     data_comment_psi = ""
     graph_comment_psi = ""
@@ -824,75 +433,6 @@ def app():
         # )
         # df_styled = styled_df.format(lambda x: f"{x:.4f}".rstrip('0').rstrip('.') if isinstance(x, float) else f"{x}")
         
-        # Function for formatting values
-        def format_value(val):
-            if isinstance(val, float):
-                # Format floats to 4 decimal places, remove trailing zeros and the dot if not needed
-                return f"{val:.4f}".rstrip('0').rstrip('.')
-            return str(val)
-
-        # Function for creating HTML table with conditional styling
-        def create_html_table_with_download(dataframe, file_name, image_path):
-            # Encode the image as base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
-
-            # Create download link
-            download_link = f"""
-            <style>
-                .download-icon img {{
-                    width: 70px;
-                    height: 70px;
-                    border-radius: 30%;  /* Makes the image circular */
-                    transition: transform 0.3s ease, box-shadow 0.3s ease;
-                }}
-                .download-icon img:hover {{
-                    transform: scale(1.1);  /* Slight zoom effect on hover */
-                    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
-                }}
-                .download-icon img:active {{
-                    transform: scale(0.90);  /* Slight shrink effect on click */
-                    box-shadow: none;  /* Remove shadow when clicked */
-                }}
-            </style>
-
-            <div class="download-icon">
-                <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{base64.b64encode(to_excel(dataframe)).decode()}" download="{file_name}" title="Click to download the file">
-                    <img src="data:image/png;base64,{image_base64}" alt="Download Icon" style="width:27px; height:auto;">
-                </a>
-            </div>
-            """
-
-            # Create HTML table with inline styling
-            html_table = f"""
-            <div class="custom-container">
-                <table class="dataframe">
-                    <thead><tr>
-            """
-            for col_name in dataframe.columns:
-                html_table += f'<th>{html.escape(col_name)}</th>'
-            html_table += '</tr></thead><tbody>'
-            for index, row in dataframe.iterrows():
-                html_table += '<tr>'
-                for col_name, col_value in row.items():
-                    style = ''
-                    formatted_value = format_value(col_value)  # Apply formatting
-                    if row['PD Bucket'] == 'PSI':
-                        style = highlight_gini_PSI(col_value, thresholds_psi)
-                    html_table += f'<td style="{style}">{html.escape(formatted_value)}</td>'
-                html_table += '</tr>'
-            html_table += '</tbody></table></div>'
-
-            # Combine the download link and the table
-            return download_link + html_table
-
-        # Function to convert DataFrame to Excel
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-            return output.getvalue()
-
         # Optional: If you want to display custom CSS separately
         custom_css = """
         <style>
@@ -953,8 +493,11 @@ def app():
         image_path = os.path.join(base_dir, 'Images', 'Download_icon.png')
 
         # Create HTML table and display it
-        html_table = create_html_table_with_download(df1, "PSI_result.xlsx", image_path)
-        st.markdown(html_table, unsafe_allow_html=True)
+        # Every cell of the PSI row is highlighted and shows its confidence interval
+        psi_row = (df1['PD Bucket'] == 'PSI').to_numpy()
+        styles = {col_name: styles_on_rows(highlight_gini_PSI_column(df1[col_name], thresholds_psi), psi_row) for col_name in df1.columns}
+        suffixes = {(row, col_name): format_interval(intervals.get(col_name)) for row in np.flatnonzero(psi_row) for col_name in df1.columns}
+        show_table(df1, "PSI_result.xlsx", image_path, table_to_excel, "psi_result", styles, suffixes)
 
         # st.dataframe(df_styled, width=1200)
         
@@ -1073,13 +616,14 @@ def app():
             return fig
         
         fig = create_subdivided_bar_plot(df)
-        fig1_bytes = pio.to_image(fig, format='png')
 
         data = df.head(10)
         categories = data["PD Bucket"]
         dev_values = np.round(data["Dev"] * 100, 2)
         data.columns = [str(i) for i in data.columns]
-        column_202403_values = np.round(data["202403"] * 100, 2)
+        # Latest period of the history
+        latest_period = data.columns[-1]
+        latest_values = np.round(data[latest_period] * 100, 2)
         colors = ['rgb(31, 119, 180)', 'rgb(255, 127, 14)']
 
         trace_dev = go.Bar(
@@ -1091,17 +635,17 @@ def app():
             offset=-0.2,
             width=0.4
         )
-        trace_202304 = go.Bar(
+        trace_latest = go.Bar(
             x=[f'{cat}' for cat in categories],
-            y=column_202403_values,
-            name='202403',
+            y=latest_values,
+            name=latest_period,
             marker_color=colors[1],
             textposition='auto',
             offset=0.2,
             width=0.4
         )
         
-        fig1 = go.Figure(data=[trace_dev, trace_202304])
+        fig1 = go.Figure(data=[trace_dev, trace_latest])
         fig1.update_layout(
             xaxis=dict(
                 showline=True,
@@ -1144,7 +688,8 @@ def app():
             height=500,
             width=1200,
         )
-        fig2_bytes = pio.to_image(fig1, format='png')
+        # Both charts go to the background renderer in one batch, unchanged charts come from the cache
+        fig1_bytes, fig2_bytes = figures_png_future(fig, fig1)
         
         st.plotly_chart(fig, use_container_width=True)
         st.plotly_chart(fig1, use_container_width=True)
@@ -1166,51 +711,9 @@ def app():
         st.session_state.fig2_bytes = fig2_bytes
         st.session_state.thresholds_psi = thresholds_psi
 
-        ppt_data_psi = create_powerpoint_download_button_PSI(df, fig1_bytes, fig2_bytes, thresholds_psi, st.session_state.get("data_comment_psi", ""), st.session_state.get("graph_comment_psi", ""))
+        merged_presentation_bytesio = dashboard_presentation()
 
-        ppt_data_overview = ppt_data_change_log = ppt_data_summary = ppt_data_gini = None
-        
-        if 'ppt_data_overview' in st.session_state:
-            ppt_data_overview = st.session_state.ppt_data_overview
-        
-        if 'ppt_data_change_log' in st.session_state:
-            ppt_data_change_log = st.session_state.ppt_data_change_log
-            
-        if 'ppt_data_summary' in st.session_state:
-            ppt_data_summary = st.session_state.ppt_data_summary
-            
-        if 'df_gini' in st.session_state and 'fig_bytes' in st.session_state and 'thresholds_gini' in st.session_state:
-            df_gini = st.session_state.df_gini
-            fig_bytes = st.session_state.fig_bytes
-            thresholds_gini = st.session_state.thresholds_gini
-            data_comment_gini = st.session_state.get("data_comment_gini", "")
-            graph_comment_gini = st.session_state.get("graph_comment_gini", "")
-
-            ppt_data_gini = create_ppt_download_button_gini(df_gini, fig_bytes, thresholds_gini, data_comment_gini, graph_comment_gini)
-            
-        if 'df_calibration' in st.session_state and 'fig_bytes_calibration' in st.session_state and 'thresholds_calibration' in st.session_state:
-            df_calibration = st.session_state.df_calibration
-            fig_bytes_calibration = st.session_state.fig_bytes_calibration
-            thresholds_calibration = st.session_state.thresholds_calibration
-            data_comment_calibration = st.session_state.get("data_comment_calibration", "")
-            graph_comment_calibration = st.session_state.get("graph_comment_calibration", "")
-
-            ppt_data_calibration = create_ppt_download_button_calibration(df_calibration, fig_bytes_calibration, thresholds_calibration, data_comment_calibration, graph_comment_calibration)
-
-        if ppt_data_gini and ppt_data_calibration and ppt_data_overview and ppt_data_change_log and ppt_data_summary:
-            presentation1 = load_presentation_from_bytesio(ppt_data_overview)
-            presentation2 = load_presentation_from_bytesio(ppt_data_change_log)
-            presentation3 = load_presentation_from_bytesio(ppt_data_summary)
-            presentation4 = load_presentation_from_bytesio(ppt_data_gini)
-            presentation5 = load_presentation_from_bytesio(ppt_data_calibration)
-            presentation6 = load_presentation_from_bytesio(ppt_data_psi)
-            
-            
-
-            merged_presentation = merge_presentations(presentation1, presentation2, presentation3, presentation4, presentation5, presentation6)
-            merged_presentation_bytesio = BytesIO()
-            merged_presentation.save(merged_presentation_bytesio)
-            merged_presentation_bytesio.seek(0)
+        if merged_presentation_bytesio is not None:
         
             # Base directory of the current script
             base_dir = os.path.dirname(__file__)
@@ -1218,15 +721,14 @@ def app():
             # Construct the path for the image
             image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
             
-            # Read and encode the image to base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
+            # Serve the icon from the artifact store
+            image_url = file_url(image_path)
             
             # Convert BytesIO to bytes
             ppt_data_merged_bytes = merged_presentation_bytesio.getvalue()
             
-            # Encode the PPT data to base64
-            ppt_data_merged_base64 = base64.b64encode(ppt_data_merged_bytes).decode()
+            # Store the PPT file once under its content hash instead of embedding it in the page
+            ppt_data_merged_url = artifact_url(ppt_data_merged_bytes, "Dashboard.pptx")
             
             # Help text
             help_text = "Click here to download the Dashboard into PowerPoint presentation"
@@ -1245,13 +747,11 @@ def app():
             
             # Create the HTML for the button with image and help text
             all_ppt_button_html = f"""
-            <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_merged_base64}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
-                <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+            <a href="{ppt_data_merged_url}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
+                <img src="{image_url}" alt="Download PPT">
             </a>
             """
             
-            st.session_state.all_ppt_button_html = all_ppt_button_html
-            
             # Display the custom download button in Streamlit
             st.markdown(all_ppt_button_html, unsafe_allow_html=True)
 
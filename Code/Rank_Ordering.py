@@ -0,0 +1,213 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+import os
+from pptx.dml.color import RGBColor
+from streamlit_modal import Modal
+from Loader import load_dataset
+from Metrics import rank_ordering_table
+from Report import create_metric_ppt, ppt_download_button_html
+from Artifacts import lazy_download, memoize_presentation
+from Tables import show_table, table_to_excel, styles_on_rows
+from Charts import figure_png_future
+
+
+# Function to create the rank ordering presentation (title slide, bad rate table with the breaks and graph)
+@memoize_presentation
+def create_ppt_rank_ordering(df, breaks, fig_bytes, data_comment="", graph_comment=""):
+    # Highlight the buckets that break the rank ordering and the broken periods
+    def break_fill(row_idx, col_name, value):
+        if col_name in breaks.columns and breaks.at[row_idx, col_name]:
+            return RGBColor(0xFF, 0xBF, 0x00)
+        if col_name == 'Rank Ordering' and value == 'Broken':
+            return RGBColor(0xFF, 0x00, 0x00)
+        if col_name == 'Rank Ordering' and value == 'Monotonic':
+            return RGBColor(0x00, 0xFF, 0x00)
+        return None
+
+    return create_metric_ppt(
+        "PL - Scorecard Model Rank Ordering",
+        tables=[("Bad rate by PD Bucket", df, break_fill)],
+        graphs=[("Graph", fig_bytes)],
+        data_comment=data_comment,
+        graph_comment=graph_comment,
+    )
+
+# Streamlit app
+def app():
+    st.markdown(
+                """
+                <h1 style='text-align: center; font-size: 28px; color: rgb(39, 45, 85);'>PL - Scorecard Model Rank Ordering</h1>
+                """,
+                unsafe_allow_html=True
+            )
+
+    # Compute the bad rate of every date_ref and PD bucket and the rank ordering breaks
+    performance = load_dataset('PERFORMANCE HISTORICAL(Data).xlsx')
+    df, breaks = rank_ordering_table(performance)
+    st.session_state.df_rank_ordering = df
+
+    custom_css = """
+    <style>
+        .custom-container {
+            max-height: 400px;
+            max-width: 100%;
+            overflow-y: scroll;
+            overflow-x: scroll;
+            position: relative;
+            border-radius: 10px;
+            border: 1px solid #ccc;
+        }
+        table {
+            width: 100%;
+            height: auto;
+        }
+        th, td {
+            font-size: 14px;
+            padding: 8px;
+            text-align: left;
+            white-space: nowrap;  /* Prevent text from wrapping */
+        }
+        .download-icon {
+            position: absolute;
+            right: 40px;
+            top: -40px;  /* Adjust to align vertically outside the table container */
+            font-size: 24px;
+        }
+        thead {
+            position: sticky;
+            top: 0;
+            background-color: rgb(39, 45, 85);
+            color: rgb(20, 26, 63);
+        }
+        thead th {
+            color: white;
+            font-weight: normal;
+        }
+        .info-container {
+            margin-top: 10px;
+            padding: 8px;
+            border: 1px solid #ccc;
+            border-radius: 5px;
+            background-color: #f9f9f9;
+            font-size: 14px;
+            text-align: left;
+            color: black;
+        }
+        .ppt-download-button {
+            position: absolute;
+            top: -72px;
+            left: 150px;
+            cursor: pointer
+        }
+    </style>
+    """
+    st.markdown(custom_css, unsafe_allow_html=True)
+
+    # Path to the download icon
+    image_path = os.path.join(os.path.dirname(__file__), 'Images', 'Download_icon.png')
+
+    # Create two tabs: one for data and one for the graph
+    tab1, tab2 = st.tabs(["Rank Ordering", "Graph"])
+
+    with tab1:
+        st.markdown(
+            """
+            <div style='text-align: center;
+            font-size: 20px;'>
+                <strong>Bad rate by PD Bucket</strong>
+            </div>
+            """,
+            unsafe_allow_html=True)
+        # Buckets breaking the rank ordering in orange, the verdict of each period in red or green
+        styles = {col_name: styles_on_rows('background-color: orange', breaks[col_name]) for col_name in breaks.columns}
+        styles['Rank Ordering'] = np.select([df['Rank Ordering'] == 'Broken', df['Rank Ordering'] == 'Monotonic'],
+                                            ['background-color: red', 'background-color: green'], '').astype(object)
+        show_table(df, "Rank_ordering.xlsx", image_path, table_to_excel, "rank_ordering", styles)
+        st.markdown(
+            """
+            <div class="info-container">
+                Bad rates should fall from PD Bucket 1 (riskiest) to the last bucket. Buckets with a higher bad rate than the
+                previous bucket are highlighted; the last row counts the periods in which each bucket breaks the rank ordering.
+            </div>
+            """,
+            unsafe_allow_html=True)
+
+        # Add comment box for data
+        data_comment_modal = Modal("Comment", key="rank_ordering_data_comment")
+        if st.button("Add Comment", key="rank_ordering_data_comment_button", help="Click here to add Comment"):
+            data_comment_modal.open()
+
+        if data_comment_modal.is_open():
+            with data_comment_modal.container():
+                data_comment_rank_ordering = st.text_area("Enter your comment:", key="rank_ordering_data_comment_textarea")
+                if st.button("Submit Comment", key="rank_ordering_submit_data_comment"):
+                    st.session_state.data_comment_rank_ordering = data_comment_rank_ordering
+                    data_comment_modal.close()
+
+    with tab2:
+        st.markdown(
+                """
+                <div style='text-align: center;
+                font-size: 20px;'>
+                    <strong>Graph</strong>
+                </div>
+                """,
+                unsafe_allow_html=True)
+
+        periods = df['date_ref'].iloc[:-1].tolist()
+        period = st.selectbox("Select date_ref", options=periods, index=len(periods) - 1, key="rank_ordering_period")
+        rows = performance[performance['date_ref'].astype(str) == period].sort_values('bin')
+        buckets = [str(b + 1) for b in rows['bin']]
+        bad_rate = rows['bads'] / rows['sum']
+
+        # Observed bad rate against the mean PD per bucket, breaks in amber
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=buckets, y=bad_rate, name='Bad Rate',
+                             marker_color=['rgb(255, 191, 0)' if breaks.at[periods.index(period), b] else 'rgb(31, 119, 180)' for b in buckets]))
+        fig.add_trace(go.Scatter(x=buckets, y=rows['meanpd'], mode='lines+markers', name='Mean PD', line=dict(color='red', width=2)))
+        fig.update_layout(
+            xaxis_title=dict(text='PD Bucket -->', font=dict(size=17, color='black', family='Calibri')),
+            yaxis_title=dict(text='Rate -->', font=dict(size=17, color='black', family='Calibri')),
+            xaxis=dict(showline=True, linecolor='black', linewidth=2, mirror=True),
+            yaxis=dict(showgrid=True, gridcolor='lightgray', showline=True, linecolor='black', linewidth=2, mirror=True),
+            legend=dict(orientation='h', x=0.3, y=-0.2, bordercolor='black', borderwidth=1),
+            margin=dict(l=60, r=30, t=40, b=60),
+            plot_bgcolor='white',
+            showlegend=True,
+            width=1200,
+            height=500
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+        # Add comment box for graph
+        graph_comment_modal = Modal("Comment", key="rank_ordering_graph_comment")
+        if st.button("Add Comment", key="rank_ordering_graph_comment_button", help="Click here to add Comment"):
+            graph_comment_modal.open()
+
+        if graph_comment_modal.is_open():
+            with graph_comment_modal.container():
+                graph_comment_rank_ordering = st.text_area("Enter your comment:", key="rank_ordering_graph_comment_textarea")
+                if st.button("Submit Comment", key="rank_ordering_submit_graph_comment"):
+                    st.session_state.graph_comment_rank_ordering = graph_comment_rank_ordering
+                    graph_comment_modal.close()
+
+        # Convert plot figure to PNG bytes in the background, reused while the figure is unchanged
+        fig_bytes = figure_png_future(fig)
+        st.session_state.fig_bytes_rank_ordering = fig_bytes
+
+        data_comment_rank_ordering = st.session_state.get("data_comment_rank_ordering", "")
+        graph_comment_rank_ordering = st.session_state.get("graph_comment_rank_ordering", "")
+
+        # The presentation is only built when the user asks for it, then kept until its inputs change
+        ppt_data_rank_ordering = lazy_download("rank_ordering_ppt", lambda progress: create_ppt_rank_ordering(df, breaks, fig_bytes, data_comment_rank_ordering, graph_comment_rank_ordering),
+                                               (df, breaks, fig_bytes, data_comment_rank_ordering, graph_comment_rank_ordering), "Rank_Ordering.pptx",
+                                               "Click here to prepare the Rank Ordering PowerPoint presentation")
+        if ppt_data_rank_ordering is not None:
+            st.session_state.ppt_data_rank_ordering = ppt_data_rank_ordering
+            st.markdown(ppt_download_button_html(ppt_data_rank_ordering, "Rank_Ordering.pptx", "Click here to download the Rank Ordering PowerPoint presentation"), unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,104 @@
+import os
+import io
+from pptx.util import Inches, Pt
+from Artifacts import artifact_url, file_url
+from Charts import png_bytes
+from Template import template_presentation, add_styled_table, set_cell_text, TITLE_LAYOUT, CONTENT_LAYOUT
+
+
+# Function to format a table value the way the dashboard tables do
+def format_cell(value):
+    if isinstance(value, float) and value != value:
+        return ''
+    if isinstance(value, float):
+        return f"{value:.4f}".rstrip('0').rstrip('.')
+    return str(value)
+
+# Function to add the title slide of a presentation (background, logo, ribbon and title style come from the template layout)
+def add_title_slide(prs, title):
+    slide = prs.slides.add_slide(prs.slide_layouts[TITLE_LAYOUT])
+    slide.shapes.title.text = title
+    return slide
+
+# Function to add a content slide (title style, ribbons, slide number and logo come from the template layout)
+def add_content_slide(prs, title):
+    slide = prs.slides.add_slide(prs.slide_layouts[CONTENT_LAYOUT])
+    slide.shapes.title.text = title
+    return slide
+
+# Function to add a comment box below the content of a slide
+def add_comment(slide, comment, top):
+    comment_box = slide.shapes.add_textbox(Inches(0.5), top, Inches(9), Inches(1))
+    text_frame = comment_box.text_frame
+    text_frame.text = f"Comment: {comment}"
+    for paragraph in text_frame.paragraphs:
+        for run in paragraph.runs:
+            run.font.size = Pt(14)
+
+# Function to add a table slide; cell_fill(row_idx, col_name, value) returns the RGBColor of highlighted cells or None
+def add_table_slide(prs, title, df, cell_fill=None, comment="", note=""):
+    slide = add_content_slide(prs, title)
+    rows, cols = df.shape
+    font_size = Pt(10) if cols <= 8 and rows <= 15 else Pt(8)
+
+    # Long tables get thinner rows so that they still fit on the slide
+    row_height = min(Inches(0.3), Inches(5.4) // (rows + 1))
+    table = add_styled_table(slide, rows + 1, cols, Inches(0.5), Inches(1.2), Inches(9), row_height * (rows + 1))
+
+    # Header and content colours come from the table style of the template
+    for col_idx, col_name in enumerate(df.columns):
+        set_cell_text(table.cell(0, col_idx), str(col_name), font_size)
+
+    # Add data and the highlighted cells
+    for row_idx, row in enumerate(df.itertuples(index=False)):
+        for col_idx, value in enumerate(row):
+            cell = table.cell(row_idx + 1, col_idx)
+            set_cell_text(cell, format_cell(value), font_size)
+            fill = cell_fill(row_idx, df.columns[col_idx], value) if cell_fill else None
+            if fill is not None:
+                cell.fill.solid()
+                cell.fill.fore_color.rgb = fill
+
+    # Optional note (e.g. a portfolio level result) between the table and the comment
+    top = Inches(1.3) + row_height * (rows + 1)
+    if note:
+        note_box = slide.shapes.add_textbox(Inches(0.5), top, Inches(9), Inches(0.4))
+        note_box.text_frame.text = note
+        for paragraph in note_box.text_frame.paragraphs:
+            for run in paragraph.runs:
+                run.font.size = Pt(12)
+        top += Inches(0.4)
+    add_comment(slide, comment, top + Inches(0.1))
+    return slide
+
+# Function to add a graph slide
+def add_graph_slide(prs, title, fig_bytes, comment=""):
+    slide = add_content_slide(prs, title)
+    slide.shapes.add_picture(io.BytesIO(png_bytes(fig_bytes)), Inches(0.6), Inches(0.8), Inches(8.8), Inches(4.5))
+    add_comment(slide, comment, Inches(5.5))
+    return slide
+
+# Function to create a metric presentation: a title slide, then one slide per table and per graph
+def create_metric_ppt(title, tables=(), graphs=(), data_comment="", graph_comment=""):
+    prs = template_presentation()
+    add_title_slide(prs, title)
+    for table_title, df, cell_fill in tables:
+        add_table_slide(prs, table_title, df, cell_fill, data_comment)
+    for graph_title, fig_bytes in graphs:
+        add_graph_slide(prs, graph_title, fig_bytes, graph_comment)
+
+    # Save presentation
+    ppt_output = io.BytesIO()
+    prs.save(ppt_output)
+    ppt_output.seek(0)
+    return ppt_output
+
+# Function to create the HTML of the PowerPoint download button of a page
+def ppt_download_button_html(ppt_data, file_name, help_text="Click here to download the PowerPoint presentation"):
+    # The presentation and the icon are served from the artifact store instead of being embedded in the page
+    image_path = os.path.join(os.path.dirname(__file__), "Images", "ppt_logo.png")
+    return f"""
+    <a href="{artifact_url(ppt_data, file_name)}" download="{file_name}" class="ppt-download-button" title="{help_text}">
+        <img src="{file_url(image_path)}" alt="Download PPT">
+    </a>
+    """
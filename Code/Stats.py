@@ -0,0 +1,114 @@
+import numpy as np
+
+
+# Smallest number used to keep the continued fractions away from a division by zero
+FPMIN = 1e-300
+
+# Relative accuracy at which the series and continued fractions stop
+EPS = 1e-14
+
+# Lanczos approximation of the gamma function (g = 7, 9 terms)
+LANCZOS_G = 7
+LANCZOS_COEFFICIENTS = np.array([
+    0.99999999999980993, 676.5203681218851, -1259.1392167224028, 771.32342877765313, -176.61502916214059,
+    12.507343278686905, -0.13857109526572012, 9.9843695780195716e-6, 1.5056327351493116e-7,
+])
+
+
+# Function to compute the log of the gamma function element-wise (arguments of at least 0.5)
+def gammaln(x):
+    x = np.asarray(x, dtype=float) - 1
+    series = LANCZOS_COEFFICIENTS[0] + (LANCZOS_COEFFICIENTS[1:] / (x[..., None] + np.arange(1, 9))).sum(axis=-1)
+    t = x + LANCZOS_G + 0.5
+    return 0.5 * np.log(2 * np.pi) + (x + 0.5) * np.log(t) - t + np.log(series)
+
+# Function to evaluate the continued fraction of the incomplete beta function (modified Lentz), all elements at once
+def _betacf(a, b, x, max_iterations=10_000):
+    qab, qap, qam = a + b, a + 1, a - 1
+    c = np.ones_like(x)
+    d = 1 - qab * x / qap
+    d = 1 / np.where(np.abs(d) < FPMIN, FPMIN, d)
+    h = d.copy()
+
+    # Iterations only run on the elements that have not converged yet
+    active = np.ones(x.shape, dtype=bool)
+    for m in range(1, max_iterations + 1):
+        idx = np.nonzero(active)
+        aa_, b_, x_, c_, d_, h_ = a[idx], b[idx], x[idx], c[idx], d[idx], h[idx]
+        m2 = 2 * m
+        for aa in (m * (b_ - m) * x_ / ((qam[idx] + m2) * (aa_ + m2)),
+                   -(aa_ + m) * (qab[idx] + m) * x_ / ((aa_ + m2) * (qap[idx] + m2))):
+            d_ = 1 + aa * d_
+            d_ = 1 / np.where(np.abs(d_) < FPMIN, FPMIN, d_)
+            c_ = 1 + aa / c_
+            c_ = np.where(np.abs(c_) < FPMIN, FPMIN, c_)
+            delta = d_ * c_
+            h_ = h_ * delta
+        c[idx], d[idx], h[idx] = c_, d_, h_
+        active[idx] = np.abs(delta - 1) > EPS
+        if not active.any():
+            break
+    return h
+
+# Function to compute the regularized incomplete beta function I_x(a, b) element-wise
+def betainc(a, b, x):
+    a, b, x = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float), np.asarray(x, dtype=float))
+    shape = x.shape
+    a, b, x = a.ravel(), b.ravel(), x.ravel()
+    inside = (x > 0) & (x < 1)
+    xc = np.where(inside, x, 0.5)
+
+    # Prefactor x^a (1-x)^b / (a B(a, b)), the continued fraction converges fast on the side below (a+1)/(a+b+2)
+    log_front = gammaln(a + b) - gammaln(a) - gammaln(b) + a * np.log(xc) + b * np.log1p(-xc)
+    front = np.exp(log_front)
+    lower = xc < (a + 1) / (a + b + 2)
+    aa = np.where(lower, a, b)
+    bb = np.where(lower, b, a)
+    xx = np.where(lower, xc, 1 - xc)
+    fraction = front * _betacf(aa, bb, xx) / aa
+    result = np.where(lower, fraction, 1 - fraction)
+    return np.where(inside, result, np.where(x <= 0, 0.0, 1.0)).reshape(shape)
+
+# Function to compute the regularized upper incomplete gamma function Q(a, x) element-wise
+def gammaincc(a, x, max_iterations=10_000):
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(x, dtype=float))
+    xc = np.where(x > 0, x, 1.0)
+    log_front = -xc + a * np.log(xc) - gammaln(a)
+    use_series = xc < a + 1
+
+    # Series of P(a, x) below a + 1
+    term = 1 / a
+    total = term.copy()
+    ap = a.copy()
+    for _ in range(max_iterations):
+        ap = ap + 1
+        term = term * xc / ap
+        total = total + term
+        if np.all((np.abs(term) < np.abs(total) * EPS) | ~use_series):
+            break
+    series = 1 - total * np.exp(log_front)
+
+    # Continued fraction of Q(a, x) above a + 1 (modified Lentz)
+    b = xc + 1 - a
+    c = np.full(xc.shape, 1 / FPMIN)
+    d = 1 / np.where(np.abs(b) < FPMIN, FPMIN, b)
+    h = d.copy()
+    for i in range(1, max_iterations + 1):
+        an = -i * (i - a)
+        b = b + 2
+        d = an * d + b
+        d = 1 / np.where(np.abs(d) < FPMIN, FPMIN, d)
+        c = b + an / c
+        c = np.where(np.abs(c) < FPMIN, FPMIN, c)
+        delta = d * c
+        h = h * delta
+        if np.all((np.abs(delta - 1) < EPS) | use_series):
+            break
+    fraction = np.exp(log_front) * h
+
+    result = np.where(use_series, series, fraction)
+    return np.where(x > 0, np.clip(result, 0.0, 1.0), 1.0)
+
+# Function to compute the survival function of the chi-square distribution
+def chi2_sf(statistic, degrees_of_freedom):
+    return gammaincc(np.asarray(degrees_of_freedom, dtype=float) / 2, np.asarray(statistic, dtype=float) / 2)
@@ -3,300 +3,51 @@ import pandas as pd
 import io
 import os
 import html
-import base64
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from io import BytesIO
-import pickle
 
-# from Code.gini import highlight_gini
-# from Code.Calibration import highlight_gini_threshold1_calibration, highlight_gini_threshold2_calibration
-# from Code.PSI import highlight_gini_PSI
-
-from gini import highlight_gini
-from Calibration import highlight_gini_threshold1_calibration, highlight_gini_threshold2_calibration
-from PSI import highlight_gini_PSI
+# from Code.gini import highlight_gini_column
+# from Code.Calibration import highlight_calibration_column
+# from Code.PSI import highlight_gini_PSI_column
+
+from gini import highlight_gini_column
+from Calibration import highlight_calibration_column
+from PSI import highlight_gini_PSI_column
+from Loader import load_dataset
+from Tables import show_table, table_to_excel
+from Thresholds import load_thresholds
+from Artifacts import artifact_url, file_url, lazy_download, memoize_presentation
+from Merge import assemble_presentation
+from Report import add_content_slide
+from Template import template_presentation, add_styled_table
 
 # Function to load a PowerPoint presentation from BytesIO
 def load_presentation_from_bytesio(presentation_bytesio):
     return Presentation(presentation_bytesio)
 
-# Function to apply title styling
-def style_title(title_shape):
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # Default color black
-
-# Function to apply title styling and background color
-def set_slide_background_and_title_style(slide, title_shape, slide_index):
-    
-    # Create presentation object
-    prs = Presentation()
-    
-    # Set background color
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    
-    #Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-
-    # Apply title styling
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(255, 255, 255)  # White font color
             
-            
-# Function to clone shapes (including GraphicFrame and pictures)
-def clone_shape(original_shape, merged_slide):
-    if original_shape.shape_type == 14:  # Placeholder
-        ph = original_shape.placeholder_format
-        merged_slide.placeholders[ph.idx].text = original_shape.text
-    elif original_shape.shape_type == 13:  # Picture
-        image_stream = BytesIO(original_shape.image.blob)
-        left = original_shape.left
-        top = original_shape.top
-        width = original_shape.width
-        height = original_shape.height
-        merged_slide.shapes.add_picture(image_stream, left, top, width, height)
-    else:  # Other shapes (including GraphicFrame)
-        merged_shape = original_shape._element
-        merged_slide.shapes._spTree.append(merged_shape)
+# Function to load the Gini thresholds from the threshold store (held in memory, the file is only read when it changes)
+def load_thresholds_gini():
+    return load_thresholds('gini')
 
+# Function to load the calibration thresholds
+def load_thresholds_calibration():
+    return load_thresholds('calibration')
 
-# Function to load thresholds from file
-def load_thresholds_gini(file_name='model_gini.pkl'):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', file_name)
-
-    try:
-        with open(file_path, 'rb') as f:
-            thresholds_gini = pickle.load(f)
-    except FileNotFoundError:
-        thresholds_gini = None
-
-    return thresholds_gini
-
-# Function to load thresholds from file
-def load_thresholds_calibration(file_name='model_calibration.pkl'):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', file_name)
-
-    try:
-        with open(file_path, 'rb') as j:
-            thresholds_calibration = pickle.load(j)
-    except FileNotFoundError:
-        thresholds_calibration = None
-
-    return thresholds_calibration
-
-# Function to load thresholds from file
-def load_thresholds_psi(file_name='model_psi.pkl'):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', file_name)
-
-    try:
-        with open(file_path, 'rb') as k:
-            thresholds_psi = pickle.load(k)
-    except FileNotFoundError:
-        thresholds_psi = None
-
-    return thresholds_psi
-
-# Function to add a slide with the ribbon and logo
-def ppt_ribbon_and_logo(slide, slide_index):
-    # Create presentation object
-    prs = Presentation()
-    # Determine slide dimensions
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    # Calculate ribbon dimensions
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-
-    # Calculate positions for ribbons
-    ribbon_left = Inches(0)
-    ribbon_top = slide_height - ribbon_height
-
-    # Add the first half of the ribbon (amber)
-    shape_amber = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        fill_amber.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber color
-    else:
-        fill_amber.fore_color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    line_amber = shape_amber.line
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        line_amber.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber outline color
-    else:
-        line_amber.color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    # Add text to the amber ribbon
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_font_1' in st.session_state:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_1[1:])  # Black text
-    else:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)  # Black text
-
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'ribbon_color_2' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_color_2' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    # Add slide number
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_2' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_2[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.15)  # Adjust position as needed
-    logo_height = Inches(0.45)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
+# Function to load the PSI thresholds
+def load_thresholds_psi():
+    return load_thresholds('psi')
 
 # Creating PowerPoint
 def generate_powerpoint_summary(df, thresholds_gini, thresholds_calibration, thresholds_psi):
-    prs = Presentation()
-    
-    slide_index = 1  # To keep track of the slide index
-    
-    # Add a slide with title and content layout
-    slide_layout = prs.slide_layouts[5]  # Use the blank layout
-    slide = prs.slides.add_slide(slide_layout)
+    prs = template_presentation()
+
+    # Summary slide (title style, ribbons and logo come from the template)
+    slide = add_content_slide(prs, "Summary Table")
     shapes = slide.shapes
     
-    ppt_ribbon_and_logo(slide, slide_index)
-    
-    # Title slide
-    title_shape = shapes.title
-    title_shape.text = "Summary Table"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
-    
     # Determine table size and position
     slide_width = prs.slide_width
     table_width = Inches(7.2)  # Adjust width to fit content
@@ -305,31 +56,16 @@ def generate_powerpoint_summary(df, thresholds_gini, thresholds_calibration, thr
     top = Inches(2.2)  # Center the table vertically
 
     rows, cols = df.shape
-    table = shapes.add_table(rows + 1, cols, left, top, table_width, table_height).table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide, rows + 1, cols, left, top, table_width, table_height)
             
     
     # Set column names and font size
     for col_idx, col_name in enumerate(df.columns):
         cell = table.cell(0, col_idx)
         cell.text = col_name
-        cell.fill.solid()
-        # Check if color is in session state; if not, use default color
-        if 'row_bg_color' in st.session_state:
-            cell.fill.fore_color.rgb = RGBColor.from_string(st.session_state.row_bg_color[1:]) # Teal
-        else:
-            cell.fill.fore_color.rgb = RGBColor(0x00, 0x80, 0x80) # Teal
         for paragraph in cell.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(12)
-                # Check if color is in session state; if not, use default color
-                if 'row_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.row_font_color[1:])  # White font color
-                else:
-                    run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)     # White font color
     
     # Populating the table with DataFrame values and applying highlighting
     for row_idx, row in df.iterrows():
@@ -342,11 +78,6 @@ def generate_powerpoint_summary(df, thresholds_gini, thresholds_calibration, thr
             for paragraph in cell.text_frame.paragraphs:
                 for run in paragraph.runs:
                     run.font.size = Pt(11)
-                    # Check if color is in session state; if not, use default color
-                    if 'content_font_color' in st.session_state:
-                        run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                    else:
-                        run.font.color.rgb = RGBColor(0, 0, 0)
             
             if df.columns[col_idx] == 'Dev Gini':
                 if value > thresholds_gini['green_gini']['value']:
@@ -403,6 +134,7 @@ def generate_powerpoint_summary(df, thresholds_gini, thresholds_calibration, thr
     return prs
 
 # Function to create a download link for the Summary presentation
+@memoize_presentation
 def create_download_link_for_summary_ppt(df, thresholds_gini, thresholds_calibration, thresholds_psi):
     presentation = generate_powerpoint_summary(df, thresholds_gini, thresholds_calibration, thresholds_psi)
     ppt_stream = BytesIO()
@@ -410,61 +142,6 @@ def create_download_link_for_summary_ppt(df, thresholds_gini, thresholds_calibra
     ppt_stream.seek(0)
     return ppt_stream
 
-# Function to merge four PowerPoint presentations and apply title styling to specific slides
-def merge_presentations(presentation1, presentation2, presentation3):
-    merged_presentation = Presentation()
-    slide_index = 1  # To keep track of the slide index
-
-    # Copy slides from presentation1 (Overview) first
-    for slide in presentation1.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [1]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation2 (Change Log)
-    for slide in presentation2.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [2]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation3 (Summary)
-    for slide in presentation3.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 3
-        if merged_slide.shapes.title:
-            if slide_index in [3]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-      
-        slide_index += 1
-        
-    return merged_presentation
-
 # Streamlit app
 def app():
     st.markdown(
@@ -518,84 +195,8 @@ def app():
         st.error("Thresholds not found! Please set thresholds in the PSI module first.")
         st.stop()
     
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df = pd.read_excel(os.path.join(base_dir, 'Datasets', 'Summary_table.xlsx'))
-
-    # Function for formatting values
-    def format_value(val):
-        if isinstance(val, float):
-            # Format floats to 4 decimal places, remove trailing zeros and the dot if not needed
-            return f"{val:.4f}".rstrip('0').rstrip('.')
-        return str(val)
-
-    # Function for creating HTML table with conditional styling
-    def create_html_table_with_download(dataframe, file_name, image_path):
-        # Encode the image as base64
-        with open(image_path, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode()
-
-        # Create download link
-        download_link = f"""
-        <style>
-            .download-icon img {{
-                width: 70px;
-                height: 70px;
-                border-radius: 30%;  /* Makes the image circular */
-                transition: transform 0.3s ease, box-shadow 0.3s ease;
-            }}
-            .download-icon img:hover {{
-                transform: scale(1.1);  /* Slight zoom effect on hover */
-                box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
-            }}
-            .download-icon img:active {{
-                transform: scale(0.90);  /* Slight shrink effect on click */
-                box-shadow: none;  /* Remove shadow when clicked */
-            }}
-        </style>
-
-        <div class="download-icon">
-            <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{base64.b64encode(to_excel(dataframe)).decode()}" download="{file_name}" title="Click to download the file">
-                <img src="data:image/png;base64,{image_base64}" alt="Download Icon" style="width:27px; height:auto;">
-            </a>
-        </div>
-        """
-
-        # Create HTML table with inline styling
-        html_table = f"""
-        <div class="custom-container">
-            <table class="dataframe">
-                <thead><tr>
-        """
-        for col_name in dataframe.columns:
-            html_table += f'<th>{html.escape(col_name)}</th>'
-        html_table += '</tr></thead><tbody>'
-        for _, row in dataframe.iterrows():
-            html_table += '<tr>'
-            for col_name, col_value in row.items():
-                style = ''
-                formatted_value = format_value(col_value)  # Apply formatting
-                if col_name == 'Dev Gini':
-                    style = highlight_gini(col_value, thresholds_gini)
-                elif col_name == 'Calibration':
-                    style = highlight_gini_threshold1_calibration(col_value, thresholds_calibration) if col_value < 0 else highlight_gini_threshold2_calibration(col_value, thresholds_calibration)
-                elif col_name == 'PSI':
-                    style = highlight_gini_PSI(col_value, thresholds_psi)
-                html_table += f'<td style="{style}">{html.escape(formatted_value)}</td>'
-            html_table += '</tr>'
-        html_table += '</tbody></table></div>'
-
-        # Combine the download link and the table
-        return download_link + html_table
-
-    # Function to convert DataFrame to Excel
-    def to_excel(df):
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Sheet1')
-        return output.getvalue()
+    # Read the Excel file (parsed once and shared across sessions)
+    df = load_dataset('Summary_table.xlsx')
 
     # Optional: If you want to display custom CSS separately
     custom_css = """
@@ -657,8 +258,13 @@ def app():
     image_path = os.path.join(base_dir, 'Images', 'Download_icon.png')
 
     # Create HTML table and display it
-    html_table = create_html_table_with_download(df, "Summary_table.xlsx", image_path)
-    st.markdown(html_table, unsafe_allow_html=True)
+    # The Dev Gini, Calibration and PSI columns carry the RAG status of each metric
+    styles = {
+        'Dev Gini': highlight_gini_column(df['Dev Gini'], thresholds_gini),
+        'Calibration': highlight_calibration_column(df['Calibration'], thresholds_calibration),
+        'PSI': highlight_gini_PSI_column(df['PSI'], thresholds_psi),
+    }
+    show_table(df, "Summary_table.xlsx", image_path, table_to_excel, "summary_table", styles)
 
     # st.dataframe(df_styled, width=1200)
 
@@ -722,15 +328,21 @@ def app():
     if 'ppt_data_change_log' in st.session_state:
         ppt_data_change_log = st.session_state.ppt_data_change_log
     
+    # Function to build the Dashboard presentation, only run when the user asks for it
+    # Only the sections changed since the last Dashboard of the session are rebuilt
+    def build_dashboard(progress):
+        return assemble_presentation("dashboard", [
+            ("Overview", (ppt_data_overview,), lambda: ppt_data_overview),
+            ("Change Log", (ppt_data_change_log,), lambda: ppt_data_change_log),
+            ("Summary", (ppt_bytes,), lambda: ppt_bytes),
+        ], progress)
+    
+    merged_presentation_bytesio = None
     if ppt_data_overview and ppt_data_change_log and ppt_bytes:
-        presentation1 = load_presentation_from_bytesio(ppt_data_overview)
-        presentation2 = load_presentation_from_bytesio(ppt_data_change_log)
-        presentation3 = load_presentation_from_bytesio(ppt_bytes)
-        
-        merged_presentation = merge_presentations(presentation1, presentation2, presentation3)
-        merged_presentation_bytesio = BytesIO()
-        merged_presentation.save(merged_presentation_bytesio)
-        merged_presentation_bytesio.seek(0)
+        # The presentation is kept in the session until one of its inputs changes
+        merged_presentation_bytesio = lazy_download("dashboard_summary", build_dashboard, (ppt_data_overview, ppt_data_change_log, ppt_bytes), "Dashboard.pptx", "Click here to prepare the Dashboard PowerPoint presentation")
+    
+    if merged_presentation_bytesio is not None:
     
         # Base directory of the current script
         base_dir = os.path.dirname(__file__)
@@ -738,23 +350,22 @@ def app():
         # Construct the path for the image
         image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
         
-        # Read and encode the image to base64
-        with open(image_path, "rb") as image_file:
-            image_base64 = base64.b64encode(image_file.read()).decode()
+        # Serve the icon from the artifact store
+        image_url = file_url(image_path)
         
         # Convert BytesIO to bytes
         ppt_data_merged_bytes = merged_presentation_bytesio.getvalue()
         
-        # Encode the PPT data to base64
-        ppt_data_merged_base64 = base64.b64encode(ppt_data_merged_bytes).decode()
+        # Store the PPT file once under its content hash instead of embedding it in the page
+        ppt_data_merged_url = artifact_url(ppt_data_merged_bytes, "Dashboard.pptx")
         
         # Help text
         help_text = "Click here to download the Dashboard into PowerPoint presentation"
         
         # Create the HTML for the button with image and help text
         ppt_button_html = f"""
-        <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_merged_base64}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
-            <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+        <a href="{ppt_data_merged_url}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
+            <img src="{image_url}" alt="Download PPT">
         </a>
         """
         
@@ -0,0 +1,289 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import html
+import io
+import re
+import datetime
+import xlsxwriter
+from Artifacts import artifact_url, file_url, inputs_fingerprint
+
+
+# Background colours used for the Red / Amber / Green highlighting of the dashboard tables
+RAG_STYLES = ['background-color: green', 'background-color: orange', 'background-color: red']
+NO_RAG_STYLE = 'background-color: white'
+
+# Tables longer than this are shown one page at a time, with the sorting and filtering done on the server
+PAGINATE_ROWS = 500
+PAGE_SIZE = 100
+
+# Trailing zeros (and the dot left alone) of the 4 decimals format, one value per line
+TRAILING_ZEROS = re.compile(r'\.?0+$', re.M)
+
+# Characters replaced by html.escape
+HTML_SPECIAL = re.compile(r'[&<>"\']')
+
+# Fill of the Excel cells for the background colours of the table styles (white is left unfilled)
+EXCEL_FILLS = {'green': '#008000', 'orange': '#FFA500', 'red': '#FF0000'}
+BACKGROUND_COLOR = re.compile(r'background-color:\s*([^;]+)')
+
+# Header and date formats of pandas' to_excel, so the downloads look the same as before
+EXCEL_HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+EXCEL_DATETIME_FORMAT = 'YYYY-MM-DD HH:MM:SS'
+EXCEL_DATE_FORMAT = 'YYYY-MM-DD'
+
+
+# Function to format a whole column the way the dashboard tables do (floats to 4 decimals without trailing zeros)
+def format_column(values, format_floats=True, na_rep=None):
+    values = pd.Series(values)
+    if format_floats and values.dtype.kind == 'f':
+        # Whole float columns are formatted in one call, then the trailing zeros of every line are stripped at once
+        lines = ('%.4f\n' * len(values)) % tuple(values.tolist())
+        text = np.array(TRAILING_ZEROS.sub('', lines).split('\n')[:-1], dtype=object)
+    elif values.dtype.kind in 'iub':
+        text = values.astype(str).to_numpy(dtype=object)
+    elif format_floats:
+        # Mixed columns: only the float cells get the 4 decimals format
+        text = np.array([f"{value:.4f}".rstrip('0').rstrip('.') if isinstance(value, float) else str(value)
+                         for value in values.tolist()], dtype=object)
+    else:
+        text = np.array([str(value) for value in values.tolist()], dtype=object)
+
+    if na_rep is not None:
+        text[values.isna().to_numpy()] = na_rep
+    return text
+
+# Function to escape the HTML special characters of a whole column (same replacements as html.escape)
+def escape_column(text):
+    text = np.asarray(text, dtype=object)
+
+    # Only the cells holding a special character are escaped, numbers never need it
+    special = pd.Series(text, dtype=object).str.contains(HTML_SPECIAL, na=False).to_numpy()
+    if special.any():
+        text = text.copy()
+        text[special] = [html.escape(value) for value in text[special]]
+    return text
+
+# Function to tell whether the formatted text of a column can hold HTML special characters (formatted numbers cannot)
+def values_need_escaping(values, format_floats=True):
+    return not (values.dtype.kind in 'iub' or (format_floats and values.dtype.kind == 'f'))
+
+# Function to pick the Red / Amber / Green style of every value from three boolean masks (first match wins)
+def rag_styles(green, amber, red):
+    return np.select([np.asarray(green), np.asarray(amber), np.asarray(red)], RAG_STYLES, NO_RAG_STYLE).astype(object)
+
+# Function to keep a column of styles on some rows only (e.g. the Gini or PSI row of a table)
+def styles_on_rows(styles, rows):
+    return np.where(np.asarray(rows), np.asarray(styles, dtype=object), '')
+
+# Function to render the rows of a DataFrame as an HTML table
+# styles: {column: CSS string per row ('' for none)}; suffixes: {(row position, column): text appended to the cell}
+def render_table(dataframe, styles=None, suffixes=None, format_floats=True, na_rep=None):
+    n_rows = len(dataframe)
+    header = ''.join(f'<th>{html.escape(str(col_name))}</th>' for col_name in dataframe.columns)
+
+    rows = np.full(n_rows, '<tr>', dtype=object)
+    for position, col_name in enumerate(dataframe.columns):
+        text = format_column(dataframe.iloc[:, position], format_floats, na_rep)
+        for (row, column), extra in (suffixes or {}).items():
+            if column == col_name and extra:
+                text[row] = text[row] + extra
+        if values_need_escaping(dataframe.iloc[:, position], format_floats):
+            text = escape_column(text)
+
+        style = (styles or {}).get(col_name)
+        if style is None:
+            rows = rows + '<td>' + text + '</td>'
+        else:
+            style = np.broadcast_to(np.asarray(style, dtype=object), (n_rows,))
+            opening = np.where(style == '', '<td>', '<td style="' + style + '">')
+            rows = rows + opening + text + '</td>'
+
+    # Rows are built column by column above, so the body is a single join
+    body = '</tr>'.join(rows) + ('</tr>' if n_rows else '')
+    return f'<div class="custom-container"><table class="dataframe"><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table></div>'
+
+# Function to get the Excel fill colour of a CSS style of the tables (None for no fill)
+def _excel_fill(style):
+    match = BACKGROUND_COLOR.search(style or '')
+    if match is None:
+        return None
+    colour = match.group(1).strip()
+    return EXCEL_FILLS.get(colour, colour if colour.startswith('#') else None)
+
+# Function to write a table to an Excel file (bytes), with the Red / Amber / Green styles of the page as cell fills
+# The rows are streamed to the file one at a time (constant_memory), so large tables never sit in memory as cells
+def table_to_excel(dataframe, styles=None, header=True, sheet_name='Sheet1'):
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(sheet_name)
+
+    # One format per fill colour and number format, created on first use
+    formats = {}
+    def cell_format(fill, num_format=None):
+        if fill is None and num_format is None:
+            return None
+        if (fill, num_format) not in formats:
+            properties = {'num_format': num_format} if num_format else {}
+            if fill is not None:
+                properties.update({'bg_color': fill, 'pattern': 1})
+            formats[fill, num_format] = workbook.add_format(properties)
+        return formats[fill, num_format]
+
+    first_row = 0
+    if header:
+        header_format = workbook.add_format(EXCEL_HEADER_FORMAT)
+        for column, col_name in enumerate(dataframe.columns):
+            worksheet.write(0, column, str(col_name), header_format)
+        first_row = 1
+
+    # Fill colour of every row of the styled columns (None for the columns without styles)
+    n_rows = len(dataframe)
+    fills = []
+    for col_name in dataframe.columns:
+        style = (styles or {}).get(col_name)
+        if style is None:
+            fills.append(None)
+            continue
+        style = np.broadcast_to(np.asarray(style, dtype=object), (n_rows,))
+        fill_of = {value: _excel_fill(value) for value in set(style.tolist())}
+        fills.append([fill_of[value] for value in style.tolist()])
+
+    # Rows must be written in order, constant_memory flushes a row as soon as the next one starts
+    for offset, values in enumerate(dataframe.itertuples(index=False, name=None)):
+        row = first_row + offset
+        for column, value in enumerate(values):
+            fill = fills[column][offset] if fills[column] is not None else None
+            if value is None or value is pd.NaT or (isinstance(value, float) and value != value):
+                # Blank cells keep their fill
+                worksheet.write_blank(row, column, None, cell_format(fill))
+            elif isinstance(value, float) and value in (float('inf'), float('-inf')):
+                worksheet.write_string(row, column, 'inf' if value > 0 else '-inf', cell_format(fill))
+            elif isinstance(value, datetime.datetime):
+                worksheet.write_datetime(row, column, value, cell_format(fill, EXCEL_DATETIME_FORMAT))
+            elif isinstance(value, datetime.date):
+                worksheet.write_datetime(row, column, value, cell_format(fill, EXCEL_DATE_FORMAT))
+            else:
+                worksheet.write(row, column, value, cell_format(fill))
+
+    workbook.close()
+    return output.getvalue()
+
+# Function to build the Excel file of a table once per content, styles and writer (kept out of the page HTML)
+# The key is the fingerprint of the inputs, so the table is hashed once instead of by Streamlit on every call
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_excel_bytes(fingerprint, _dataframe, _styles, _to_excel):
+    return _to_excel(_dataframe, _styles)
+
+# Function to get the Excel file of a table, to_excel(dataframe, styles) writes it (table_to_excel for most pages)
+def _excel_bytes(dataframe, to_excel, styles=None):
+    writer_name = f"{to_excel.__module__}.{to_excel.__qualname__}"
+    return _cached_excel_bytes(inputs_fingerprint(writer_name, dataframe, styles), dataframe, styles, to_excel)
+
+# Function to create the download icon of a table, to_excel(dataframe, styles) returns the bytes of the Excel file (served from the artifact store)
+def download_link_html(dataframe, file_name, image_path, to_excel, styles=None):
+    return f"""
+    <style>
+        .download-icon img {{
+            width: 70px;
+            height: 70px;
+            border-radius: 30%;  /* Makes the image circular */
+            transition: transform 0.3s ease, box-shadow 0.3s ease;
+        }}
+        .download-icon img:hover {{
+            transform: scale(1.1);  /* Slight zoom effect on hover */
+            box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
+        }}
+        .download-icon img:active {{
+            transform: scale(0.90);  /* Slight shrink effect on click */
+            box-shadow: none;  /* Remove shadow when clicked */
+        }}
+    </style>
+
+    <div class="download-icon">
+        <a href="{artifact_url(_excel_bytes(dataframe, to_excel, styles), file_name)}" download="{file_name}" title="Click to download the file">
+            <img src="{file_url(image_path)}" alt="Download Icon" style="width:27px; height:auto;">
+        </a>
+    </div>
+    """
+
+# Function for creating HTML table and download link to download the table (shared by every page)
+def create_html_table_with_download(dataframe, file_name, image_path, to_excel, styles=None, suffixes=None,
+                                    format_floats=True, na_rep=None):
+    return download_link_html(dataframe, file_name, image_path, to_excel, styles) + render_table(dataframe, styles, suffixes, format_floats, na_rep)
+
+# Function to find the rows of a table matching a text filter, sorted on one column (positions into the table)
+def filter_sort_rows(dataframe, query='', sort_column=None, ascending=True, format_floats=True):
+    positions = np.arange(len(dataframe))
+
+    # Case-insensitive match of the query anywhere in the displayed text of a row
+    if query:
+        match = np.zeros(len(dataframe), dtype=bool)
+        for position in range(dataframe.shape[1]):
+            text = pd.Series(format_column(dataframe.iloc[:, position], format_floats), dtype=object)
+            match |= text.str.contains(query, case=False, regex=False, na=False).to_numpy()
+        positions = positions[match]
+
+    if sort_column is not None:
+        values = dataframe[sort_column].iloc[positions]
+        numbers = pd.to_numeric(values, errors='coerce')
+        # Numbers first in numeric order, then text in alphabetical order, blanks last whatever the direction
+        keys = pd.DataFrame({
+            'blank': (values.isna() | (values.astype(str) == '')).to_numpy(),
+            'text_only': numbers.isna().to_numpy(),
+            'number': numbers.to_numpy(dtype=float),
+            'text': values.astype(str).to_numpy(),
+        })
+        order = keys.sort_values(['blank', 'text_only', 'number', 'text'], ascending=[True, True, ascending, ascending],
+                                 kind='mergesort', na_position='last').index.to_numpy()
+        positions = positions[order]
+    return positions
+
+# Function to keep the styles and suffixes of the selected rows, renumbered in their new order
+def _slice_formatting(n_rows, positions, styles=None, suffixes=None):
+    sliced_styles = {}
+    for col_name, style in (styles or {}).items():
+        style = np.asarray(style, dtype=object)
+        sliced_styles[col_name] = style[positions] if style.ndim and len(style) == n_rows else style
+    new_position = {int(old): new for new, old in enumerate(positions)}
+    sliced_suffixes = {(new_position[row], col_name): text for (row, col_name), text in (suffixes or {}).items()
+                       if row in new_position}
+    return sliced_styles, sliced_suffixes
+
+# Function to show a table: small tables as one HTML table, large tables one page at a time with server-side sort and filter
+def show_table(dataframe, file_name, image_path, to_excel, key, styles=None, suffixes=None, format_floats=True,
+               na_rep=None, page_size=PAGE_SIZE):
+    if len(dataframe) <= PAGINATE_ROWS:
+        st.markdown(create_html_table_with_download(dataframe, file_name, image_path, to_excel, styles, suffixes,
+                                                    format_floats, na_rep), unsafe_allow_html=True)
+        return
+
+    filter_col, sort_col, order_col = st.columns([3, 2, 1])
+    query = filter_col.text_input("Filter rows", key=f"{key}_filter", placeholder="Type to filter the table")
+    columns = [str(col_name) for col_name in dataframe.columns]
+    sort_label = sort_col.selectbox("Sort by", ['(table order)'] + columns, key=f"{key}_sort")
+    descending = order_col.checkbox("Descending", key=f"{key}_descending")
+    sort_column = None if sort_label == '(table order)' else dataframe.columns[columns.index(sort_label)]
+    positions = filter_sort_rows(dataframe, query, sort_column, not descending, format_floats)
+
+    # A new filter can leave fewer pages than the page the user was on
+    n_pages = max(1, -(-len(positions) // page_size))
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = 1
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+
+    # Only the rows of the visible page are turned into HTML
+    visible = positions[(page - 1) * page_size:page * page_size]
+    page_styles, page_suffixes = _slice_formatting(len(dataframe), visible, styles, suffixes)
+    st.markdown(render_table(dataframe.iloc[visible], page_styles, page_suffixes, format_floats, na_rep), unsafe_allow_html=True)
+
+    first = (page - 1) * page_size + 1 if len(positions) else 0
+    st.caption(f"Rows {first:,}-{min(page * page_size, len(positions)):,} of {len(positions):,}"
+               + (f" (filtered from {len(dataframe):,})" if query else ""))
+
+    # The file is served on click instead of being embedded in the page
+    view = dataframe.iloc[positions]
+    view_styles, _ = _slice_formatting(len(dataframe), positions, styles)
+    st.download_button("Download Excel", _excel_bytes(view, to_excel, view_styles), file_name=file_name,
+                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key=f"{key}_download",
+                       help="Click to download the filtered and sorted table")
@@ -0,0 +1,180 @@
+import os
+from io import BytesIO
+from functools import lru_cache
+from lxml import etree
+from pptx import Presentation
+from pptx.util import Inches, Pt
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import PP_ALIGN
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import qn
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from Artifacts import CUSTOMIZATION_KEYS, customization_colours
+
+
+# Colours used when the PowerPoint Customization page was not used
+DEFAULT_COLOURS = {
+    'bg_color': '#06357A', 'font_color': '#FFFFFF', 'ribbon_color_1': '#FFBF00', 'ribbon_color_2': '#06357A',
+    'row_bg_color': '#008080', 'row_font_color': '#FFFFFF', 'content_font_color': '#000000', 'title_font_color': '#000000',
+    'ribbon_font_1': '#000000', 'ribbon_font_2': '#FFFFFF', 'ribbon_font_color': '#FFFFFF',
+}
+
+# Layouts of the template: title slides of a section and content slides (tables, graphs)
+TITLE_LAYOUT = 0
+CONTENT_LAYOUT = 5
+
+# Table style of the template (header row and grid in the palette colours)
+DASHBOARD_TABLE_STYLE = '{3F1C6A52-7D8E-4B5A-9C21-6E4D2B8A0F17}'
+
+# Title slide of a section (e.g. "PL - Scorecard Model Gini") and title of the content slides
+SECTION_TITLE_SIZE = 42
+CONTENT_TITLE_SIZE = 22
+
+RIBBON_HEIGHT = Inches(0.28)
+RIBBON_FONT_SIZE = 9
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), 'Images')
+
+
+# Function to get the colours of the current session (Customization page colours, else the defaults)
+def current_palette():
+    return tuple(colour or DEFAULT_COLOURS[name] for name, colour in zip(CUSTOMIZATION_KEYS, customization_colours()))
+
+# Function to get the RGBColor of a '#RRGGBB' colour
+def _rgb(colour):
+    return RGBColor.from_string(colour[1:])
+
+# Function to get the XML of text properties (tag a:rPr for a run, a:defRPr for a list style) in the given size and colour
+def _text_properties(tag, size, colour, bold=False):
+    return (f'<a:{tag} sz="{size * 100}" b="{int(bold)}">'
+            f'<a:solidFill><a:srgbClr val="{colour[1:].upper()}"/></a:solidFill></a:{tag}>')
+
+# Function to add a ribbon rectangle at the bottom of a slide
+# The text is written as runs, '{number}' becomes the slide number field so every slide shows its own position
+def _add_ribbon(slide, left, width, slide_height, fill_colour, text, font_colour, alignment):
+    shape = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, slide_height - RIBBON_HEIGHT, width, RIBBON_HEIGHT)
+    shape.fill.solid()
+    shape.fill.fore_color.rgb = _rgb(fill_colour)
+    shape.line.color.rgb = _rgb(fill_colour)
+
+    paragraph = shape.text_frame.paragraphs[0]
+    paragraph.alignment = alignment
+    run_properties = _text_properties('rPr', RIBBON_FONT_SIZE, font_colour)
+    before, _, after = text.partition('{number}')
+    elements = []
+    if before:
+        elements.append(f'<a:r>{run_properties}<a:t>{before}</a:t></a:r>')
+    if '{number}' in text:
+        elements.append(f'<a:fld id="{{B6F15528-21DE-4FAA-801E-634DDDAF4B2B}}" type="slidenum">{run_properties}<a:t>&#8249;#&#8250;</a:t></a:fld>')
+    if after:
+        elements.append(f'<a:r>{run_properties}<a:t>{after}</a:t></a:r>')
+    for element in elements:
+        paragraph._p.append(parse_xml(f'<root xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">{element}</root>')[0])
+    return shape
+
+# Function to style the title placeholder of a layout, the slides of the layout inherit position, size and colour
+def _style_layout_title(layout, left, top, width, height, size, colour, bold):
+    title = layout.placeholders[0]
+    title.left, title.top, title.width, title.height = left, top, width, height
+    text_body = title._element.txBody
+    list_style = text_body.find(qn('a:lstStyle'))
+    list_style.clear()
+    list_style.append(parse_xml(
+        f'<a:lvl1pPr xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+        f'{_text_properties("defRPr", size, colour, bold)}'
+        f'</a:lvl1pPr>'))
+
+# Function to move the shapes drawn on a scratch slide to its layout (pictures keep their image through a layout relationship)
+def _move_to_layout(slide, layout):
+    shape_tree = layout.shapes._spTree
+    # Shape ids have to be unique within the layout
+    next_shape_id = max(int(shape_id) for shape_id in shape_tree.xpath('.//p:cNvPr/@id')) + 1
+    for shape in list(slide.shapes):
+        if shape.is_placeholder:
+            continue
+        element = shape._element
+        element.xpath('./*[1]/p:cNvPr')[0].set('id', str(next_shape_id))
+        next_shape_id += 1
+        for blip in element.iter(qn('a:blip')):
+            image_part = slide.part.related_part(blip.get(qn('r:embed')))
+            blip.set(qn('r:embed'), layout.part.relate_to(image_part, RT.IMAGE))
+        shape_tree.append(element)
+
+# Function to add the table style of the palette to the table styles of the presentation
+def _add_table_style(prs, colours):
+    table_styles_part = prs.part.part_related_by(RT.TABLE_STYLES)
+    table_styles = etree.fromstring(table_styles_part.blob)
+    border = (f'<a:ln w="12700" cmpd="sng"><a:solidFill><a:srgbClr val="000000"/></a:solidFill></a:ln>')
+    table_styles.append(etree.fromstring(
+        f'<a:tblStyle xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" styleId="{DASHBOARD_TABLE_STYLE}" styleName="Dashboard">'
+        f'<a:wholeTbl>'
+        f'<a:tcTxStyle><a:fontRef idx="minor"><a:prstClr val="black"/></a:fontRef><a:srgbClr val="{colours["content_font_color"][1:]}"/></a:tcTxStyle>'
+        f'<a:tcStyle><a:tcBdr>'
+        + ''.join(f'<a:{side}>{border}</a:{side}>' for side in ('left', 'right', 'top', 'bottom', 'insideH', 'insideV')) +
+        f'</a:tcBdr><a:fill><a:noFill/></a:fill></a:tcStyle>'
+        f'</a:wholeTbl>'
+        f'<a:firstRow>'
+        f'<a:tcTxStyle><a:fontRef idx="minor"><a:prstClr val="black"/></a:fontRef><a:srgbClr val="{colours["row_font_color"][1:]}"/></a:tcTxStyle>'
+        f'<a:tcStyle><a:tcBdr/><a:fill><a:solidFill><a:srgbClr val="{colours["row_bg_color"][1:]}"/></a:solidFill></a:fill></a:tcStyle>'
+        f'</a:firstRow>'
+        f'</a:tblStyle>'))
+    table_styles_part._blob = etree.tostring(table_styles, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+# Function to build the template of a palette: layouts with the background, ribbons, logos and title styles, and the table style
+@lru_cache(maxsize=8)
+def _template_bytes(palette):
+    colours = dict(zip(CUSTOMIZATION_KEYS, palette))
+    prs = Presentation()
+    slide_width = prs.slide_width
+    slide_height = prs.slide_height
+
+    # Title slides: background colour, large centred title, logo and a full width ribbon with the slide number
+    title_layout = prs.slide_layouts[TITLE_LAYOUT]
+    subtitle = title_layout.placeholders[1]._element
+    subtitle.getparent().remove(subtitle)
+    title_layout.background.fill.solid()
+    title_layout.background.fill.fore_color.rgb = _rgb(colours['bg_color'])
+    _style_layout_title(title_layout, Inches(1), Inches(2.6), Inches(8), Inches(2), SECTION_TITLE_SIZE, colours['font_color'], True)
+    scratch = prs.slides.add_slide(title_layout)
+    scratch.shapes.add_picture(os.path.join(IMAGES_DIR, 'ENBD.jpg'), Inches(0.6), Inches(0.25), height=Inches(0.6))
+    _add_ribbon(scratch, 0, slide_width, slide_height, colours['bg_color'], " {number}\t", colours['ribbon_font_color'], PP_ALIGN.RIGHT)
+    _move_to_layout(scratch, title_layout)
+
+    # Content slides: title at the top, amber and blue ribbons with the slide number and the small logo
+    content_layout = prs.slide_layouts[CONTENT_LAYOUT]
+    _style_layout_title(content_layout, Inches(0.5), Inches(0.2), Inches(9), Inches(0.5), CONTENT_TITLE_SIZE, colours['title_font_color'], False)
+    scratch = prs.slides.add_slide(content_layout)
+    _add_ribbon(scratch, 0, slide_width // 2, slide_height, colours['ribbon_color_1'], "\tENBD Model Monitoring", colours['ribbon_font_1'], PP_ALIGN.LEFT)
+    _add_ribbon(scratch, slide_width // 2, slide_width // 2, slide_height, colours['ribbon_color_2'], " {number}\t", colours['ribbon_font_2'], PP_ALIGN.RIGHT)
+    scratch.shapes.add_picture(os.path.join(IMAGES_DIR, 'ENBD_s.jpg'), slide_width - Inches(0.6), Inches(0.15), height=Inches(0.45))
+    _move_to_layout(scratch, content_layout)
+
+    # The scratch slides were only used to draw the shapes
+    slide_id_list = prs.slides._sldIdLst
+    for slide_id in list(slide_id_list):
+        slide_id_list.remove(slide_id)
+        prs.part.drop_rel(slide_id.rId)
+
+    _add_table_style(prs, colours)
+
+    output = BytesIO()
+    prs.save(output)
+    return output.getvalue()
+
+# Function to start a presentation from the template of a palette (the colours of the session by default)
+def template_presentation(palette=None):
+    return Presentation(BytesIO(_template_bytes(palette or current_palette())))
+
+# Function to add a table in the template table style; only the text and its size are written per cell
+def add_styled_table(slide, rows, cols, left, top, width, height):
+    table = slide.shapes.add_table(rows, cols, left, top, width, height).table
+    table._tbl.tblPr.find(qn('a:tableStyleId')).text = DASHBOARD_TABLE_STYLE
+    return table
+
+# Function to write the text of a table cell in the given font size
+def set_cell_text(cell, text, font_size):
+    cell.text = text
+    for paragraph in cell.text_frame.paragraphs:
+        for run in paragraph.runs:
+            run.font.size = font_size
@@ -0,0 +1,105 @@
+import os
+import copy
+import pickle
+import tempfile
+import threading
+
+
+# Folder of the threshold files
+PKL_DIR = os.path.join(os.path.dirname(__file__), 'pkl')
+
+# Threshold file of every metric (pickles of the nested dicts the pages use)
+THRESHOLD_FILES = {'gini': 'model_gini.pkl', 'calibration': 'model_calibration.pkl', 'psi': 'model_psi.pkl'}
+
+# Thresholds held by the process: {metric: (thresholds or None, signature of the file they come from)}
+_thresholds = {}
+_thresholds_lock = threading.Lock()
+
+# Version of the thresholds, counts the changes seen by the process (saved here or written to the files by another process)
+_version = 0
+
+
+# Function to get the signature of a file (modification time and size), None when there is no file
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+# Function to get the thresholds of a metric held by the process, the file is only read again when it changed on disk
+# Must be called with the lock held
+def _current(metric):
+    global _version
+    path = os.path.join(PKL_DIR, THRESHOLD_FILES[metric])
+    signature = _file_signature(path)
+    if metric in _thresholds and _thresholds[metric][1] == signature:
+        return _thresholds[metric][0]
+
+    thresholds = None
+    if signature is not None:
+        try:
+            with open(path, 'rb') as f:
+                thresholds = pickle.load(f)
+        except (EOFError, pickle.UnpicklingError):
+            # A file cut short by a writer that was stopped, the thresholds held so far are kept
+            thresholds = _thresholds.get(metric, (None, None))[0]
+    if metric in _thresholds and _thresholds[metric][0] != thresholds:
+        _version += 1
+    _thresholds[metric] = (thresholds, signature)
+    return thresholds
+
+# Function to apply the values a page changed (those differing from the thresholds it was showing) on top of the current ones
+def _merge(current, thresholds, shown):
+    if current is None or shown is None:
+        return copy.deepcopy(thresholds)
+    merged = copy.deepcopy(current)
+    for group, values in thresholds.items():
+        for name, value in values.items():
+            if shown.get(group, {}).get(name) != value:
+                merged.setdefault(group, {})[name] = value
+    return merged
+
+# Function to get the thresholds of a metric ('gini', 'calibration' or 'psi'), None when they were never saved
+# The caller gets its own copy, so the thresholds held by the process cannot be changed by accident
+def load_thresholds(metric):
+    with _thresholds_lock:
+        return copy.deepcopy(_current(metric))
+
+# Function to save the thresholds of a metric, the file is only written when a value changed
+# shown is the thresholds the page loaded: only the values the user changed are applied on top of the saved thresholds,
+# so users changing different values at the same time do not undo each other's changes
+# The file is replaced in one step (temporary file, then rename), a reader never sees a half-written file
+# Returns True when the thresholds changed
+def save_thresholds(metric, thresholds, shown=None):
+    global _version
+    with _thresholds_lock:
+        current = _current(metric)
+        merged = _merge(current, thresholds, shown)
+        if merged == current:
+            return False
+
+        path = os.path.join(PKL_DIR, THRESHOLD_FILES[metric])
+        with tempfile.NamedTemporaryFile('wb', dir=PKL_DIR, prefix=f'.{THRESHOLD_FILES[metric]}.', delete=False) as f:
+            temporary_path = f.name
+            try:
+                pickle.dump(merged, f)
+                f.flush()
+                os.fsync(f.fileno())
+            except BaseException:
+                f.close()
+                os.remove(temporary_path)
+                raise
+        os.replace(temporary_path, path)
+
+        _thresholds[metric] = (merged, _file_signature(path))
+        _version += 1
+        return True
+
+# Function to get the version of the thresholds, caches of what depends on them (presentations, workbooks) can key on it
+# Read the version before the thresholds, so a change made in between is seen as a new version on the next run
+def thresholds_version():
+    with _thresholds_lock:
+        for metric in THRESHOLD_FILES:
+            _current(metric)
+        return _version
@@ -4,17 +4,7 @@ import io
 import pandas as pd
 import os
 import html
-import pickle
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.formatting.rule import Rule
-from openpyxl.styles.differential import DifferentialStyle
-import base64
-from openpyxl.formatting.rule import FormulaRule, IconSetRule, IconSet, FormatObject
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
+import itertools
 from io import BytesIO
 from pptx.util import Inches, Pt
 from pptx import Presentation
@@ -27,7 +17,16 @@ from streamlit_option_menu import option_menu
 # sys.path.append(project_root)
 
 # from Code import gini, Calibration, PSI, Summary, Data
-import Summary, gini, Calibration, PSI, Data, Customization
+import Summary, gini, Calibration, PSI, Data, Customization, Characteristic, KS, Rank_Ordering, DR_vs_PD
+from Loader import load_dataset_with_cells, MissingSheet
+from Tables import show_table, table_to_excel
+from Artifacts import artifact_url, file_url, lazy_download, memoize_presentation, rerun_while_preparing
+from Merge import assemble_presentation
+from Report import add_content_slide
+from Template import template_presentation, add_styled_table
+from Excel import patch_workbook
+from Formulas import template_formulas
+from Thresholds import load_thresholds, thresholds_version
 
 
 # Construct the path to the image
@@ -74,231 +73,15 @@ if 'df_change_log' not in st.session_state:
 def load_presentation_from_bytesio(presentation_bytesio):
     return Presentation(presentation_bytesio)
 
-# Function to apply title styling
-def style_title(title_shape):
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # Default color black
-            
-            
-# Function to apply title styling and background color
-def set_slide_background_and_title_style(slide, title_shape, slide_index):
-    
-    # Create presentation object
-    prs = Presentation()
-    
-    # Set background color
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    
-    #Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-
-    # Apply title styling
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(255, 255, 255)  # White font color
             
             
-# Function to clone shapes (including GraphicFrame and pictures)
-def clone_shape(original_shape, merged_slide):
-    if original_shape.shape_type == 14:  # Placeholder
-        ph = original_shape.placeholder_format
-        merged_slide.placeholders[ph.idx].text = original_shape.text
-    elif original_shape.shape_type == 13:  # Picture
-        image_stream = BytesIO(original_shape.image.blob)
-        left = original_shape.left
-        top = original_shape.top
-        width = original_shape.width
-        height = original_shape.height
-        merged_slide.shapes.add_picture(image_stream, left, top, width, height)
-    else:  # Other shapes (including GraphicFrame)
-        merged_shape = original_shape._element
-        merged_slide.shapes._spTree.append(merged_shape)
-    
-# Function to add a slide with the ribbon and logo
-def ppt_ribbon_and_logo(slide, slide_index):
-    # Create presentation object
-    prs = Presentation()
-    # Determine slide dimensions
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    # Calculate ribbon dimensions
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-
-    # Calculate positions for ribbons
-    ribbon_left = Inches(0)
-    ribbon_top = slide_height - ribbon_height
-
-    # Add the first half of the ribbon (amber)
-    shape_amber = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        fill_amber.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber color
-    else:
-        fill_amber.fore_color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    line_amber = shape_amber.line
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        line_amber.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber outline color
-    else:
-        line_amber.color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    # Add text to the amber ribbon
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_font_1' in st.session_state:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_1[1:])  # Black text
-    else:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)  # Black text
-
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'ribbon_color_2' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_color_2' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    # Add slide number
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_2' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_2[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.15)  # Adjust position as needed
-    logo_height = Inches(0.45)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-
 # Function to create a PowerPoint presentation for Change Log
 def create_change_log_presentation(df_change_log):
-    prs = Presentation()
-    
-    slide_index = 1  # To keep track of the slide index
+    prs = template_presentation()
 
-    # Add a slide with title and content layout
-    slide_layout = prs.slide_layouts[5]  # Use the blank layout
-    slide = prs.slides.add_slide(slide_layout)
+    # Change Log slide (title style, ribbons and logo come from the template)
+    slide = add_content_slide(prs, "Change Log")
     shapes = slide.shapes
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-
-    # Title slide
-    title_shape = shapes.title
-    title_shape.text = "Change Log"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Determine table size and position
     slide_width = prs.slide_width
@@ -308,31 +91,15 @@ def create_change_log_presentation(df_change_log):
     top = Inches(1.1)  # Center the table vertically
 
     rows, cols = df_change_log.shape
-    table_shape = shapes.add_table(rows + 1, cols, left, top, table_width, table_height)
-    table = table_shape.table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide, rows + 1, cols, left, top, table_width, table_height)
 
     # Set column names and font size
     for col_idx, col_name in enumerate(df_change_log.columns):
         cell = table.cell(0, col_idx)
         cell.text = col_name
-        cell.fill.solid()
-        # Check if color is in session state; if not, use default color
-        if 'row_bg_color' in st.session_state:
-            cell.fill.fore_color.rgb = RGBColor.from_string(st.session_state.row_bg_color[1:]) # Teal
-        else:
-            cell.fill.fore_color.rgb = RGBColor(0x00, 0x80, 0x80) # Teal
         for paragraph in cell.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(11.5)
-                # Check if color is in session state; if not, use default color
-                if 'row_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.row_font_color[1:])  # White font color
-                else:
-                    run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
                 
 
     # Adding data to table with font size set to 10
@@ -342,11 +109,6 @@ def create_change_log_presentation(df_change_log):
         for paragraph in cell1.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(11)
-                # Check if color is in session state; if not, use default color
-                if 'content_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                else:
-                    run.font.color.rgb = RGBColor(0, 0, 0)
                 
 
         cell2 = table.cell(i + 1, 1)
@@ -354,11 +116,6 @@ def create_change_log_presentation(df_change_log):
         for paragraph in cell2.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(11)
-                # Check if color is in session state; if not, use default color
-                if 'content_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                else:
-                    run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Set row heights
     for row in range(rows + 1):
@@ -367,6 +124,7 @@ def create_change_log_presentation(df_change_log):
     return prs
 
 # Function to create a download link for the Change Log presentation
+@memoize_presentation
 def create_download_link_for_change_log_ppt(df_change_log):
     presentation = create_change_log_presentation(df_change_log)
     ppt_stream = BytesIO()
@@ -375,37 +133,16 @@ def create_download_link_for_change_log_ppt(df_change_log):
     return ppt_stream
     
 #Function to create powerpoint presentation for overview  
+@memoize_presentation
 def create_ppt_overview_image(image_path):
     try:
         # Create a presentation object
-        prs = Presentation()
-        
-        slide_index = 1  # To keep track of the slide index
+        prs = template_presentation()
         
-        # Add a slide with title and content layout
-        slide_layout = prs.slide_layouts[5]  # Use the blank layout
-        slide = prs.slides.add_slide(slide_layout)
+        # Overview slide (title style, ribbons and logo come from the template)
+        slide = add_content_slide(prs, "Overview")
         shapes = slide.shapes
         
-        ppt_ribbon_and_logo(slide, slide_index)
-        
-        # Add and style title with a shorter height
-        title_shape = shapes.title
-        title_shape.text = "Overview"
-        title_shape.left = Inches(0.5)
-        title_shape.top = Inches(0.3)
-        title_shape.width = Inches(9)
-        title_shape.height = Inches(0.5)
-        title_text_frame = title_shape.text_frame
-        for paragraph in title_text_frame.paragraphs:
-            for run in paragraph.runs:
-                run.font.size = Pt(22)
-                # Check if color is in session state; if not, use default color
-                if 'title_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-                else:
-                    run.font.color.rgb = RGBColor(0, 0, 0)
-        
         # Open the image
         image = Image.open(image_path)
         
@@ -498,59 +235,19 @@ def inject_custom_styles():
 # Inject styles
 inject_custom_styles()
 
-# Function to merge four PowerPoint presentations and apply title styling to specific slides
-def merge_presentations(presentation1, presentation2):
-    merged_presentation = Presentation()
-    slide_index = 1  # To keep track of the slide index
-
-    # Copy slides from presentation1 (Overview) first
-    for slide in presentation1.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [1]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation2 (Change Log)
-    for slide in presentation2.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [2]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    return merged_presentation
-
 # Base directory of the current script
 base_dir = os.path.dirname(__file__)
 
 # Construct the full path to the image file
 image_path = os.path.join(base_dir, 'Images', 'NIMBUS_Uno.png')
 
-# Convert the image to base64 encoding
-with open(image_path, "rb") as img_file:
-    encoded_image = base64.b64encode(img_file.read()).decode()
+# Serve the logo from the artifact store instead of embedding it in every page
+encoded_image_url = file_url(image_path)
 
 # Merged CSS for header, sidebar, and additional elements
 st.markdown(f"""
 <style>
-    /* Custom header styling with embedded base64 image */
+    /* Custom header styling with the logo image */
     header[data-testid="stHeader"] {{
         background-color: rgb(39, 45, 85); /* Dark blue background */
         height: 55px; /* Adjust height of the header */
@@ -564,7 +261,7 @@ st.markdown(f"""
     /* Logo styling */
     header[data-testid="stHeader"]::before {{
         content: '';
-        background-image: url('data:image/png;base64,{encoded_image}'); /* Use base64 image */
+        background-image: url('{encoded_image_url}'); /* Use the logo image */
         background-repeat: no-repeat;
         background-size: contain;
         display: block;
@@ -690,7 +387,7 @@ class MultiApp:
             # Display metric selection in the main content area
             risk_metric = st.sidebar.selectbox(
                 'Select Metric',
-                options=['Gini', 'Calibration', 'PSI'],
+                options=['Gini', 'Calibration', 'PSI', 'Characteristic Analysis', 'KS', 'Rank Ordering', 'DR vs PD'],
                 index=0
             )
             app = risk_metric
@@ -744,23 +441,22 @@ class MultiApp:
             # Construct the path for the image
             image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
             
-            # Read and encode the image to base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
+            # Serve the icon from the artifact store
+            image_url = file_url(image_path)
             
             # Convert BytesIO to bytes
             ppt_data_overview_bytes = st.session_state.ppt_data_overview.getvalue()
             
-            # Encode the PPT data to base64
-            ppt_data_overview_base64 = base64.b64encode(ppt_data_overview_bytes).decode()
+            # Store the PPT file once under its content hash instead of embedding it in the page
+            ppt_data_overview_url = artifact_url(ppt_data_overview_bytes, "Overview.pptx")
             
             # Help text
             help_text = "Click here to download the PowerPoint presentation"
             
             # Create the HTML for the button with image and help text
             button_html = f"""
-            <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_overview_base64}" download="Overview.pptx" class="ppt-download-button" title="{help_text}">
-                <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+            <a href="{ppt_data_overview_url}" download="Overview.pptx" class="ppt-download-button" title="{help_text}">
+                <img src="{image_url}" alt="Download PPT">
             </a>
             """
             
@@ -772,19 +468,13 @@ class MultiApp:
 # =============================================================================
    
             
+            # Version of the thresholds, read before them so the workbook below is rebuilt when any of them changes
+            thresholds_version_workbook = thresholds_version()
+            
             #Threshods Gini
             def threshold_selection_gini():
-                # Base directory of the current script
-                base_dir = os.path.dirname(__file__)
-            
-                # Construct the path for the pickle file
-                pickle_path = os.path.join(base_dir, 'pkl', 'model_gini.pkl')
-            
-                try:
-                    with open(pickle_path, 'rb') as f:
-                        thresholds_gini = pickle.load(f)
-                except FileNotFoundError:
-                    thresholds_gini = None
+                # Thresholds held by the threshold store
+                thresholds_gini = load_thresholds('gini')
             
                 if thresholds_gini:
                     green_threshold = thresholds_gini['green_gini']['value']
@@ -805,17 +495,8 @@ class MultiApp:
             
             # Function to create the threshold selection UI
             def threshold_selection_calibration():
-                # Base directory of the current script
-                base_dir = os.path.dirname(__file__)
-            
-                # Construct the path for the pickle file
-                pickle_path = os.path.join(base_dir, 'pkl', 'model_calibration.pkl')
-            
-                try:
-                    with open(pickle_path, 'rb') as j:
-                        thresholds_calibration = pickle.load(j)
-                except FileNotFoundError:
-                    thresholds_calibration = None
+                # Thresholds held by the threshold store
+                thresholds_calibration = load_thresholds('calibration')
 
                 if thresholds_calibration:
                     green_threshold_1 = thresholds_calibration.get('green_calibration_1', {}).get('value', -0.075)
@@ -844,17 +525,8 @@ class MultiApp:
             
             # Function to create the threshold selection UI for PSI
             def threshold_selection_PSI():
-                # Base directory of the current script
-                base_dir = os.path.dirname(__file__)
-            
-                # Construct the path for the pickle file
-                pickle_path = os.path.join(base_dir, 'pkl', 'model_psi.pkl')
-            
-                try:
-                    with open(pickle_path, 'rb') as k:
-                        thresholds_psi = pickle.load(k)
-                except FileNotFoundError:
-                    thresholds_psi = None
+                # Thresholds held by the threshold store
+                thresholds_psi = load_thresholds('psi')
                     
                 if thresholds_psi:
                     green_threshold_psi = thresholds_psi['green_psi']['value']
@@ -882,13 +554,21 @@ class MultiApp:
             new_data_file_path = os.path.join(base_dir, 'Datasets', 'Support_2.xlsx')
             sheet_name = 'support'
             
+            # Cells of the support sheet holding the heading, subheading and report date
+            heading_cells = ('B1', 'B2', 'O17')
+            
+            
+            # Fill colors of the conditional formatting
+            fill_red = 'FF0000'
+            fill_amber = 'FFC107'
+            fill_green = '00B050'
             
-            # Define fill colors for conditional formatting
-            fill_red = PatternFill(start_color='FF0000', end_color='FF0000', fill_type='solid')
-            fill_amber = PatternFill(start_color='FFC107', end_color='FFC107', fill_type='solid')
-            fill_green = PatternFill(start_color='00B050', end_color='00B050', fill_type='solid')
+            # Icon set of the RAG status cells of the summary (-1 red, 0 amber, 1 green)
+            rag_icon_set = ('3Symbols2', (-1, 0, 1))
 
             # Check if the existing file exists
+            # Only the support sheet and the formatting of the Gini, Calibration, PSI and Summary sheets are rewritten,
+            # the other sheets of the template are copied as they are
             def update_support_sheet(existing_file_path, new_data_file_path, sheet_name):
                 # Check if the existing file exists
                 if not os.path.exists(existing_file_path):
@@ -899,346 +579,106 @@ class MultiApp:
                     return "Error: The Data recieved from Nimbus 'new_data_file_path' does not exist."
             
                 try:
-                    # Load the new data file and check if the sheet exists
-                    new_data_book = load_workbook(new_data_file_path, read_only=True)
-                    if sheet_name not in new_data_book.sheetnames:
+                    # Load the new data and its heading cells in one pass over the file (kept until the file changes)
+                    try:
+                        new_data_df, _ = load_dataset_with_cells(os.path.basename(new_data_file_path), sheet_name, heading_cells)
+                    except MissingSheet:
                         return f"Error: The sheet named '{sheet_name}' does not exist in 'new_data_file_path'."
                     
-                    # Load the new data into a pandas DataFrame
-                    new_data_df = pd.read_excel(new_data_file_path, sheet_name=sheet_name)
-            
-                    # Load existing workbook using openpyxl
-                    book = load_workbook(existing_file_path)
-            
-                    # Access the existing "Support" sheet
-                    if sheet_name in book.sheetnames:
-                        support_sheet = book[sheet_name]
-                    else:
-                        return f"Error: The sheet named '{sheet_name}' does not exist in {existing_file_path}."
-            
-                    # Clear the existing "Support" sheet
-                    support_sheet.delete_rows(1, support_sheet.max_row)
-            
-                    # Write the new data into the "Support" sheet
-                    for r in dataframe_to_rows(new_data_df, index=False, header=True):
-                        support_sheet.append(r)
-                        
-                    # Apply highlighting to cells K25 and K40 if the sheet is "GINI"
-                    if "5. Gini" in book.sheetnames:
-                        gini_sheet = book["5. Gini"]
+                    formula_rules = {}
+                    
+                    # Apply highlighting to cells K25 and K40 of the "Gini" sheet
+                    formula_rules["5. Gini"] = []
                     for cell in ['K25', 'K40']:
-                        gini_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'{cell}<={red_threshold}'],
-                                stopIfTrue=True,
-                                fill=fill_red
-                            )
-                        )
-                        gini_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}>{amber_lower}, {cell}<={amber_upper})'],
-                                stopIfTrue=True,
-                                fill=fill_amber
-                            )
-                        )
-                        gini_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'{cell}>{green_threshold}'],
-                                stopIfTrue=True,
-                                fill=fill_green
-                            )
-                        )
+                        formula_rules["5. Gini"] += [
+                            (cell, f'{cell}<={red_threshold}', fill_red),
+                            (cell, f'AND({cell}>{amber_lower}, {cell}<={amber_upper})', fill_amber),
+                            (cell, f'{cell}>{green_threshold}', fill_green),
+                        ]
                         
-                    # Apply highlighting to cells L23 and L38 if the sheet is "Calibration"
-                    if "8. Calibration" in book.sheetnames:
-                        Cal_sheet = book["8. Calibration"]
+                    # Apply highlighting to cells L23 and L38 of the "Calibration" sheet
+                    formula_rules["8. Calibration"] = []
                     for cell in ['L23', 'L38']:
-                        # Highlight in red if value is less than or equal to red_threshold and less than 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}<0, {cell}<{red_threshold_1})'],
-                                stopIfTrue=True,
-                                fill=fill_red
-                            )
-                        )
-                        # Highlight in amber if value is between amber_lower and amber_upper and less than 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}<0, {cell}>={amber_lower_1}, {cell}<={amber_upper_1})'],
-                                stopIfTrue=True,
-                                fill=fill_amber
-                            )
-                        )
-                        # Highlight in green if value is greater than green_threshold and less than 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}<0, {cell}>{green_threshold_1})'],
-                                stopIfTrue=True,
-                                fill=fill_green
-                            )
-                        )
-                        # Highlight in red if value is less than or equal to red_threshold and greater than or equal to 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}>=0, {cell}>{red_threshold_2})'],
-                                stopIfTrue=True,
-                                fill=fill_red
-                            )
-                        )
-                        # Highlight in amber if value is between amber_lower and amber_upper and greater than or equal to 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}>=0, {cell}>={amber_lower_2}, {cell}<={amber_upper_2})'],
-                                stopIfTrue=True,
-                                fill=fill_amber
-                            )
-                        )
-                        # Highlight in green if value is greater than green_threshold and greater than or equal to 0
-                        Cal_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}>=0, {cell}<{green_threshold_2})'],
-                                stopIfTrue=True,
-                                fill=fill_green
-                            )
-                        )
+                        formula_rules["8. Calibration"] += [
+                            # Negative values: red below red_threshold_1, amber between the amber bounds, green above green_threshold_1
+                            (cell, f'AND({cell}<0, {cell}<{red_threshold_1})', fill_red),
+                            (cell, f'AND({cell}<0, {cell}>={amber_lower_1}, {cell}<={amber_upper_1})', fill_amber),
+                            (cell, f'AND({cell}<0, {cell}>{green_threshold_1})', fill_green),
+                            # Positive values: red above red_threshold_2, amber between the amber bounds, green below green_threshold_2
+                            (cell, f'AND({cell}>=0, {cell}>{red_threshold_2})', fill_red),
+                            (cell, f'AND({cell}>=0, {cell}>={amber_lower_2}, {cell}<={amber_upper_2})', fill_amber),
+                            (cell, f'AND({cell}>=0, {cell}<{green_threshold_2})', fill_green),
+                        ]
                         
-                    # Apply highlighting to cells of row 36 if the sheet is "PSI"    
-                    if "10. PSI" in book.sheetnames:
-                        psi_sheet = book["10. PSI"]
+                    # Apply highlighting to cells of row 36 of the "PSI" sheet
+                    formula_rules["10. PSI"] = []
                     for cell in ['D36', 'E36', 'F36', 'G36', 'H36', 'I36', 'J36', 'K36', 'L36', 'M36', 'N36', 'O36', 'P36']:
-                        # Highlight in red if value is less than or equal to red_threshold and less than 0
-                        psi_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'{cell}>{red_threshold_psi}'],
-                                stopIfTrue=True,
-                                fill=fill_red
-                            )
-                        )
-                        # Highlight in amber if value is between amber_lower and amber_upper and less than 0
-                        psi_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'AND({cell}>{amber_lower_psi}, {cell}<={amber_upper_psi})'],
-                                stopIfTrue=True,
-                                fill=fill_amber
-                            )
-                        )
-                        # Highlight in green if value is greater than green_threshold and less than 0
-                        psi_sheet.conditional_formatting.add(
-                            cell,
-                            FormulaRule(
-                                formula=[f'{cell}<={green_threshold_psi}'],
-                                stopIfTrue=True,
-                                fill=fill_green
-                            )
-                        )
-                        
-                        # Load the workbook and select the summary sheet
-                        if "2. Summary" in book.sheetnames:
-                            summary_sheet = book["2. Summary"]
-                        
-                        # # Apply formula-based conditional formatting to cells K25 and K40
-                        # for cell in ['D15']:
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'{cell}<={red_threshold}'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_red
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}>{amber_lower}, {cell}<={amber_upper})'],
-                        #             stopIfTrue=True,
-                        #             fill= fill_amber
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'{cell}>{green_threshold}'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_green
-                        #         )
-                        #     )
-                            
-                            # Set formula in cell E15 based on the value of cell D15
-                            summary_sheet["E15"].value = (
-                                f'=IF(D15>{green_threshold}, 1, IF(AND(D15>{amber_lower}, D15<={amber_upper}), 0, IF(D15<={red_threshold}, -1, "")))'
-                            )
-
-                            # Apply icon set conditional formatting using the thresholds variable
-                            icon_set = IconSet(
-                                iconSet='3Symbols2',
-                                cfvo=[FormatObject(type='num', val=-1),
-                                      FormatObject(type='num', val=0),
-                                      FormatObject(type='num', val=1)],
-                                showValue=None,  # This can be True or False to show/hide values
-                                reverse=False,
-                            )
-                            dxf = DifferentialStyle()
-                            rule = Rule(type='iconSet', dxf=dxf, iconSet=icon_set)
-                            summary_sheet.conditional_formatting.add('E15', rule)
-                                                    
-                        # # Apply formula-based conditional formatting to cells L23 and L38
-                        # for cell in ['F15']:
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}<0, {cell}<{red_threshold_1})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_red
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}<0, {cell}>={amber_lower_1}, {cell}<={amber_upper_1})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_amber
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}<0, {cell}>{green_threshold_1})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_green
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}>=0, {cell}>{red_threshold_2})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_red
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}>=0, {cell}>={amber_lower_2}, {cell}<={amber_upper_2})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_amber
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}>=0, {cell}<{green_threshold_2})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_green
-                        #         )
-                        #     )
-                            
-                            # Set formula in cell G15 based on the value of cell F15
-                            summary_sheet["G15"].value = (
-                                f'=IF(AND(F15<{red_threshold_1},F15<0), -1, '
-                                f'IF(AND(F15>={amber_lower_1}, F15<={amber_upper_1}), 0, '
-                                f'IF(AND(F15>{green_threshold_1},F15<0), 1, '
-                                f'IF(AND(F15>{red_threshold_2}, F15>=0), -1, '
-                                f'IF(AND(F15>={amber_lower_2}, F15<={amber_upper_2}), 0, '
-                                f'IF(AND(F15<{green_threshold_2},F15>=0), 1, ""))))))'
-                            )
-                            
-                            # Apply icon set conditional formatting using the thresholds variable
-                            icon_set = IconSet(
-                                iconSet='3Symbols2',
-                                cfvo=[FormatObject(type='num', val=-1),
-                                      FormatObject(type='num', val=0),
-                                      FormatObject(type='num', val=1)],
-                                showValue=None,  # This can be True or False to show/hide values
-                                reverse=False,
-                            )
-                            dxf = DifferentialStyle()
-                            rule = Rule(type='iconSet', dxf=dxf, iconSet=icon_set)
-                            summary_sheet.conditional_formatting.add('G15', rule)
-                            
-                        
-                        # # Apply formula-based conditional formatting to cells of row 36
-                        # for cell in ['H15']:
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'{cell}>{red_threshold_psi}'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_red
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'AND({cell}>{amber_lower_psi}, {cell}<={amber_upper_psi})'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_amber
-                        #         )
-                        #     )
-                        #     summary_sheet.conditional_formatting.add(
-                        #         cell,
-                        #         FormulaRule(
-                        #             formula=[f'{cell}<={green_threshold_psi}'],
-                        #             stopIfTrue=True,
-                        #             fill=fill_green
-                        #         )
-                        #     )
-                            
-                            # Set formula in cell G15 based on the value of cell F15
-                            summary_sheet["I15"].value = (
-                                f'=IF(H15>{red_threshold_psi}, -1, '
-                                f'IF(AND(H15>{amber_lower_psi}, H15<={amber_upper_psi}), 0, '
-                                f'IF(H15<={green_threshold_psi}, 1, "")))'
-                            )
-                            
-                            # Apply icon set conditional formatting using the thresholds variable
-                            icon_set = IconSet(
-                                iconSet='3Symbols2',
-                                cfvo=[FormatObject(type='num', val=-1),
-                                      FormatObject(type='num', val=0),
-                                      FormatObject(type='num', val=1)],
-                                showValue=None,  # This can be True or False to show/hide values
-                                reverse=False,
-                            )
-                            dxf = DifferentialStyle()
-                            rule = Rule(type='iconSet', dxf=dxf, iconSet=icon_set)
-                            summary_sheet.conditional_formatting.add('I15', rule)
-                        
-                    # Save the updated workbook to a BytesIO object
-                    buffer = BytesIO()
-                    book.save(buffer)
-                    buffer.seek(0)
-            
-                    return buffer
+                        formula_rules["10. PSI"] += [
+                            (cell, f'{cell}>{red_threshold_psi}', fill_red),
+                            (cell, f'AND({cell}>{amber_lower_psi}, {cell}<={amber_upper_psi})', fill_amber),
+                            (cell, f'{cell}<={green_threshold_psi}', fill_green),
+                        ]
+                    
+                    # RAG status of Gini (E15), Calibration (G15) and PSI (I15) on the summary sheet, shown with the icon set
+                    cell_formulas = {"2. Summary": {
+                        "E15": f'=IF(D15>{green_threshold}, 1, IF(AND(D15>{amber_lower}, D15<={amber_upper}), 0, IF(D15<={red_threshold}, -1, "")))',
+                        "G15": (
+                            f'=IF(AND(F15<{red_threshold_1},F15<0), -1, '
+                            f'IF(AND(F15>={amber_lower_1}, F15<={amber_upper_1}), 0, '
+                            f'IF(AND(F15>{green_threshold_1},F15<0), 1, '
+                            f'IF(AND(F15>{red_threshold_2}, F15>=0), -1, '
+                            f'IF(AND(F15>={amber_lower_2}, F15<={amber_upper_2}), 0, '
+                            f'IF(AND(F15<{green_threshold_2},F15>=0), 1, ""))))))'
+                        ),
+                        "I15": (
+                            f'=IF(H15>{red_threshold_psi}, -1, '
+                            f'IF(AND(H15>{amber_lower_psi}, H15<={amber_upper_psi}), 0, '
+                            f'IF(H15<={green_threshold_psi}, 1, "")))'
+                        ),
+                    }}
+                    icon_sets = {"2. Summary": [(cell, *rag_icon_set) for cell in ['E15', 'G15', 'I15']]}
+                    
+                    # Rows of the "Support" sheet (header row first)
+                    def support_rows():
+                        return itertools.chain([list(new_data_df.columns)], new_data_df.itertuples(index=False, name=None))
+                    
+                    # Compute the formulas of the template with the new data and thresholds, so the workbook carries current values
+                    # (the session keeps the computed workbook, only the cells that depend on what changed are recomputed)
+                    workbook_formulas = template_formulas(existing_file_path)
+                    workbook_formulas.replace_sheet(sheet_name, support_rows())
+                    for formula_sheet, formulas in cell_formulas.items():
+                        workbook_formulas.set_formulas(formula_sheet, formulas)
+                    
+                    # Write the new data into the "Support" sheet and the formatting and formula values into the template
+                    return patch_workbook(existing_file_path, {sheet_name: support_rows()}, formula_rules, icon_sets, cell_formulas,
+                                          workbook_formulas.formula_values())
                 
-            
                 except Exception as e:
                     return f"Error: {e}"
             
-            # Load the Excel data from the BytesIO object and extract the heading
-            def load_excel_and_get_heading(excel_buffer):
-                book = load_workbook(excel_buffer, data_only=True)
-                support_sheet = book["support"]
-                heading = support_sheet['B1'].value
-                subheading = support_sheet['B2'].value
+            # Extract the heading from the support data (read together with the data by update_support_sheet)
+            def load_excel_and_get_heading(excel_path):
+                _, cells = load_dataset_with_cells(os.path.basename(excel_path), sheet_name, heading_cells)
+                heading = cells['B1']
+                subheading = cells['B2']
                 monitoring = 'Monitoring  Report Date'
-                date = support_sheet['O17'].value
+                date = cells['O17']
                 
                 return heading, subheading, monitoring, date
                     
                     
             # Update the support sheet and get the BytesIO buffer with the updated file
-            updated_file_buffer = update_support_sheet(existing_file_path, new_data_file_path, sheet_name)
+            # The workbook is kept in the session until the thresholds, the template or the support data change
+            workbook_inputs = (thresholds_version_workbook,
+                               *[(os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+                                 for path in (existing_file_path, new_data_file_path)])
+            kept_workbook = st.session_state.get('consolidated_workbook')
+            if kept_workbook is not None and kept_workbook[0] == workbook_inputs:
+                updated_file_buffer = BytesIO(kept_workbook[1])
+            else:
+                updated_file_buffer = update_support_sheet(existing_file_path, new_data_file_path, sheet_name)
+                if not isinstance(updated_file_buffer, str):
+                    st.session_state.consolidated_workbook = (workbook_inputs, updated_file_buffer.getvalue())
             
             # Display the result or provide a download button if the update was successful
             if isinstance(updated_file_buffer, str) and "Error" in updated_file_buffer:
@@ -1257,8 +697,8 @@ class MultiApp:
                 # Convert BytesIO to bytes
                 excel_data_bytes = updated_file_buffer.getvalue()
             
-                # Encode the Excel data to base64
-                excel_data_base64 = base64.b64encode(excel_data_bytes).decode()
+                # Store the Excel file once under its content hash instead of embedding it in the page
+                excel_data_url = artifact_url(excel_data_bytes, "Excel_template.xlsx")
             
                 # Base directory of the current script
                 base_dir = os.path.dirname(__file__)
@@ -1266,17 +706,16 @@ class MultiApp:
                 # Construct the path for the image
                 image_path = os.path.join(base_dir, "Images", "excel_logo.png")
                 
-                # Read and encode the image to base64
-                with open(image_path, "rb") as image_file:
-                    excel_image_base64 = base64.b64encode(image_file.read()).decode()
+                # Serve the icon from the artifact store
+                excel_image_url = file_url(image_path)
             
                 # Help text for the Excel button
                 help_text = "Click here to download the Consolidated Excel Workbook"
             
                 # Create the HTML for the Excel download button with image and help text
                 excel_button_html = f"""
-                <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{excel_data_base64}" download="Excel_template.xlsx" class="excel-download-button" title="{help_text}">
-                    <img src="data:image/png;base64,{excel_image_base64}" alt="Download Excel">
+                <a href="{excel_data_url}" download="Excel_template.xlsx" class="excel-download-button" title="{help_text}">
+                    <img src="{excel_image_url}" alt="Download Excel">
                 </a>
                 """
                 
@@ -1333,65 +772,6 @@ class MultiApp:
                 <div class="custom-date">{monitoring_date} {date}</div>
             """, unsafe_allow_html=True)
             
-            #Fucntion for creating HTML table and download link to downnload the table
-            def create_html_table_with_download(dataframe, file_name, image_path):
-
-                # Encode the image as base64
-                with open(image_path, "rb") as image_file:
-                    image_base64 = base64.b64encode(image_file.read()).decode()
-
-                # Create download link with hover and clicked effect
-                download_link = f"""
-                <style>
-                    .download-icon img {{
-                        width: 70px;
-                        height: 70px;
-                        border-radius: 30%;  /* Makes the image circular */
-                        transition: transform 0.3s ease, box-shadow 0.3s ease;
-                    }}
-                    .download-icon img:hover {{
-                        transform: scale(1.1);  /* Slight zoom effect on hover */
-                        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
-                    }}
-                    .download-icon img:active {{
-                        transform: scale(0.90);  /* Slight shrink effect on click */
-                        box-shadow: none;  /* Remove shadow when clicked */
-                    }}
-                </style>
-
-                <div class="download-icon">
-                    <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{base64.b64encode(to_excel(dataframe)).decode()}" download="{file_name}" title="Click to download the file">
-                        <img src="data:image/png;base64,{image_base64}" alt="Download Image" style="width:27px; height:auto;">
-                    </a>
-                </div>
-                """
-
-                html_table = f"""
-                <div class="custom-container">
-                    <table class="dataframe">
-                        <thead><tr>
-                """
-                for col_name in dataframe.columns:
-                    html_table += f'<th>{html.escape(col_name)}</th>'
-                html_table += '</tr></thead><tbody>'
-                for _, row in dataframe.iterrows():
-                    html_table += '<tr>'
-                    for col_value in row:
-                        html_table += f'<td>{html.escape(str(col_value))}</td>'
-                    html_table += '</tr>'
-                html_table += '</tbody></table></div>'
-
-                # Combine the download link and the table
-                return download_link + html_table
-
-            # Function to convert DataFrame to Excel
-            def to_excel(df):
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Sheet1')
-                processed_data = output.getvalue()
-                return processed_data
-
             custom_css = """
             <style>
                 .custom-container {
@@ -1451,8 +831,7 @@ class MultiApp:
             image_path = os.path.join(base_dir, 'Images', 'Download_icon.png')
 
             # df = df.drop(df.columns[0], axis=1)
-            html_table = create_html_table_with_download(st.session_state.df_change_log, "Change_log.xlsx", image_path)
-            st.markdown(html_table, unsafe_allow_html=True)
+            show_table(st.session_state.df_change_log, "Change_log.xlsx", image_path, table_to_excel, "change_log", format_floats=False)
 
             #Showing dataframe in streamlit
             # st.dataframe(st.session_state.df_change_log, width=1200)
@@ -1535,118 +914,107 @@ class MultiApp:
             if 'ppt_data_overview' in st.session_state:
                 ppt_data_overview = st.session_state.ppt_data_overview
             
+            # Function to build the Dashboard presentation, only run when the user asks for it
+            # Only the sections changed since the last Dashboard of the session are rebuilt
+            def build_dashboard(progress):
+                return assemble_presentation("dashboard", [
+                    ("Overview", (ppt_data_overview,), lambda: ppt_data_overview),
+                    ("Change Log", (ppt_data_change_log,), lambda: ppt_data_change_log),
+                ], progress)
+            
+            merged_presentation_bytesio = None
             if ppt_data_overview and ppt_data_change_log:
-                presentation1 = load_presentation_from_bytesio(ppt_data_overview)
-                presentation2 = load_presentation_from_bytesio(ppt_data_change_log)
-                
-                merged_presentation = merge_presentations(presentation1, presentation2)
-                merged_presentation_bytesio = BytesIO()
-                merged_presentation.save(merged_presentation_bytesio)
-                merged_presentation_bytesio.seek(0)
+                # The presentation is kept in the session until one of its inputs changes
+                merged_presentation_bytesio = lazy_download("dashboard_change_log", build_dashboard, (ppt_data_overview, ppt_data_change_log), "Dashboard.pptx", "Click here to prepare the Dashboard PowerPoint presentation")
             
+            if merged_presentation_bytesio is not None:
                 # Base directory of the current script
                 base_dir = os.path.dirname(__file__)
                 
                 # Construct the path for the image
                 image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
                 
-                # Read and encode the image to base64
-                with open(image_path, "rb") as image_file:
-                    image_base64 = base64.b64encode(image_file.read()).decode()
+                # Serve the icon from the artifact store
+                image_url = file_url(image_path)
                         
                 # Convert BytesIO to bytes
                 ppt_data_merged_bytes = merged_presentation_bytesio.getvalue()
                 
-                # Encode the PPT data to base64
-                ppt_data_merged_base64 = base64.b64encode(ppt_data_merged_bytes).decode()
+                # Store the PPT file once under its content hash instead of embedding it in the page
+                ppt_data_merged_url = artifact_url(ppt_data_merged_bytes, "Dashboard.pptx")
                 
                 # Help text
                 help_text = "Click here to download the Dashboard into PowerPoint presentation"
                 
                 # Create the HTML for the button with image and help text
                 ppt_button_html = f"""
-                <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_merged_base64}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
-                    <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+                <a href="{ppt_data_merged_url}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
+                    <img src="{image_url}" alt="Download PPT">
                 </a>
                 """
                 
                 # Display the custom download button in Streamlit
                 st.markdown(ppt_button_html, unsafe_allow_html=True)
+            
+            # Check if the updated workbook is available in session state
+            if "updated_workbook" in st.session_state:
+                buffer = st.session_state.updated_workbook
+            
+                # Check if new_entry_df is stored in session state
+                if 'new_entry_df' in st.session_state and st.session_state.entry_added:
+                    new_entry_df = st.session_state.new_entry_df
+                    
+                    # Append new entry to the change log sheet, the other sheets (and the values of their formulas) are copied as they are
+                    buffer = patch_workbook(buffer, appended_rows={"1. Change_Log": new_entry_df.values.tolist()})
+            
+                    # Update the session state with the modified workbook
+                    st.session_state.updated_workbook = buffer
+                    
+                    # Reset the entry_added flag after saving
+                    st.session_state.entry_added = False
                 
+                # Convert BytesIO to bytes
+                excel_data_bytes = buffer.getvalue()
+            
+                # Store the Excel file once under its content hash instead of embedding it in the page
+                excel_data_url = artifact_url(excel_data_bytes, "Excel_template.xlsx")
+            
+                # Base directory of the current script
+                base_dir = os.path.dirname(__file__)
                 
-                # Check if the updated workbook is available in session state
-                if "updated_workbook" in st.session_state:
-                    buffer = st.session_state.updated_workbook
-                
-                    # Load the workbook from the buffer
-                    book = load_workbook(buffer)
+                # Construct the path for the image
+                image_path = os.path.join(base_dir, "Images", "excel_logo.png")
                 
-                    # Access the change log sheet and modify cell A26
-                    if "1. Change_Log" in book.sheetnames:
-                        change_log_sheet = book["1. Change_Log"]
-                        
-                        # Check if new_entry_df is stored in session state
-                        if 'new_entry_df' in st.session_state and st.session_state.entry_added:
-                            new_entry_df = st.session_state.new_entry_df
-                            
-                            # Append new entry to the change log sheet
-                            for i, row in new_entry_df.iterrows():
-                                change_log_sheet.append(row.tolist())
+                # Serve the icon from the artifact store
+                excel_image_url = file_url(image_path)
+            
+                # Help text for the Excel button
+                help_text = "Click here to download the Consolidated Excel Workbook"
+            
+                # Create the HTML for the Excel download button with image and help text
+                excel_button_html = f"""
+                <a href="{excel_data_url}" download="Excel_template.xlsx" class="excel-download-button" title="{help_text}">
+                    <img src="{excel_image_url}" alt="Download Excel">
+                </a>
+                """
+                #Saving button in session state so that we can use it in another module
+                st.session_state.excel_button_html = excel_button_html
                 
-                        # Save the workbook back to the buffer
-                        buffer = BytesIO()
-                        book.save(buffer)
-                        buffer.seek(0)
+                custom_css = """
+                    <style>
+                        .excel-download-button {
+                            position: absolute;
+                            top: -57px;
+                            left: 90px;
+                            cursor: pointer;
+                            z-index: 10;
+                        }
+                    </style>
+                    """
+                st.markdown(custom_css, unsafe_allow_html=True)
                 
-                        # Update the session state with the modified workbook
-                        st.session_state.updated_workbook = buffer
-                        
-                        # Convert BytesIO to bytes
-                        excel_data_bytes = buffer.getvalue()
-                    
-                        # Encode the Excel data to base64
-                        excel_data_base64 = base64.b64encode(excel_data_bytes).decode()
-                    
-                        # Base directory of the current script
-                        base_dir = os.path.dirname(__file__)
-                        
-                        # Construct the path for the image
-                        image_path = os.path.join(base_dir, "Images", "excel_logo.png")
-                        
-                        # Read and encode the image to base64
-                        with open(image_path, "rb") as image_file:
-                            excel_image_base64 = base64.b64encode(image_file.read()).decode()
-                    
-                        # Help text for the Excel button
-                        help_text = "Click here to download the Consolidated Excel Workbook"
-                    
-                        # Create the HTML for the Excel download button with image and help text
-                        excel_button_html = f"""
-                        <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{excel_data_base64}" download="Excel_template.xlsx" class="excel-download-button" title="{help_text}">
-                            <img src="data:image/png;base64,{excel_image_base64}" alt="Download Excel">
-                        </a>
-                        """
-                        #Saving button in session state so that we can use it in another module
-                        st.session_state.excel_button_html = excel_button_html
-                        
-                        custom_css = """
-                            <style>
-                                .excel-download-button {
-                                    position: absolute;
-                                    top: -57px;
-                                    left: 90px;
-                                    cursor: pointer;
-                                    z-index: 10;
-                                }
-                            </style>
-                            """
-                        st.markdown(custom_css, unsafe_allow_html=True)
-                        
-                        # Display the custom Excel download button in Streamlit
-                        st.markdown(excel_button_html, unsafe_allow_html=True)
-                        
-                        # Reset the entry_added flag after saving
-                        st.session_state.entry_added = False
+                # Display the custom Excel download button in Streamlit
+                st.markdown(excel_button_html, unsafe_allow_html=True)
                      
 
         else:
@@ -1662,7 +1030,14 @@ if __name__ == "__main__":
     multi_app.add_app("Gini", gini)
     multi_app.add_app("Calibration", Calibration)
     multi_app.add_app("PSI", PSI)
+    multi_app.add_app("Characteristic Analysis", Characteristic)
+    multi_app.add_app("KS", KS)
+    multi_app.add_app("Rank Ordering", Rank_Ordering)
+    multi_app.add_app("DR vs PD", DR_vs_PD)
     multi_app.add_app("Data", Data)
     multi_app.add_app("PPT Customization", Customization)
 
     multi_app.run()
+    
+    # Downloads built in the background appear once they are done
+    rerun_while_preparing()
@@ -0,0 +1,48 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# Threads building the downloads (presentations, workbooks) in the background of the pages
+BACKGROUND_WORKERS = 4
+
+# Process pool shared by the batch engines of the app (created on first use)
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+# Thread pools of the app by name (created on first use)
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+
+
+# Function to get the shared process pool, started with 'spawn' so workers never inherit the app's threads
+def get_process_pool(workers=None):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                                mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+        return _process_pool
+
+# Function to get a named thread pool, shared by every session
+def get_thread_pool(name, workers):
+    with _thread_pools_lock:
+        if name not in _thread_pools:
+            _thread_pools[name] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+            atexit.register(_thread_pools[name].shutdown, wait=False, cancel_futures=True)
+        return _thread_pools[name]
+
+# Function to run a task in the background for the current session
+# The task sees the session of the page that submitted it (st.session_state, the Customization colours)
+def submit_background(task, *args):
+    # Imported here, the process workers import this module without Streamlit
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    ctx = get_script_run_ctx()
+
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return task(*args)
+    return get_thread_pool("background", BACKGROUND_WORKERS).submit(run)
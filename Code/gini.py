@@ -1,12 +1,10 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import plotly.io as pio
 import io
 import os
 import html
-from pptx.enum.shapes import MSO_SHAPE
-from pptx.enum.text import PP_ALIGN
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
 from pptx import Presentation
@@ -14,115 +12,23 @@ from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
 from streamlit_modal import Modal
 from io import BytesIO
-import base64
-import pickle
+from Loader import load_dataset
+from Metrics import score_counts, gini_table, gini_curve, compare_gini, score_histogram, gini_from_histogram, rebucket_counts, thin_curve
+from Bootstrap import bootstrap_intervals, delong_interval, format_interval
+from Tables import show_table, table_to_excel, rag_styles, styles_on_rows
+from Thresholds import load_thresholds, save_thresholds
+from Artifacts import artifact_url, file_url, lazy_download, memoize_presentation
+from Merge import assemble_presentation
+from Report import add_title_slide, add_content_slide
+from Template import template_presentation, add_styled_table
+from Charts import figure_png_future, png_bytes
 
 
 # Function to load a PowerPoint presentation from BytesIO
 def load_presentation_from_bytesio(presentation_bytesio):
     return Presentation(presentation_bytesio)
 
-# Function to apply title styling
-def style_title(title_shape):
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)  # Default color black
-
-# Function to apply title styling and background color
-def set_slide_background_and_title_style(slide, title_shape, slide_index):
-    
-    # Create presentation object
-    prs = Presentation()
-    
-    # Set background color
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    
-    #Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position 
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame  
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-
-    # Apply title styling
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
-            
             
-# Function to clone shapes (including GraphicFrame and pictures)
-def clone_shape(original_shape, merged_slide):
-    if original_shape.shape_type == 14:  # Placeholder
-        ph = original_shape.placeholder_format
-        merged_slide.placeholders[ph.idx].text = original_shape.text
-    elif original_shape.shape_type == 13:  # Picture
-        image_stream = BytesIO(original_shape.image.blob)
-        left = original_shape.left
-        top = original_shape.top
-        width = original_shape.width
-        height = original_shape.height
-        merged_slide.shapes.add_picture(image_stream, left, top, width, height)
-    else:  # Other shapes (including GraphicFrame)
-        merged_shape = original_shape._element
-        merged_slide.shapes._spTree.append(merged_shape)
-
 # Function to highlight Gini value based on user-defined thresholds
 def highlight_gini(val, thresholds_gini):
     val = float(val)
@@ -136,6 +42,13 @@ def highlight_gini(val, thresholds_gini):
         color = 'white'
     return f'background-color: {color}'
 
+# Function to highlight a whole column of Gini values at once (same bands as highlight_gini)
+def highlight_gini_column(values, thresholds_gini):
+    val = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    return rag_styles(val > thresholds_gini['green_gini']['value'],
+                      (thresholds_gini['amber_gini']['lower'] < val) & (val <= thresholds_gini['amber_gini']['upper']),
+                      val <= thresholds_gini['red_gini']['value'])
+
 # # Function to create an Excel file with highlighted cells
 # def to_excel_with_highlights_gini(df, thresholds_gini):
 #     output = io.BytesIO()
@@ -166,207 +79,17 @@ def highlight_gini(val, thresholds_gini):
 #     workbook.save(output)
 #     return output.getvalue()
 
-# Function to add a slide with the ribbon and logo
-def ppt_ribbon_and_logo(slide, slide_index):
-    # Create presentation object
-    prs = Presentation()
-    # Determine slide dimensions
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-
-    # Calculate ribbon dimensions
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-
-    # Calculate positions for ribbons
-    ribbon_left = Inches(0)
-    ribbon_top = slide_height - ribbon_height
-
-    # Add the first half of the ribbon (amber)
-    shape_amber = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_amber = shape_amber.fill
-    fill_amber.solid()
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        fill_amber.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber color
-    else:
-        fill_amber.fore_color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    line_amber = shape_amber.line
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_color_1' in st.session_state:
-        line_amber.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_1[1:])  # Amber outline color
-    else:
-        line_amber.color.rgb = RGBColor(255, 191, 0)  # Amber color
-
-    # Add text to the amber ribbon
-    text_frame_amber = shape_amber.text_frame
-    text_frame_amber.text = "\tENBD Model Monitoring"
-    text_frame_amber.paragraphs[0].font.size = Pt(9)
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_font_1' in st.session_state:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_1[1:])  # Black text
-    else:
-        text_frame_amber.paragraphs[0].font.color.rgb = RGBColor(0, 0, 0)  # Black text
-
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = half_ribbon_width  # Adjust the left position for the second half
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, half_ribbon_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if olor is in session state; if not, use default color
-    if 'ribbon_color_2' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-
-    line_blue = shape_blue.line
-    # Check if title_font_color is in session state; if not, use default color black
-    if 'ribbon_color_2' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.ribbon_color_2[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    # Add slide number
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    half_ribbon_width = slide_width / 2
-    ribbon_top = slide_height - ribbon_height
-    
-    text_frame = shape_blue.text_frame
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_2' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_2[1:])  # White text
-    else:
-        p.font.color.rgb = RGBColor(255, 255, 255)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-    
-
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD_s.jpg')  # Replace with your actual file path
-    logo_left = slide_width - Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.15)  # Adjust position as needed
-    logo_height = Inches(0.45)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-    
 #Creating ppt for gini
-def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment):
-    prs = Presentation()
-    
-    slide_index = 1  # To keep track of the slide index
+@memoize_presentation
+def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment, intervals=None):
+    prs = template_presentation()
 
-    # Title slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
-    
-    # Set the background color to the slide
-    background = slide.background
-    fill = background.fill
-    fill.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])
-    else:
-        fill.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)
-    shapes = slide.shapes
-    title_shape = shapes.title
-    title_shape.text = "PL - Scorecard Model Gini"
-    title_shape.left = Inches(1)
-    title_shape.top = Inches(2.6)  # Centered vertically
-    title_shape.width = Inches(8)
-    title_shape.height = Inches(2)
-    
-    # Add logo image to the upper right corner
-    base_dir = os.path.dirname(__file__)
-    
-    # Logo path
-    logo_path = os.path.join(base_dir, 'Images', 'ENBD.jpg')  # Replace with your actual file path
-    logo_left = Inches(0.6)  # Adjust position as needed
-    logo_top = Inches(0.25)  # Adjust position as needed
-    logo_height = Inches(0.6)  # Adjust size as needed
-    slide.shapes.add_picture(logo_path, logo_left, logo_top, height=logo_height)
-    
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(42)
-            run.font.bold = True
-            # Check if color is in session state; if not, use default color
-            if 'font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.font_color[1:])  # White font color
-            else:
-                run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White font color
-         
-   # Add slide number to title slide
-    slide_width = prs.slide_width
-    slide_height = prs.slide_height
-    ribbon_height = Inches(0.28)  # Adjust height as needed
-    ribbon_top = slide_height - ribbon_height
-    
-    # Add the second half of the ribbon (dark blue)
-    ribbon_left = 0  # Adjust the position
-    shape_blue = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, ribbon_left, ribbon_top, slide_width, ribbon_height
-    )
-    fill_blue = shape_blue.fill
-    fill_blue.solid()
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        fill_blue.fore_color.rgb = RGBColor.from_string(st.session_state.bg_color[1:])  # Dark blue color
-    else:
-        fill_blue.fore_color.rgb = RGBColor(0x06, 0x35, 0x7A)  # Dark blue color
-    line_blue = shape_blue.line
-    # Check if color is in session state; if not, use default color
-    if 'bg_color' in st.session_state:
-        line_blue.color.rgb = RGBColor.from_string(st.session_state.bg_color[1:]) # Dark blue outline color
-    else:
-        line_blue.color.rgb = RGBColor(0x06, 0x35, 0x7A) # Dark blue outline color
-    
-    text_frame = shape_blue.text_frame    
-    text_frame.text = f" {slide_index}\t"
-    p = text_frame.paragraphs[0]
-    p.font.size = Pt(9)
-    # Check if color is in session state; if not, use default color
-    if 'ribbon_font_color' in st.session_state:
-        p.font.color.rgb = RGBColor.from_string(st.session_state.ribbon_font_color[1:])
-    else:
-        p.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)  # White text
-    p.alignment = PP_ALIGN.RIGHT  # Align text to the right
-            
-    slide_index += 1
+    # Title slide (background, logo, ribbon and title style come from the template)
+    add_title_slide(prs, "PL - Scorecard Model Gini")
 
     # Data Table slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide = add_content_slide(prs, "Gini calculation")
     shapes = slide.shapes
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-
-    # Add and style title with a shorter height
-    title_shape = shapes.title
-    title_shape.text = "Gini calculation"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Determine table size and position
     left = Inches(0.5)
@@ -375,30 +98,15 @@ def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment)
     height = Inches(5)  # Adjusted to fit the table within the slide
 
     rows, cols = df.shape
-    table = shapes.add_table(rows + 1, cols, left, top, width, height).table
-    table_style_id = table._tbl.tblPr.find(
-        "{http://schemas.openxmlformats.org/drawingml/2006/main}tableStyleId"
-    )
-    table_style_id.text = "{5940675A-B579-460E-94D1-54222C63F5DA}"
+    table = add_styled_table(slide, rows + 1, cols, left, top, width, height)
 
     # Set column names and font size
     for col_idx, col_name in enumerate(df.columns):
         cell = table.cell(0, col_idx)
         cell.text = col_name
-        cell.fill.solid()
-        # Check if color is in session state; if not, use default color
-        if 'row_bg_color' in st.session_state:
-            cell.fill.fore_color.rgb = RGBColor.from_string(st.session_state.row_bg_color[1:]) # Teal
-        else:
-            cell.fill.fore_color.rgb = RGBColor(0x00, 0x80, 0x80) # Teal
         for paragraph in cell.text_frame.paragraphs:
             for run in paragraph.runs:
                 run.font.size = Pt(10)
-                # Check if color is in session state; if not, use default color
-                if 'row_font_color' in st.session_state:
-                    run.font.color.rgb = RGBColor.from_string(st.session_state.row_font_color[1:])  # White font color
-                else:
-                    run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
                 
     # Add data to table and set font size
     for row_idx, row in df.iterrows():
@@ -409,14 +117,12 @@ def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment)
                 cell.text = f"{value:.4f}".rstrip('0').rstrip('.')
             else:
                 cell.text = str(value)
+            # Confidence interval under the Gini value
+            if intervals is not None and row_idx == len(df) - 1 and col_idx == df.columns.get_loc('Gini Area'):
+                cell.text += "\n" + format_interval(intervals).strip()
             for paragraph in cell.text_frame.paragraphs:
                 for run in paragraph.runs:
                     run.font.size = Pt(10)
-                    # Check if color is in session state; if not, use default color
-                    if 'content_font_color' in st.session_state:
-                        run.font.color.rgb = RGBColor.from_string(st.session_state.content_font_color[1:])
-                    else:
-                        run.font.color.rgb = RGBColor(0, 0, 0)
                         
             if row_idx == len(df) - 1 and col_idx == df.columns.get_loc('Gini Area'):
                 if value > thresholds_gini['green_gini']['value']:
@@ -442,32 +148,13 @@ def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment)
         for run in paragraph.runs:
             run.font.size = Pt(14)
     
-    slide_index += 1
 
     # Chart slide
-    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide = add_content_slide(prs, "Graph")
     shapes = slide.shapes
-    
-    ppt_ribbon_and_logo(slide, slide_index)
-    
-    title_shape = shapes.title
-    title_shape.text = "Graph"
-    title_shape.left = Inches(0.5)
-    title_shape.top = Inches(0.2)
-    title_shape.width = Inches(9)
-    title_shape.height = Inches(0.5)
-    title_text_frame = title_shape.text_frame
-    for paragraph in title_text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.size = Pt(22)
-            # Check if color is in session state; if not, use default color
-            if 'title_font_color' in st.session_state:
-                run.font.color.rgb = RGBColor.from_string(st.session_state.title_font_color[1:])
-            else:
-                run.font.color.rgb = RGBColor(0, 0, 0)
 
     # Add chart image
-    image_stream = io.BytesIO(fig_bytes)
+    image_stream = io.BytesIO(png_bytes(fig_bytes))
     shapes.add_picture(image_stream, Inches(0.6), Inches(0.8), Inches(8.8), Inches(4.5))
 
     # Add graph comment
@@ -488,17 +175,8 @@ def create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment)
 
 # Function to create the threshold selection UI for Gini and save thresholds
 def threshold_selection_gini(show_ui=True):
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-
-    # Construct the path for the pickle file
-    file_path = os.path.join(base_dir, 'pkl', 'model_gini.pkl')
-
-    try:
-        with open(file_path, 'rb') as f:
-            thresholds_gini = pickle.load(f)
-    except FileNotFoundError:
-        thresholds_gini = None
+    # Thresholds held by the threshold store (None if they were never saved)
+    thresholds_gini = load_thresholds('gini')
 
     if thresholds_gini:
         green_threshold = thresholds_gini['green_gini']['value']
@@ -552,20 +230,13 @@ def threshold_selection_gini(show_ui=True):
             with c3:
                 st.markdown('<p style="font-size:19px;"><b>Action Required</b></p>', unsafe_allow_html=True)
 
-        # Save thresholds to file
+        # Save thresholds to file (only written when a value changed)
         threshold = {
             'green_gini': {'value': green_threshold},
             'amber_gini': {'lower': amber_lower, 'upper': amber_upper},
             'red_gini': {'value': red_threshold}
         }
-        # Base directory of the current script
-        base_dir = os.path.dirname(__file__)
-        
-        # Construct the path for the pickle file
-        file_path = os.path.join(base_dir, 'pkl', 'model_gini.pkl')
-        
-        with open(file_path, 'wb') as f:
-            pickle.dump(threshold, f)
+        save_thresholds('gini', threshold, thresholds_gini)
 
     return {
         'green_gini': {'value': green_threshold},
@@ -573,86 +244,60 @@ def threshold_selection_gini(show_ui=True):
         'red_gini': {'value': red_threshold}
     }
 
-def create_ppt_download_button_gini(df, fig_bytes, thresholds_gini, data_comment="", graph_comment=""):
+def create_ppt_download_button_gini(df, fig_bytes, thresholds_gini, data_comment="", graph_comment="", intervals=None):
     
     # Create PowerPoint presentation bytes
-    ppt_data_gini = create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment)
+    ppt_data_gini = create_ppt_gini(df, fig_bytes, thresholds_gini, data_comment, graph_comment, intervals)
     
     return ppt_data_gini
 
-# Function to merge four PowerPoint presentations and apply title styling to specific slides
-def merge_presentations(presentation1, presentation2, presentation3, presentation4):
-    merged_presentation = Presentation()
-    slide_index = 1  # To keep track of the slide index
-
-    # Copy slides from presentation1 (Overview) first
-    for slide in presentation1.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
+# Function to rebuild the Gini table of a Gini workbook with the Gini engine from its bucket counts
+def gini_table_from_workbook(file_name):
+    buckets = load_dataset(file_name)
+    buckets = buckets[pd.to_numeric(buckets['PD Bucket'], errors='coerce').notna()]
+    pd_bucket = buckets['PD Bucket'].to_numpy(dtype=float)
 
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [1]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation2 (Change Log)
-    for slide in presentation2.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
+    # One weighted record for the goods and one for the bads of each bucket; bucket 1 is the riskiest
+    scores = -np.concatenate([pd_bucket, pd_bucket])
+    defaults = np.repeat([0, 1], len(pd_bucket))
+    weights = np.concatenate([buckets['Good'].to_numpy(dtype=float), buckets['Bad'].to_numpy(dtype=float)])
 
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 1
-        if merged_slide.shapes.title:
-            if slide_index in [2]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-        slide_index += 1
-        
-    # Copy slides from presentation3 (Summary)
-    for slide in presentation3.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
-
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
-
-        # Apply title styling if there is a title and the slide index is 3
-        if merged_slide.shapes.title:
-            if slide_index in [3]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-      
-        slide_index += 1
-    
-    # Copy slides from presentation4 (Gini)
-    for slide in presentation4.slides:
-        slide_layout = merged_presentation.slide_master.slide_layouts[5]
-        merged_slide = merged_presentation.slides.add_slide(slide_layout)
+    values, goods, bads = score_counts(scores, defaults, weights)
+    return gini_table(goods, bads, (-values).astype(int)), gini_curve(goods, bads)
 
-        for shape in slide.shapes:
-            clone_shape(shape, merged_slide)
+# Scored population files (one row per account with 'score' and 'default') used for the current sample when present
+SCORES_FILES = ['Gini_scores.parquet', 'Gini_scores.csv']
 
-        # Apply title styling if there is a title and the slide index is 5 or 6
-        if merged_slide.shapes.title:
-            if slide_index in [5, 6]:
-                style_title(merged_slide.shapes.title)
-                ppt_ribbon_and_logo(merged_slide, slide_index)
-        
-            if slide_index in [4]:
-                set_slide_background_and_title_style(merged_slide, merged_slide.shapes.title, slide_index)
-    
-        slide_index += 1
-    
-    return merged_presentation
+# Function to find the scored population file in the Datasets folder, if any
+def find_scores_file():
+    base_dir = os.path.dirname(__file__)
+    for file_name in SCORES_FILES:
+        path = os.path.join(base_dir, 'Datasets', file_name)
+        if os.path.exists(path):
+            return path
+    return None
+
+# Function to stream a scored population file into the Gini table and curve (computed once per file version)
+@st.cache_resource(show_spinner="Streaming the scored population...", max_entries=4)
+def _stream_gini(path, mtime_ns, size):
+    _, goods, bads = score_histogram(path)
+    curve = gini_from_histogram(goods, bads)
+    curve['x'], curve['y'] = thin_curve(curve['x'], curve['y'])
+    labels, bucket_goods, bucket_bads = rebucket_counts(goods, bads, 10)
+    return gini_table(bucket_goods, bucket_bads, labels), curve
+
+# Function to compute the Gini table and curve of a scored population file without loading it in memory
+def gini_table_from_scores_file(path):
+    stat = os.stat(path)
+    return _stream_gini(path, stat.st_mtime_ns, stat.st_size)
+
+# Function to compute the bootstrap and DeLong confidence intervals of the Gini from a Gini table (cached per table)
+@st.cache_data(show_spinner=False)
+def gini_intervals(df):
+    buckets = df[pd.to_numeric(df['PD Bucket'], errors='coerce').notna()]
+    goods = buckets['Good'].to_numpy(dtype=float)
+    bads = buckets['Bad'].to_numpy(dtype=float)
+    return {'bootstrap': bootstrap_intervals(goods, bads)['gini'], 'delong': delong_interval(goods, bads)['gini']}
 
 # Streamlit app
 def app():
@@ -663,14 +308,17 @@ def app():
                 unsafe_allow_html=True
             )
 
-    # Base directory of the current script
-    base_dir = os.path.dirname(__file__)
-    
-    # Read the Excel file
-    df = pd.read_excel(os.path.join(base_dir, 'Datasets', 'Gini_Data_dashboard.xlsx'))   # Ensure the file 'data.xlsx' is in the same directory as your script
-    # Replace None values with empty strings for better display
-    df1 = df.fillna("")
+    # Compute the Gini table of the current sample from the scored population if available, else from the bucket counts
+    scores_path = find_scores_file()
+    if scores_path:
+        df, curve = gini_table_from_scores_file(scores_path)
+    else:
+        df, curve = gini_table_from_workbook('Gini_Data_dashboard.xlsx')
+    _, curve_dev = gini_table_from_workbook('Gini_Data_dashboard_dev.xlsx')
+    comparison = compare_gini(curve_dev, curve)
+    intervals = gini_intervals(df)
     st.session_state.df_gini = df  # Save df to session_state
+    st.session_state.ci_gini = intervals['bootstrap']
     
     
     # Initialize comments
@@ -741,70 +389,6 @@ def app():
                 return f"{val:.4f}".rstrip('0').rstrip('.')
             return str(val)
 
-        # Function for creating HTML table with conditional styling
-        def create_html_table_with_download(dataframe, file_name, image_path):
-            # Encode the image as base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
-
-            # Create download link
-            download_link = f"""
-            <style>
-                .download-icon img {{
-                    width: 70px;
-                    height: 70px;
-                    border-radius: 30%;  /* Makes the image circular */
-                    transition: transform 0.3s ease, box-shadow 0.3s ease;
-                }}
-                .download-icon img:hover {{
-                    transform: scale(1.1);  /* Slight zoom effect on hover */
-                    box-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);  /* Shadow effect */
-                }}
-                .download-icon img:active {{
-                    transform: scale(0.90);  /* Slight shrink effect on click */
-                    box-shadow: none;  /* Remove shadow when clicked */
-                }}
-            </style>
-
-            <div class="download-icon">
-                <a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{base64.b64encode(to_excel(dataframe)).decode()}" download="{file_name}" title="Click to download the file">
-                    <img src="data:image/png;base64,{image_base64}" alt="Download Icon" style="width:27px; height:auto;">
-                </a>
-            </div>
-            """
-
-            last_row_index = dataframe.index[-1]
-
-            # Create HTML table with inline styling
-            html_table = f"""
-            <div class="custom-container">
-                <table class="dataframe">
-                    <thead><tr>
-            """
-            for col_name in dataframe.columns:
-                html_table += f'<th>{html.escape(col_name)}</th>'
-            html_table += '</tr></thead><tbody>'
-            for index, row in dataframe.iterrows():
-                html_table += '<tr>'
-                for col_name, col_value in row.items():
-                    style = ''
-                    formatted_value = format_value(col_value)  # Apply formatting
-                    if col_name == 'Gini Area' and index == last_row_index:
-                        style = highlight_gini(col_value, thresholds_gini)
-                    html_table += f'<td style="{style}">{html.escape(formatted_value)}</td>'
-                html_table += '</tr>'
-            html_table += '</tbody></table></div>'
-
-            # Combine the download link and the table
-            return download_link + html_table
-
-        # Function to convert DataFrame to Excel
-        def to_excel(df):
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
-            return output.getvalue()
-
         # Optional: If you want to display custom CSS separately
         custom_css = """
         <style>
@@ -865,8 +449,25 @@ def app():
         image_path = os.path.join(base_dir, 'Images', 'Download_icon.png')
 
         # Create HTML table and display it
-        html_table = create_html_table_with_download(df, "Gini_result.xlsx", image_path)
-        st.markdown(html_table, unsafe_allow_html=True)
+        # Only the Gini (last row) of the Gini Area column is highlighted, with its confidence interval
+        last_row = np.arange(len(df)) == len(df) - 1
+        styles = {'Gini Area': styles_on_rows(highlight_gini_column(df['Gini Area'], thresholds_gini), last_row)}
+        suffixes = {(len(df) - 1, 'Gini Area'): format_interval(intervals['bootstrap'])}
+        show_table(df, "Gini_result.xlsx", image_path, table_to_excel, "gini_result", styles, suffixes)
+
+        # Development vs current comparison
+        st.markdown(
+            f"""
+            <div class="info-container">
+                <strong>Development Gini:</strong> {format_value(comparison['dev_gini'])} &nbsp;|&nbsp;
+                <strong>Current Gini:</strong> {format_value(comparison['current_gini'])} &nbsp;|&nbsp;
+                <strong>AUC:</strong> {format_value(curve['auc'])} &nbsp;|&nbsp;
+                <strong>95% CI (DeLong):</strong>{format_interval(intervals['delong'])} &nbsp;|&nbsp;
+                <strong>Relative change:</strong> {comparison['relative_change']:.2%}
+                {f"&nbsp;|&nbsp; <strong>Max binning error:</strong> ±{curve['gini_error']:.6f}" if 'gini_error' in curve else ""}
+            </div>
+            """,
+            unsafe_allow_html=True)
         
         # Display the DataFrame with highlighted cell
         # st.dataframe(df_styled, width=1200)
@@ -956,14 +557,14 @@ def app():
                 """,
                 unsafe_allow_html=True)
                     
-        # Assuming df and df1 are already defined dataframes
+        # Curves of the current and development samples computed by the Gini engine
         fig = go.Figure()
         
         # Add traces
-        fig.add_trace(go.Scatter(x=df['% Cum Total'], y=df['% Cum Total'], mode='lines', name='Random', line=dict(color='red', width = 2)))
-        fig.add_trace(go.Scatter(x=df['% Cum Total'], y=df['% Cum Bad'], mode='lines', name='Actual', line=dict(color='blue', width = 2)))
+        fig.add_trace(go.Scatter(x=curve['x'], y=curve['x'], mode='lines', name='Random', line=dict(color='red', width = 2)))
+        fig.add_trace(go.Scatter(x=curve['x'], y=curve['y'], mode='lines', name='Actual', line=dict(color='blue', width = 2)))
         fig.add_trace(go.Scatter(x=df['Perfect Curve'], y=df['Perfect Curve_1'], mode='lines', name='Perfect Curve', line=dict(color='purple', width = 2)))
-        fig.add_trace(go.Scatter(x=df1['% Cum Total'], y=df1['% Cum Bad'], mode='lines', name='Development', line=dict(color='gray', width = 2)))
+        fig.add_trace(go.Scatter(x=curve_dev['x'], y=curve_dev['y'], mode='lines', name='Development', line=dict(color='gray', width = 2)))
         
         # Update layout
         fig.update_layout(
@@ -1022,14 +623,15 @@ def app():
                     st.session_state.graph_comment_gini = graph_comment_gini
                     graph_comment_modal.close()
                 
-        # Convert plot figure to PNG bytes
-        fig_bytes = pio.to_image(fig, format='png')
+        # Convert plot figure to PNG bytes in the background, reused while the figure is unchanged
+        fig_bytes = figure_png_future(fig)
         st.session_state.fig_bytes = fig_bytes
         st.session_state.thresholds_gini = thresholds_gini
         
-        ppt_data_gini = create_ppt_download_button_gini(df, fig_bytes, thresholds_gini, st.session_state.get("data_comment_gini", ""), st.session_state.get("graph_comment_gini", ""))
+        data_comment_gini = st.session_state.get("data_comment_gini", "")
+        graph_comment_gini = st.session_state.get("graph_comment_gini", "")
         
-        ppt_data_overview = ppt_data_change_log = ppt_data_summary = None
+        ppt_data_overview = ppt_data_change_log = ppt_data_summary = merged_presentation_bytesio = None
         
         if 'ppt_data_overview' in st.session_state:
             ppt_data_overview = st.session_state.ppt_data_overview
@@ -1040,32 +642,36 @@ def app():
         if 'ppt_data_summary' in st.session_state:
             ppt_data_summary = st.session_state.ppt_data_summary
             
-        if ppt_data_overview and ppt_data_change_log and ppt_data_summary and ppt_data_gini:
-            presentation1 = load_presentation_from_bytesio(ppt_data_overview)
-            presentation2 = load_presentation_from_bytesio(ppt_data_change_log)
-            presentation3 = load_presentation_from_bytesio(ppt_data_summary)
-            presentation4 = load_presentation_from_bytesio(ppt_data_gini)
+        # Function to build the Dashboard presentation, only run when the user asks for it
+        # Only the sections changed since the last Dashboard of the session are rebuilt
+        def build_dashboard(progress):
+            return assemble_presentation("dashboard", [
+                ("Overview", (ppt_data_overview,), lambda: ppt_data_overview),
+                ("Change Log", (ppt_data_change_log,), lambda: ppt_data_change_log),
+                ("Summary", (ppt_data_summary,), lambda: ppt_data_summary),
+                ("Gini", (df, fig_bytes, thresholds_gini, data_comment_gini, graph_comment_gini, intervals['bootstrap']),
+                 lambda: create_ppt_download_button_gini(df, fig_bytes, thresholds_gini, data_comment_gini, graph_comment_gini, intervals['bootstrap'])),
+            ], progress)
             
-            merged_presentation = merge_presentations(presentation1, presentation2, presentation3, presentation4)
-            merged_presentation_bytesio = BytesIO()
-            merged_presentation.save(merged_presentation_bytesio)
-            merged_presentation_bytesio.seek(0)
-        
+        if ppt_data_overview and ppt_data_change_log and ppt_data_summary:
+            # The presentation is kept in the session until one of its inputs changes
+            merged_presentation_bytesio = lazy_download("dashboard_gini", build_dashboard, (ppt_data_overview, ppt_data_change_log, ppt_data_summary, df, fig_bytes, thresholds_gini, data_comment_gini, graph_comment_gini, intervals['bootstrap']), "Dashboard.pptx", "Click here to prepare the Dashboard PowerPoint presentation")
+            
+        if merged_presentation_bytesio is not None:
             # Base directory of the current script
             base_dir = os.path.dirname(__file__)
             
             # Construct the path for the image
             image_path = os.path.join(base_dir, "Images", "ppt_logo.png")
             
-            # Read and encode the image to base64
-            with open(image_path, "rb") as image_file:
-                image_base64 = base64.b64encode(image_file.read()).decode()
+            # Serve the icon from the artifact store
+            image_url = file_url(image_path)
             
             # Convert BytesIO to bytes
             ppt_data_merged_bytes = merged_presentation_bytesio.getvalue()
             
-            # Encode the PPT data to base64
-            ppt_data_merged_base64 = base64.b64encode(ppt_data_merged_bytes).decode()
+            # Store the PPT file once under its content hash instead of embedding it in the page
+            ppt_data_merged_url = artifact_url(ppt_data_merged_bytes, "Dashboard.pptx")
             
             # Help text
             help_text = "Click here to download the Dashboard into PowerPoint presentation"
@@ -1084,8 +690,8 @@ def app():
             
             # Create the HTML for the button with image and help text
             ppt_button_html = f"""
-            <a href="data:application/vnd.openxmlformats-officedocument.presentationml.presentation;base64,{ppt_data_merged_base64}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
-                <img src="data:image/png;base64,{image_base64}" alt="Download PPT">
+            <a href="{ppt_data_merged_url}" download="Dashboard.pptx" class="ppt-download-button" title="{help_text}">
+                <img src="{image_url}" alt="Download PPT">
             </a>
             """
             
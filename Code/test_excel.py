@@ -0,0 +1,52 @@
+import os
+import struct
+import zipfile
+from io import BytesIO
+from openpyxl import load_workbook
+from Excel import patch_workbook, sheet_parts
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'Datasets', 'Excel_workbook.xlsx')
+
+
+# Function to get the compressed bytes of a zip member as stored
+def _stored_bytes(archive, info):
+    archive.fp.seek(info.header_offset)
+    name_length, extra_length = struct.unpack('<2H', archive.fp.read(30)[26:])
+    archive.fp.seek(name_length + extra_length, 1)
+    return archive.fp.read(info.compress_size)
+
+# Function to check every member of a patched workbook but the changed ones is stored exactly as in the template
+def _assert_copied_as_stored(template, patched, changed):
+    with zipfile.ZipFile(template) as source, zipfile.ZipFile(patched) as target:
+        assert target.testzip() is None
+        copied = [info for info in source.infolist() if info.filename not in changed and info.filename != 'xl/calcChain.xml']
+        assert copied
+        for info in copied:
+            copy = target.getinfo(info.filename)
+            assert (copy.CRC, copy.compress_size, copy.compress_type) == (info.CRC, info.compress_size, info.compress_type)
+            assert _stored_bytes(target, copy) == _stored_bytes(source, info)
+
+
+def test_unchanged_members_are_copied_as_stored():
+    with zipfile.ZipFile(TEMPLATE_PATH) as template:
+        parts = sheet_parts(template)
+    rows = [['Metric', 'Value'], ['Gini', 0.48], ['PSI', 0.02]]
+    patched = patch_workbook(TEMPLATE_PATH, {'support': rows})
+
+    changed = {'[Content_Types].xml', 'xl/_rels/workbook.xml.rels', 'xl/styles.xml', 'xl/workbook.xml', parts['support']}
+    _assert_copied_as_stored(TEMPLATE_PATH, patched, changed)
+    support = load_workbook(patched)['support']
+    assert [list(row) for row in support.iter_rows(max_row=3, max_col=2, values_only=True)] == rows
+
+
+def test_a_patched_workbook_can_be_patched_again():
+    first = patch_workbook(TEMPLATE_PATH, {'support': [['Metric', 'Value'], ['Gini', 0.48]]})
+    with zipfile.ZipFile(first) as archive:
+        change_log = sheet_parts(archive)['1. Change_Log']
+        last_row = load_workbook(BytesIO(first.getvalue()))['1. Change_Log'].max_row
+    second = patch_workbook(first, appended_rows={'1. Change_Log': [['Model', 'Recalibration']]})
+
+    changed = {'[Content_Types].xml', 'xl/_rels/workbook.xml.rels', 'xl/styles.xml', 'xl/workbook.xml', change_log}
+    _assert_copied_as_stored(BytesIO(first.getvalue()), second, changed)
+    sheet = load_workbook(second)['1. Change_Log']
+    assert [cell.value for cell in sheet[last_row + 1][:2]] == ['Model', 'Recalibration']
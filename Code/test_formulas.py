@@ -0,0 +1,65 @@
+import os
+import math
+import zipfile
+import xml.etree.ElementTree as ET
+from Formulas import WorkbookFormulas, read_workbook_formulas, _cell_key, _saved_value, _shared_strings, MAIN_NAMESPACE
+from Excel import sheet_parts
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), 'Datasets', 'Excel_workbook.xlsx')
+
+
+# Function to get the values Excel saved for the formula cells of a workbook {(sheet, row, column): value}
+def _saved_formula_values(path):
+    saved = {}
+    with zipfile.ZipFile(path) as archive:
+        strings = _shared_strings(archive)
+        for sheet, part in sheet_parts(archive).items():
+            for _, element in ET.iterparse(archive.open(part)):
+                if element.tag == f'{MAIN_NAMESPACE}c' and element.find(f'{MAIN_NAMESPACE}f') is not None:
+                    saved[_cell_key(sheet, element.get('r'))] = _saved_value(element, strings)
+    return saved
+
+# Function to check two cell values are the same, floats up to rounding
+def _same_value(computed, saved):
+    if isinstance(computed, float) and isinstance(saved, float):
+        return math.isclose(computed, saved, rel_tol=1e-9, abs_tol=1e-12)
+    return computed == saved and type(computed) is type(saved)
+
+
+def test_template_formulas_reproduce_the_saved_values():
+    formulas = read_workbook_formulas(TEMPLATE_PATH)
+    saved = _saved_formula_values(TEMPLATE_PATH)
+    assert set(formulas.formulas) == set(saved)
+    mismatches = {cell: (formulas.values.get(cell), value) for cell, value in saved.items()
+                  if not _same_value(formulas.values.get(cell), value)}
+    assert mismatches == {}
+
+
+def test_recalculate_only_the_dependents():
+    formulas = WorkbookFormulas(['Sheet1'])
+    formulas.set_values('Sheet1', {'A1': 1, 'B1': '=A1*2', 'C1': '=B1+1', 'D1': '=5', 'E1': '=SUM(A1:A3)'})
+    assert formulas.value('Sheet1', 'C1') == 3.0
+
+    recomputed = formulas.set_values('Sheet1', {'A1': 3})
+    assert recomputed == {_cell_key('Sheet1', reference) for reference in ('B1', 'C1', 'E1')}
+    assert [formulas.value('Sheet1', reference) for reference in ('B1', 'C1', 'D1', 'E1')] == [6.0, 7.0, 5.0, 3.0]
+
+    # A cell of a range, blank before
+    assert formulas.set_values('Sheet1', {'A2': 4}) == {_cell_key('Sheet1', 'E1')}
+    assert formulas.value('Sheet1', 'E1') == 7.0
+
+
+def test_incremental_recalculation_of_the_template_matches_a_full_one():
+    template = read_workbook_formulas(TEMPLATE_PATH)
+    support = template.sheets['support']
+    read_cells = sorted(cell for cell in template.dependents if cell[0] == support and cell not in template.formulas)
+
+    incremental = template.copy()
+    recomputed = incremental.set_values('support', {f"B{row}": 0.25 for _, row, column in read_cells if column == 2})
+    assert recomputed and len(recomputed) < len(template.formulas)
+
+    full = incremental.copy()
+    full._recalculate(set(full.formulas))
+    assert all(_same_value(incremental.values.get(cell), full.values.get(cell)) for cell in full.formulas)
+    # The template model is not changed by its copies
+    assert template.values == read_workbook_formulas(TEMPLATE_PATH).values
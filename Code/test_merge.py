@@ -0,0 +1,88 @@
+import zipfile
+from io import BytesIO
+from types import SimpleNamespace
+from PIL import Image
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.opc.packuri import PackURI
+from pptx.util import Inches
+import Merge
+from Merge import merge_presentations, assemble_presentation, _append_slides, _image_parts
+from Template import template_presentation
+
+
+# Function to get the bytes of a small PNG of one colour
+def _png(colour):
+    image = BytesIO()
+    Image.new('RGB', (8, 8), colour).save(image, format='PNG')
+    return image.getvalue()
+
+# Function to build a saved deck on the template: one slide per picture (all with the logo) and optionally a slide with a chart
+def _deck(pictures, chart=False):
+    presentation = template_presentation()
+    layout = presentation.slide_layouts[Merge.DEFAULT_LAYOUT_INDEX]
+    for picture in pictures:
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.add_picture(BytesIO(_png('navy')), Inches(0), Inches(0))
+        slide.shapes.add_picture(BytesIO(picture), Inches(1), Inches(1))
+    if chart:
+        chart_data = CategoryChartData()
+        chart_data.categories = ['1', '2']
+        chart_data.add_series('Bad Rate', (0.1, 0.2))
+        presentation.slides.add_slide(layout).shapes.add_chart(
+            XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(1), Inches(1), Inches(4), Inches(3), chart_data)
+    output = BytesIO()
+    presentation.save(output)
+    return output.getvalue()
+
+# Function to check the zip members of a saved presentation have unique names, returns the re-opened presentation and the names
+def _reopen(output):
+    names = zipfile.ZipFile(output).namelist()
+    assert len(names) == len(set(names))
+    output.seek(0)
+    return Presentation(output), names
+
+# Function to save a presentation and re-open it (see _reopen)
+def _save_and_reopen(presentation):
+    output = BytesIO()
+    presentation.save(output)
+    return _reopen(output)
+
+def test_merged_deck_reopens_with_unique_part_names():
+    first = Presentation(BytesIO(_deck([_png('red'), _png('green')], chart=True)))
+    second = Presentation(BytesIO(_deck([_png('blue')], chart=True)))
+    merged, names = _save_and_reopen(merge_presentations(first, second))
+    assert len(merged.slides) == 5
+
+    # The logo is stored once, every chart gets its own parts
+    media = [name for name in names if name.startswith('ppt/media/')]
+    template_media = [name for name in _save_and_reopen(template_presentation())[1] if name.startswith('ppt/media/')]
+    assert len(media) == len(template_media) + 4
+    assert len([name for name in names if name.startswith('ppt/charts/chart')]) == 2
+    assert len([name for name in names if name.startswith('ppt/embeddings/')]) == 2
+
+
+def test_new_images_take_free_part_names():
+    merged = template_presentation()
+    slide = merged.slides.add_slide(merged.slide_layouts[Merge.DEFAULT_LAYOUT_INDEX])
+    picture = slide.shapes.add_picture(BytesIO(_png('red')), Inches(0), Inches(0))
+    # Image names with a gap, the next image must not take the name of an existing one
+    image_part = slide.part.related_part(picture._element.blipFill.blip.rEmbed)
+    image_part.partname = PackURI(f"/ppt/media/image{len(_image_parts(merged)) + 1}.png")
+
+    _append_slides(merged, Presentation(BytesIO(_deck([_png('green')]))), _image_parts(merged))
+    reopened, _ = _save_and_reopen(merged)
+    assert len(reopened.slides) == 2
+
+
+def test_replaced_sections_keep_unique_part_names(monkeypatch):
+    monkeypatch.setattr(Merge, 'st', SimpleNamespace(session_state={}))
+    red, green, blue = _png('red'), _png('green'), _png('blue')
+
+    # Each run replaces a section, the images of removed slides must not be reused under a name given away since
+    for first, second in ((red, green), (blue, green), (blue, red)):
+        sections = [('First', (first,), lambda first=first: _deck([first])),
+                    ('Second', (second,), lambda second=second: _deck([second]))]
+        reopened, _ = _reopen(assemble_presentation('test', sections))
+        assert len(reopened.slides) == 2
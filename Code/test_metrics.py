@@ -0,0 +1,191 @@
+import os
+import math
+import numpy as np
+import pytest
+import pandas as pd
+from Metrics import (GINI_COLUMNS, gini_table, psi_table, csi_batch, csi_ranking, ks_summary, ks_bucket_table,
+                     rank_ordering_table, performance_cumsums, update_performance_cumsums, calibration_tests)
+
+
+# Datasets shipped with the dashboard, the monitoring workbooks the engines are checked against
+DATASETS_DIR = os.path.join(os.path.dirname(__file__), 'Datasets')
+
+
+# Function to read a Gini workbook: the bucket rows and the Gini it reports
+def _gini_workbook(file_name):
+    workbook = pd.read_excel(os.path.join(DATASETS_DIR, file_name))
+    gini = workbook.loc[workbook['% Cum Total'] == 'Gini', 'Gini Area'].iloc[0]
+    return workbook[pd.to_numeric(workbook['PD Bucket'], errors='coerce').notna()], gini
+
+
+def test_gini_table_matches_the_workbooks():
+    for file_name, expected_gini in (('Gini_Data_dashboard.xlsx', 0.035749), ('Gini_Data_dashboard_dev.xlsx', 0.482237)):
+        buckets, workbook_gini = _gini_workbook(file_name)
+        table = gini_table(buckets['Good'], buckets['Bad'], buckets['PD Bucket'].astype(int))
+        assert list(table.columns) == GINI_COLUMNS
+        assert abs(table['Gini Area'].iloc[-1] - expected_gini) < 5e-7
+        assert abs(table['Gini Area'].iloc[-1] - workbook_gini) < 1e-9
+
+        rows = table.iloc[:len(buckets)]
+        for column in ['Good', 'Bad', 'Total', 'Bad Rate', 'Cum Bad', 'Cum Total', '% Cum Bad', '% Cum Total', 'Gini Area']:
+            np.testing.assert_allclose(rows[column].astype(float), buckets[column].astype(float), rtol=1e-6, err_msg=column)
+
+
+def test_gini_table_perfect_curve_starts_every_bucket_after_all_bads():
+    buckets, _ = _gini_workbook('Gini_Data_dashboard.xlsx')
+    goods, bads = buckets['Good'].to_numpy(dtype=float), buckets['Bad'].to_numpy(dtype=float)
+    table = gini_table(goods, bads, buckets['PD Bucket'].astype(int))
+    total = goods.sum() + bads.sum()
+
+    # Points of the perfect model's curve: the origin, all bads, then the goods bucket by bucket up to (1, 1) on the Total row
+    n = len(goods)
+    expected_x = np.concatenate([[0.0], (bads.sum() + np.concatenate([[0.0], np.cumsum(goods)[:-2]])) / total, [1.0]])
+    np.testing.assert_allclose(table['Perfect Curve'].iloc[:n + 1].astype(float), expected_x)
+    np.testing.assert_allclose(table['Perfect Curve_1'].iloc[:n + 1].astype(float), [0.0] + [1.0] * n)
+
+
+# Function to read the bin frequencies of every month: the months and a (months, bins) matrix of counts
+def _bin_counts():
+    bins = pd.read_excel(os.path.join(DATASETS_DIR, 'Table of bin by date_ref(Data).xlsx'))
+    bins = bins[pd.to_numeric(bins['bin'], errors='coerce').notna()]
+    periods = [column for column in bins.columns if isinstance(column, int)]
+    return periods, bins[periods].to_numpy(dtype=float).T
+
+
+def test_psi_table_matches_the_workbook():
+    periods, period_counts = _bin_counts()
+    dev, _ = _gini_workbook('Gini_Data_dashboard_dev.xlsx')
+    stability = pd.read_excel(os.path.join(DATASETS_DIR, 'STABILITY - EXPECTED PD(Data).xlsx')).set_index('date_ref')
+
+    table = psi_table(dev['Total'].to_numpy(dtype=float), period_counts, [str(period) for period in periods],
+                      predicted_pd=stability['meanpd'].reindex(periods).to_numpy(dtype=float),
+                      dev_pd=dev['Bad'].sum() / dev['Total'].sum())
+
+    workbook = pd.read_excel(os.path.join(DATASETS_DIR, 'PSI_Data_dashboard.xlsx'))
+    assert list(table.columns) == ['PD Bucket', 'Dev'] + [str(period) for period in periods]
+    assert list(table['PD Bucket'].dropna()) == list(workbook['PD Bucket'].dropna())
+    np.testing.assert_allclose(table.iloc[:, 1:].to_numpy(dtype=float), workbook.iloc[:, 1:].to_numpy(dtype=float), atol=1e-9)
+
+    # The PSI of the last month, as the workbook shows it
+    assert abs(table.loc[table['PD Bucket'] == 'PSI', '202403'].iloc[0] - 0.817342) < 5e-7
+
+
+# Function to build the long characteristic frequencies (characteristic, attribute, date_ref, count) of some count matrices
+def _frequencies(characteristics, periods):
+    frames = []
+    for name, (dev_counts, period_counts) in characteristics.items():
+        attributes = np.arange(1, len(dev_counts) + 1)
+        frames.append(pd.DataFrame({'characteristic': name, 'attribute': attributes, 'date_ref': 'Dev', 'count': dev_counts}))
+        for period, counts in zip(periods, period_counts):
+            frames.append(pd.DataFrame({'characteristic': name, 'attribute': attributes, 'date_ref': str(period), 'count': counts}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_csi_of_the_score_is_the_workbook_psi():
+    periods, period_counts = _bin_counts()
+    dev, _ = _gini_workbook('Gini_Data_dashboard_dev.xlsx')
+    dev_counts = dev['Total'].to_numpy(dtype=float)
+
+    # A second characteristic whose attributes are the score bins in reverse order drifts differently
+    frequencies = _frequencies({'Score': (dev_counts, period_counts), 'Reversed': (dev_counts[::-1], period_counts[:, ::-1] * 2)}, periods)
+    csi = csi_batch(frequencies)
+    assert sorted(csi.index) == ['Reversed', 'Score']
+    assert list(csi.columns) == [str(period) for period in periods]
+
+    workbook = pd.read_excel(os.path.join(DATASETS_DIR, 'PSI_Data_dashboard.xlsx'))
+    psi = workbook.loc[workbook['PD Bucket'] == 'PSI', periods].iloc[0].to_numpy(dtype=float)
+    np.testing.assert_allclose(csi.loc['Score'], psi, atol=1e-9)
+    # Reversing the attributes and doubling the counts leaves the shares, and so the CSI, unchanged
+    np.testing.assert_allclose(csi.loc['Reversed'], psi, atol=1e-9)
+    pd.testing.assert_frame_equal(csi_batch(frequencies, workers=0), csi)
+
+
+def test_csi_ranking_orders_by_the_latest_csi():
+    csi = pd.DataFrame({'202401': [0.05, 0.30, 0.12], '202402': [0.02, 0.28, 0.15]}, index=['Age', 'Income', 'Tenure'])
+    ranking = csi_ranking(csi, amber=0.1, red=0.25)
+    assert list(ranking['Characteristic']) == ['Income', 'Tenure', 'Age']
+    assert list(ranking['Rank']) == [1, 2, 3]
+    np.testing.assert_allclose(ranking['Change'], [-0.02, 0.03, -0.03])
+    assert list(ranking['Periods > 0.1']) == [2, 2, 0]
+    assert list(ranking['Periods > 0.25']) == [2, 0, 0]
+
+
+def test_ks_and_rank_ordering_of_one_month():
+    # Bad rates 30%, 10%, 20%: the third bucket is riskier than the second, a rank ordering break
+    performance = pd.DataFrame({'date_ref': 202401, 'bin': [0, 1, 2], 'sum': [100, 100, 100], 'bads': [30, 10, 20]})
+    summary = ks_summary(performance)
+    assert summary['KS'].iloc[0] == pytest.approx(30 / 60 - 70 / 240)
+    assert summary['KS Bucket'].iloc[0] == 1
+    assert summary['Bad Rate'].iloc[0] == pytest.approx(0.2)
+
+    table, breaks = rank_ordering_table(performance)
+    assert list(table['Rank Ordering'].iloc[:1]) == ['Broken']
+    assert table['Breaks'].iloc[0] == 1
+    assert breaks.iloc[0].tolist() == [False, False, True]
+
+
+def test_ks_summary_is_the_largest_bucket_difference():
+    performance = pd.read_excel(os.path.join(DATASETS_DIR, 'PERFORMANCE HISTORICAL(Data).xlsx'))
+    summary = ks_summary(performance)
+    assert len(summary) == performance['date_ref'].nunique()
+    for period, ks, bucket in zip(summary['date_ref'], summary['KS'], summary['KS Bucket']):
+        table = ks_bucket_table(performance, period)
+        assert ks == pytest.approx(table['Difference'].max())
+        assert bucket == table['PD Bucket'].iloc[table['Difference'].argmax()]
+
+
+# Function to build a small performance history: 3 bins for every month
+def _performance(months, scale=1):
+    rows = []
+    for month in months:
+        for bin_ in range(3):
+            rows.append({'date_ref': month, 'bin': bin_, 'sum': 100 * (bin_ + 1) * scale, 'bads': 5 * (bin_ + 1),
+                         'meanpd': 0.01 * (bin_ + 1), 'minpd': 0.0, 'maxpd': 0.1, 'enr': 1000})
+    return pd.DataFrame(rows)
+
+# Function to check two running totals states hold the same months and totals
+def _assert_same_totals(state, expected):
+    np.testing.assert_array_equal(state['periods'], expected['periods'])
+    for column, values in expected['cum'].items():
+        np.testing.assert_allclose(state['cum'][column], values)
+
+
+def test_new_months_are_appended():
+    history = _performance([202401, 202402])
+    state = performance_cumsums(history)
+    extended = pd.concat([history, _performance([202403])], ignore_index=True)
+    _assert_same_totals(update_performance_cumsums(state, extended), performance_cumsums(extended))
+
+
+def test_restated_month_rebuilds_the_totals():
+    history = _performance([202401, 202402, 202403])
+    state = performance_cumsums(history)
+
+    # The accounts of an already accumulated month are restated, the months themselves are unchanged
+    restated = pd.concat([_performance([202401]), _performance([202402], scale=2), _performance([202403])], ignore_index=True)
+    updated = update_performance_cumsums(state, restated)
+    _assert_same_totals(updated, performance_cumsums(restated))
+    assert updated['cum']['sum'][-1].sum() != state['cum']['sum'][-1].sum()
+
+
+def test_restated_month_with_new_month_rebuilds_the_totals():
+    history = _performance([202401, 202402])
+    state = performance_cumsums(history)
+    restated = pd.concat([_performance([202401], scale=3), _performance([202402, 202403])], ignore_index=True)
+    _assert_same_totals(update_performance_cumsums(state, restated), performance_cumsums(restated))
+
+
+def test_calibration_tests_of_two_buckets():
+    # 3 defaults out of 20 accounts at a 5% PD, 1 out of 50 at 10%
+    tests = calibration_tests([3, 1], [20, 50], [0.05, 0.10])
+    binomial = 1 - sum(math.comb(20, j) * 0.05 ** j * 0.95 ** (20 - j) for j in range(3))
+    assert tests['binomial_p_value'][0] == pytest.approx(binomial, rel=1e-10)
+    # No test of a PD being too low fails on a bucket with fewer defaults than expected
+    assert tests['binomial_p_value'][1] > 0.99 and tests['binomial_pass'].all()
+
+    statistic = (3 - 1) ** 2 / (1 * 0.95) + (1 - 5) ** 2 / (5 * 0.9)
+    assert tests['hl_statistic'] == pytest.approx(statistic)
+    assert tests['hl_df'] == 2
+    # Two degrees of freedom: the chi-square survival function is exp(-x / 2)
+    assert tests['hl_p_value'] == pytest.approx(math.exp(-statistic / 2), rel=1e-10)
+    assert not tests['hl_pass']
@@ -0,0 +1,41 @@
+import math
+from fractions import Fraction
+import numpy as np
+import pytest
+from Stats import gammaln, betainc, chi2_sf
+
+
+# Function to compute P(X >= k) of a binomial(n, p) exactly with rationals, the reference of I_p(k, n - k + 1)
+def _binomial_tail(n, k, p):
+    p = Fraction(str(p))
+    below = sum(math.comb(n, j) * p ** j * (1 - p) ** (n - j) for j in range(k))
+    return float(1 - below)
+
+
+def test_gammaln_matches_lgamma():
+    x = np.array([0.5, 1.0, 1.5, 2.0, 7.25, 30.5, 1e3, 1e5])
+    np.testing.assert_allclose(gammaln(x), [math.lgamma(value) for value in x], rtol=1e-13, atol=1e-13)
+
+
+def test_betainc_closed_forms():
+    x = np.array([1e-6, 0.01, 0.3, 0.5, 0.9, 1 - 1e-9])
+    np.testing.assert_allclose(betainc(3.0, 1.0, x), x ** 3, rtol=1e-10)
+    np.testing.assert_allclose(betainc(1.0, 4.0, x), -np.expm1(4 * np.log1p(-x)), rtol=1e-10)
+    # Jeffreys prior of a sample without defaults: I_x(1/2, 1/2) = 2 arcsin(sqrt(x)) / pi
+    np.testing.assert_allclose(betainc(0.5, 0.5, x), 2 * np.arcsin(np.sqrt(x)) / np.pi, rtol=1e-10)
+    np.testing.assert_allclose(betainc(250.0, 250.0, 0.5), 0.5, rtol=1e-10)
+    assert betainc(2.0, 3.0, 0.0) == 0.0 and betainc(2.0, 3.0, 1.0) == 1.0
+
+
+@pytest.mark.parametrize('n, k, p', [(20, 3, 0.05), (1000, 12, 0.01), (10000, 40, 0.002), (5000, 2, 0.0001), (400, 200, 0.5)])
+def test_betainc_is_the_binomial_tail(n, k, p):
+    assert betainc(k, n - k + 1, p) == pytest.approx(_binomial_tail(n, k, p), rel=1e-10)
+
+
+def test_chi2_sf_closed_forms():
+    x = np.array([0.01, 1.0, 3.84, 20.0, 100.0, 200.0])
+    # Two degrees of freedom: exp(-x / 2), four: exp(-x / 2) (1 + x / 2), one: erfc(sqrt(x / 2))
+    np.testing.assert_allclose(chi2_sf(x, 2), np.exp(-x / 2), rtol=1e-10)
+    np.testing.assert_allclose(chi2_sf(x, 4), np.exp(-x / 2) * (1 + x / 2), rtol=1e-10)
+    np.testing.assert_allclose(chi2_sf(x, 1), [math.erfc(math.sqrt(value / 2)) for value in x], rtol=1e-10)
+    assert chi2_sf(0.0, 3) == 1.0